@@ -0,0 +1,302 @@
+"""Async implementations of the catalog read endpoints and the FiveM callback, served instead of api.views under ASGI.
+
+Each view returns the same JSON as its namesake in api.views, but queries
+through the async ORM (``afirst``, ``async for``, aprefetch_related_objects)
+and the cache's async API, and calls FiveM through api.outbound's async
+client, so an ASGI worker keeps serving other requests while one waits on
+the database or the network. api.urls routes to them when
+API_ASYNC_VIEWS is set, as the opt-in zrg.settings_asgi does.
+"""
+import datetime
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models import aprefetch_related_objects
+from django.shortcuts import aget_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from . import facets, fivem
+from .cache import cached_response
+from .models import FAQ, BlogPost, FeaturedServer, Script, Stats, TeamMember, Testimonial
+from .pagination import DEFAULT_PAGE_SIZE, InvalidCursor, afetch_page, apaginate, apaginated_response, next_page_url, wants_pagination
+from .responses import ApiJsonResponse, StreamingJsonResponse, wants_streaming
+from .routing import read_from_replica
+from .snapshots import serve_snapshot
+from .views import (
+    REVIEW_SORTS, blog_post_data, blog_post_summary, faq_data, featured_server_data, review_data, reviews_summary,
+    script_detail, script_summary, team_member_data, testimonial_data,
+)
+
+
+def acondition(etag_func, last_modified_func):
+    """Async counterpart of Django's @condition, whose ETag/Last-Modified callbacks can only be sync.
+
+    Both callbacks are awaited before the view and the response is built
+    with the same rules (304/412 handling, headers on safe methods).
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            last_modified = None
+            if dt := await last_modified_func(request, *args, **kwargs):
+                if not timezone.is_aware(dt):
+                    dt = timezone.make_aware(dt, datetime.timezone.utc)
+                last_modified = int(dt.timestamp())
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def aversion_stamp(request, model, slug):
+    """Async version of views.version_stamp()."""
+    stamps = request.__dict__.setdefault('_version_stamps', {})
+    key = (model, slug)
+    if key not in stamps:
+        stamps[key] = await model.objects.filter(slug=slug).values_list('pk', 'version', 'updated_at').afirst()
+    return stamps[key]
+
+
+async def script_etag(request, slug):
+    stamp = await aversion_stamp(request, Script, slug)
+    return f'"script-{stamp[0]}-{stamp[1]}"' if stamp else None
+
+
+async def script_last_modified(request, slug):
+    stamp = await aversion_stamp(request, Script, slug)
+    return stamp[2] if stamp else None
+
+
+async def blog_post_etag(request, slug):
+    stamp = await aversion_stamp(request, BlogPost, slug)
+    return f'"post-{stamp[0]}-{stamp[1]}"' if stamp else None
+
+
+async def blog_post_last_modified(request, slug):
+    stamp = await aversion_stamp(request, BlogPost, slug)
+    return stamp[2] if stamp else None
+
+
+@cached_response(Stats)
+async def stats_view(request):
+    """Returns the stats data as a JSON response."""
+    try:
+        stats = await Stats.objects.afirst()
+        if stats:
+            data = {
+                "active_users": stats.get_active_users(),
+                "premium_scripts": stats.get_premium_scripts(),
+            }
+        else:
+            data = {
+                "active_users": 0,
+                "premium_scripts": 0,
+            }
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data)
+
+
+@serve_snapshot('featured_servers')
+@cached_response(FeaturedServer)
+async def featured_servers_view(request):
+    """Returns the featured servers data as a JSON response."""
+    try:
+        data = [featured_server_data(server) async for server in FeaturedServer.objects.all()]
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+@read_from_replica
+async def script_reviews_view(request, slug):
+    """Returns a cursor-paginated page of a script's reviews with a rating summary."""
+    sort = request.GET.get('sort', 'newest')
+    if sort not in REVIEW_SORTS:
+        return ApiJsonResponse({"error": f"Invalid sort. Use one of: {', '.join(REVIEW_SORTS)}."}, status=400)
+    script = await Script.objects.filter(slug=slug).only('pk', *Script.REVIEW_AGGREGATE_FIELDS).afirst()
+    if not script:
+        return ApiJsonResponse({"error": "Script not found."}, status=404)
+    try:
+        reviews, next_cursor = await apaginate(request, script.get_reviews(), REVIEW_SORTS[sort])
+    except InvalidCursor as e:
+        return ApiJsonResponse({"error": str(e)}, status=400)
+    return ApiJsonResponse({
+        "summary": reviews_summary(script),
+        "results": [review_data(review) for review in reviews],
+        "next": next_page_url(request, next_cursor),
+    })
+
+
+@read_from_replica
+@acondition(etag_func=script_etag, last_modified_func=script_last_modified)
+async def script_by_slug_view(request, slug):
+    """Returns a script by its slug as a JSON response."""
+    try:
+        script = await aget_object_or_404(Script, slug=slug)
+        await aprefetch_related_objects([script], 'images', 'categories', 'frameworks', 'showcase_servers')
+        reviews, next_cursor = await afetch_page(script.get_reviews(), REVIEW_SORTS['newest'], DEFAULT_PAGE_SIZE)
+        data = script_detail(request, script, list(script.images.all()), reviews, next_cursor)
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data)
+
+
+async def filtered_scripts_response(request):
+    """Returns a cursor-paginated page of the scripts matching the request's filters, with their count and facet counts."""
+    try:
+        filters = facets.parse_filters(request.GET)
+        scripts = facets.filter_scripts(Script.objects.prefetch_related('categories', 'frameworks', 'showcase_servers'), filters)
+        scripts, next_cursor = await apaginate(request, scripts, facets.SCRIPT_SORTS[filters['sort']])
+    except (facets.InvalidFilter, InvalidCursor) as e:
+        return ApiJsonResponse({"error": str(e)}, status=400)
+    return ApiJsonResponse({
+        "results": [script_summary(script) for script in scripts],
+        "count": await facets.filter_scripts(Script.objects.all(), filters).acount(),
+        "facets": await facets.afacet_counts(filters),
+        "next": next_page_url(request, next_cursor),
+    })
+
+
+@serve_snapshot('scripts')
+@read_from_replica
+async def all_scripts_view(request):
+    """Returns all scripts as a JSON response, a cursor-paginated page or a streamed array, or a filtered page."""
+    try:
+        if facets.wants_filtering(request):
+            return await filtered_scripts_response(request)
+        scripts = Script.objects.prefetch_related('categories', 'frameworks', 'showcase_servers')
+        if wants_pagination(request):
+            return await apaginated_response(request, scripts, script_summary, ordering='-created_at')
+        if wants_streaming(request):
+            return StreamingJsonResponse(scripts, script_summary, asynchronous=True)
+        data = [script_summary(script) async for script in scripts]
+    except Exception as e:
+        data = {"error": f"Failed to fetch scripts: {str(e)}"}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+@cached_response(Testimonial)
+async def all_testimonials_view(request):
+    """Returns all testimonials as a JSON response, a cursor-paginated page or a streamed array."""
+    try:
+        testimonials = Testimonial.objects.all()
+        if wants_pagination(request):
+            return await apaginated_response(request, testimonials, testimonial_data, ordering='-date')
+        if wants_streaming(request):
+            return StreamingJsonResponse(testimonials, testimonial_data, asynchronous=True)
+        data = [testimonial_data(testimonial) async for testimonial in testimonials]
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+@serve_snapshot('faqs')
+@read_from_replica
+@cached_response(FAQ)
+async def faq_view(request):
+    """Returns all FAQs as a JSON response, or a cursor-paginated page when `limit`/`cursor` is given."""
+    try:
+        faqs = FAQ.objects.all()
+        if wants_pagination(request):
+            return await apaginated_response(request, faqs, faq_data)
+        data = [faq_data(faq) async for faq in faqs]
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+@read_from_replica
+@acondition(etag_func=blog_post_etag, last_modified_func=blog_post_last_modified)
+async def blog_post_view(request, slug):
+    """Returns a blog post by its slug as a JSON response."""
+    try:
+        post = await BlogPost.objects.filter(slug=slug).afirst()
+        if not post:
+            return ApiJsonResponse({"error": "Blog post not found."}, status=404)
+        return ApiJsonResponse(blog_post_data(post))
+    except Exception as e:
+        return ApiJsonResponse({"error": str(e)}, status=500)
+
+
+@serve_snapshot('blog_posts')
+@read_from_replica
+@cached_response(BlogPost)
+async def all_blog_posts_view(request):
+    """Returns all blog posts as a JSON response, a cursor-paginated page or a streamed array."""
+    try:
+        posts = BlogPost.objects.all()
+        if wants_pagination(request):
+            return await apaginated_response(request, posts, blog_post_summary, ordering='-published_date')
+        if wants_streaming(request):
+            return StreamingJsonResponse(posts, blog_post_summary, asynchronous=True)
+        data = [blog_post_summary(post) async for post in posts]
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+@cached_response(TeamMember)
+async def team_members_view(request):
+    """Returns all team members as a JSON response, or a cursor-paginated page when `limit`/`cursor` is given."""
+    try:
+        team_members = TeamMember.objects.all()
+        if wants_pagination(request):
+            return await apaginated_response(request, team_members, team_member_data)
+        data = [team_member_data(member) async for member in team_members]
+    except Exception as e:
+        data = {"error": str(e)}
+
+    return ApiJsonResponse(data, safe=False)
+
+
+class FiveMCallback(View):
+    async def get(self, request, *args, **kwargs):
+        code = request.GET.get('code')
+        if not code:
+            return ApiJsonResponse({'error': 'Code is missing'}, status=400)
+
+        try:
+            userinfo = await fivem.afetch_user(code, request.build_absolute_uri(reverse('fivem_callback')))
+        except fivem.FiveMError as e:
+            return ApiJsonResponse({'error': str(e)}, status=e.status)
+
+        sub = userinfo.get('sub')
+        User = get_user_model()
+        user = await User.objects.filter(fivem_id=sub).afirst()
+        if not user:
+            user = await User.objects.acreate(
+                username=userinfo.get('preferred_username') or f'fivem_{sub}',
+                email=userinfo.get('email'),
+                fivem_id=sub,
+            )
+
+        return ApiJsonResponse({
+            'username': user.username,
+            'email': user.email,
+            'fivem_id': user.fivem_id
+        }, status=200)
@@ -0,0 +1,13 @@
+import hmac
+
+from django.conf import settings
+
+
+def can_view_metrics(request):
+    """Allows staff sessions, or scrapers presenting the configured API_METRICS_TOKEN."""
+    token = getattr(settings, 'API_METRICS_TOKEN', None)
+    if token:
+        header = request.headers.get('Authorization', '')
+        if hmac.compare_digest(header, f'Bearer {token}'):
+            return True
+    return request.user.is_authenticated and request.user.is_staff
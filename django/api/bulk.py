@@ -0,0 +1,72 @@
+"""Signal-free bulk writes for importers and data generators.
+
+These send no model signals: callers restore the derived state (review
+aggregates, versions, search index, cached responses) themselves.
+"""
+from django.core.management.color import no_style
+from django.db import connections, router
+
+
+def _connection(model):
+    return connections[router.db_for_write(model)]
+
+
+def _prepare(model, fields, rows, connection):
+    fields = [model._meta.get_field(name) for name in fields]
+    return [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)] + list(row[len(fields):])
+        for row in rows
+    ]
+
+
+def insert_rows(model, fields, rows, prepared=False):
+    """Inserts ``rows`` (sequences of values for ``fields``) with one parameterized INSERT run through executemany().
+
+    No defaults are applied. Pass ``prepared=True`` when the values are
+    already in their database representation, to skip the per-value
+    conversion on large loads.
+    """
+    if not rows:
+        return
+    connection = _connection(model)
+    quote = connection.ops.quote_name
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(columns)}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))})'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows if prepared else _prepare(model, fields, rows, connection))
+
+
+def delete_rows(model, field, values):
+    """Deletes the rows whose ``field`` is in ``values``, without loading them, cascading or sending signals.
+
+    For models with delete receivers, whose QuerySet.delete() loads and
+    signals every row; one DELETE per batch of the backend's parameter limit.
+    """
+    values = list(values)
+    connection = _connection(model)
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field(field).column)
+    size = connection.features.max_query_params or len(values) or 1
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), size):
+            batch = values[start:start + size]
+            cursor.execute(
+                f'DELETE FROM {quote(model._meta.db_table)} WHERE {column} IN ({", ".join(["%s"] * len(batch))})',
+                batch,
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def reset_sequences(*models):
+    """Moves the pk sequences past rows inserted with explicit pks (a no-op on SQLite)."""
+    connection = _connection(models[0])
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
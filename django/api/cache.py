@@ -0,0 +1,202 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import Signal
+from django.http import HttpResponse
+
+from .routing import primary_reads
+
+CACHE_ALIAS = getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 60 * 60 * 24)
+KEY_PREFIX = 'api:response'
+
+# Models whose changes invalidate at least one cached endpoint, keyed by label.
+tracked_models = {}
+# Names of the endpoints wrapped with cached_response(), for the metrics view.
+cached_endpoints = []
+# Sent by invalidate_model() for every changed model, tracked or not, so other
+# copies of derived data (api.snapshots) can be invalidated along with the cache.
+model_invalidated = Signal()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(label):
+    return f'{KEY_PREFIX}:generation:{label}'
+
+
+def _metric_key(endpoint, outcome):
+    return f'{KEY_PREFIX}:metrics:{endpoint}:{outcome}'
+
+
+def get_generations(labels):
+    """Returns the current generation token of each model label.
+
+    Cache keys embed the generations of every model an endpoint depends on,
+    so bumping a model's generation makes all responses built from it
+    unreachable without having to enumerate their keys.
+    """
+    cache = get_cache()
+    keys = {label: _generation_key(label) for label in labels}
+    found = cache.get_many(keys.values())
+    generations = {}
+    for label, key in keys.items():
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+        generations[label] = found[key]
+    return generations
+
+
+async def aget_generations(labels):
+    """Async version of get_generations(), through the cache's async API."""
+    cache = get_cache()
+    keys = {label: _generation_key(label) for label in labels}
+    found = await cache.aget_many(keys.values())
+    generations = {}
+    for label, key in keys.items():
+        if key not in found:
+            await cache.aadd(key, uuid.uuid4().hex, None)
+            found[key] = await cache.aget(key)
+        generations[label] = found[key]
+    return generations
+
+
+def bump_generation(label):
+    get_cache().set(_generation_key(label), uuid.uuid4().hex, None)
+
+
+def invalidate_model(model):
+    """Invalidates every cached response that depends on ``model``."""
+    model_invalidated.send(sender=model)
+    label = model._meta.label_lower
+    if label not in tracked_models:
+        return
+    bump_generation(label)
+    # Bump again once the transaction commits, so a response rebuilt from
+    # the pre-commit state in the meantime is not served afterwards.
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def record(endpoint, outcome):
+    cache = get_cache()
+    key = _metric_key(endpoint, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def arecord(endpoint, outcome):
+    cache = get_cache()
+    key = _metric_key(endpoint, outcome)
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def get_metrics():
+    """Returns the hit/miss counters of every cached endpoint."""
+    cache = get_cache()
+    keys = {
+        (endpoint, outcome): _metric_key(endpoint, outcome)
+        for endpoint in cached_endpoints for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    metrics = {}
+    for (endpoint, outcome), key in keys.items():
+        metrics.setdefault(endpoint, {})[outcome] = values.get(key, 0)
+    return metrics
+
+
+def cache_key(endpoint, request, generations):
+    params = sorted(request.GET.lists())
+    # Bodies embed absolute ``next`` URLs, so a page is only reused for the same scheme and host.
+    origin = (request.scheme, request.get_host())
+    digest = hashlib.sha1(repr((origin, params, sorted(generations.items()))).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{endpoint}:{digest}'
+
+
+def is_cacheable(response):
+    # The list views report failures as a 200 {"error": ...} body; never cache those.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.content.startswith(b'{"error"')
+    )
+
+
+def cached_response(*models):
+    """Caches the view's successful GET responses until one of ``models`` changes.
+
+    Responses are keyed on the endpoint, the scheme and host, the query
+    parameters and the generation of each dependency; see api.signals for the receivers that
+    bump generations on post_save, post_delete and m2m_changed. Async views
+    are cached through the cache's async methods. Misses read from the
+    primary even under read_from_replica(): a lagging replica read after an
+    invalidation would store the pre-write data under the new generation.
+    """
+    labels = sorted(model._meta.label_lower for model in models)
+
+    def decorator(view):
+        endpoint = view.__name__
+        # The sync and async implementations of an endpoint share a name, keys and counters.
+        if endpoint not in cached_endpoints:
+            cached_endpoints.append(endpoint)
+        for model in models:
+            tracked_models[model._meta.label_lower] = model
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            key = cache_key(endpoint, request, get_generations(labels))
+            cached = cache.get(key)
+            if cached is not None:
+                record(endpoint, 'hits')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            record(endpoint, 'misses')
+            with primary_reads():
+                response = view(request, *args, **kwargs)
+            if is_cacheable(response):
+                cache.set(key, (response.content, response['Content-Type']), CACHE_TIMEOUT)
+            return response
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+
+            cache = get_cache()
+            key = cache_key(endpoint, request, await aget_generations(labels))
+            cached = await cache.aget(key)
+            if cached is not None:
+                await arecord(endpoint, 'hits')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            await arecord(endpoint, 'misses')
+            with primary_reads():
+                response = await view(request, *args, **kwargs)
+            if is_cacheable(response):
+                await cache.aset(key, (response.content, response['Content-Type']), CACHE_TIMEOUT)
+            return response
+
+        return async_wrapper if iscoroutinefunction(view) else wrapper
+
+    return decorator
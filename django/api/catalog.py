@@ -0,0 +1,351 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import bulk, search
+from .cache import invalidate_model
+from .models import Category, Framework, Image, Review, Script, ShowcaseServer
+
+DEFAULT_BATCH_SIZE = 1000
+SCRIPT_FIELDS = (
+    'title', 'slug', 'description', 'price', 'image', 'video', 'is_featured', 'is_bestseller', 'tebex_id',
+    'key_benefits', 'core_features', 'system_requirements',
+)
+BOOLEAN_FIELDS = ('is_featured', 'is_bestseller')
+# Script M2M field -> related model; related rows are matched by name.
+RELATIONS = {'categories': Category, 'frameworks': Framework, 'showcase_servers': ShowcaseServer}
+# Separator of list cells (categories, frameworks, showcase_servers, images) in CSV files.
+CSV_LIST_SEPARATOR = '|'
+
+
+class CatalogError(ValueError):
+    """A catalog row that cannot be imported."""
+
+
+def _parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _csv_row(row):
+    """Converts a CSV record to the JSONL row shape. Empty cells are treated as absent."""
+    data = {}
+    for key, value in row.items():
+        if key is None or value is None or value == '':
+            continue
+        if key in RELATIONS or key == 'images':
+            data[key] = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+        elif key == 'reviews':
+            data[key] = json.loads(value)
+        else:
+            data[key] = value
+    return data
+
+
+def read_rows(path, fmt=None):
+    """Yields catalog rows from a JSONL or CSV file (``'-'`` reads JSONL from stdin) without loading it whole."""
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    if path == '-':
+        f = sys.stdin
+    else:
+        f = open(path, newline='' if fmt == 'csv' else None, encoding='utf-8')
+    try:
+        if fmt == 'csv':
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                try:
+                    yield _csv_row(record)
+                except ValueError as e:
+                    raise CatalogError(f'line {line}: {e}') from e
+        else:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError as e:
+                    raise CatalogError(f'line {line}: {e}') from e
+                if not isinstance(row, dict):
+                    raise CatalogError(f'line {line}: expected a JSON object')
+                yield row
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def script_values(row):
+    """Returns the Script field values present in ``row``, converted to their Python types."""
+    values = {field: row[field] for field in SCRIPT_FIELDS if field in row}
+    for field in BOOLEAN_FIELDS:
+        if field in values:
+            values[field] = _parse_bool(values[field])
+    if values.get('price') not in (None, ''):
+        try:
+            values['price'] = Decimal(str(values['price']))
+        except InvalidOperation:
+            raise CatalogError(f"invalid price {values['price']!r}")
+    elif 'price' in values:
+        values['price'] = None
+    if 'tebex_id' in values:
+        # Blank ids are absent ids, rather than one more duplicate of the unique ''.
+        values['tebex_id'] = None if values['tebex_id'] in (None, '') else str(values['tebex_id'])
+    return values
+
+
+def _parse_created_at(value):
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else value
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, datetime):
+        raise CatalogError(f'invalid created_at {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_rating(value):
+    if value is None or value == '':
+        return None
+    # Whole numbers only: int() would truncate 4.7 and accept True.
+    if isinstance(value, str) and value.strip().isdigit():
+        rating = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        rating = int(value)
+    elif type(value) is int:
+        rating = value
+    else:
+        rating = None
+    if rating not in Script.RATING_VALUES:
+        raise CatalogError(f'invalid rating {value!r}')
+    return rating
+
+
+def _item_name(item):
+    """The name a categories/frameworks/showcase_servers item refers to, or None if it has none."""
+    name = item.get('name') if isinstance(item, dict) else item
+    return name if isinstance(name, str) and name.strip() else None
+
+
+def validate_row(row):
+    """Raises CatalogError when a value of ``row`` cannot be imported."""
+    script_values(row)
+    for key in (*RELATIONS, 'images', 'reviews'):
+        if row.get(key) is not None and not isinstance(row[key], list):
+            raise CatalogError(f'{key} must be a list')
+    for key in RELATIONS:
+        for item in row.get(key) or ():
+            if _item_name(item) is None:
+                raise CatalogError(f'{key} item without a name: {item!r}')
+    for item in row.get('images') or ():
+        image = item.get('image') if isinstance(item, dict) else item
+        if not isinstance(image, str) or not image.strip():
+            raise CatalogError(f'invalid image {item!r}')
+    for item in row.get('reviews') or ():
+        if not isinstance(item, dict):
+            raise CatalogError(f'invalid review {item!r}')
+        _parse_rating(item.get('rating'))
+        _parse_created_at(item.get('created_at'))
+
+
+class CatalogImporter:
+    """Imports catalog rows in chunks, one transaction and a fixed number of queries per chunk.
+
+    Scripts are upserted by ``tebex_id`` (rows without one are always
+    inserted). For an existing script, only the fields present in the row
+    are updated, and a relation key present in the row (``categories``,
+    ``frameworks``, ``showcase_servers``, ``images``, ``reviews``) replaces
+    that relation; absent keys leave it untouched. Categories, frameworks
+    and showcase servers are matched by name and created when missing.
+
+    New scripts are written with one bulk_create(), existing ones with one
+    upsert on the unique ``tebex_id`` per set of fields present, relations
+    with bulk_create() on the models and M2M through tables, and replaced
+    rows with one DELETE per table. None of this sends model signals, so each
+    chunk also recomputes the review aggregates, bumps versions and
+    reindexes its scripts, and cached responses are invalidated once at
+    the end.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        # Related model -> {name: pk}, shared across chunks.
+        self.lookups = {model: {} for model in RELATIONS.values()}
+        self.stats = Counter()
+        self.elapsed = 0.0
+
+    def run(self, rows, progress=None):
+        """Imports every row of ``rows``; ``progress(stats, elapsed)`` is called after each chunk."""
+        start = time.perf_counter()
+        rows = iter(rows)
+        try:
+            while True:
+                chunk = list(islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                self.elapsed = time.perf_counter() - start
+                if progress is not None:
+                    progress(self.stats, self.elapsed)
+        finally:
+            if self.stats['rows']:
+                for model in (Script, Image, Review, *RELATIONS.values()):
+                    invalidate_model(model)
+        self.elapsed = time.perf_counter() - start
+        return self.stats
+
+    def import_chunk(self, rows):
+        for number, row in enumerate(rows, start=self.stats['rows'] + 1):
+            try:
+                validate_row(row)
+            except CatalogError as e:
+                raise CatalogError(f'row {number}: {e}') from e
+        # Within a chunk, the last row for a tebex_id wins (at the position of the first one).
+        by_tebex_id = {}
+        unique_rows = []
+        for row in rows:
+            tebex_id = row.get('tebex_id')
+            if tebex_id in (None, ''):
+                unique_rows.append(row)
+            elif str(tebex_id) in by_tebex_id:
+                unique_rows[by_tebex_id[str(tebex_id)]] = row
+            else:
+                by_tebex_id[str(tebex_id)] = len(unique_rows)
+                unique_rows.append(row)
+
+        with transaction.atomic():
+            self._resolve_related(unique_rows)
+            # tebex_id -> slug of the scripts the upserts will update.
+            existing = dict(
+                Script.objects.filter(tebex_id__in=list(by_tebex_id)).values_list('tebex_id', 'slug')
+            ) if by_tebex_id else {}
+
+            entries = []
+            to_create = []
+            upserts = {}
+            for row in unique_rows:
+                values = script_values(row)
+                script = Script(**values)
+                is_update = script.tebex_id in existing
+                if not is_update:
+                    to_create.append(script)
+                else:
+                    if 'slug' not in values:
+                        # Not written by the update: spares allocating a slug for it.
+                        script.slug = existing[script.tebex_id]
+                    upserts.setdefault(tuple(sorted(set(values) - {'tebex_id'})), []).append(script)
+                entries.append((row, script, is_update))
+            # New scripts in row order, which their pks and slug suffixes follow.
+            Script.objects.bulk_create(to_create, batch_size=self.batch_size)
+            for fields, scripts in upserts.items():
+                # Existing scripts only get the fields present in their rows.
+                Script.objects.bulk_create(
+                    scripts, batch_size=self.batch_size, update_conflicts=True, unique_fields=['tebex_id'],
+                    update_fields=list(fields) or ['tebex_id'],
+                )
+
+            replaced = {
+                key: [script.pk for row, script, is_update in entries if is_update and key in row]
+                for key in (*RELATIONS, 'images', 'reviews')
+            }
+            self._write_relations(entries, replaced)
+            self._write_images(entries, replaced['images'])
+            self._write_reviews(entries, replaced['reviews'])
+
+            script_ids = [script.pk for row, script, is_update in entries]
+            Script.recompute_review_aggregates(script_ids)
+            Script.touch([script.pk for row, script, is_update in entries if is_update])
+            search.index_objects(Script, pks=script_ids)
+
+        self.stats['rows'] += len(rows)
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(entries) - len(to_create)
+
+    def _resolve_related(self, rows):
+        """Maps every category/framework/server name in ``rows`` to a pk, creating the missing ones."""
+        for key, model in RELATIONS.items():
+            lookup = self.lookups[model]
+            wanted = {}
+            for row in rows:
+                for item in row.get(key) or ():
+                    item = item if isinstance(item, dict) else {'name': item}
+                    if item['name'] not in lookup:
+                        wanted.setdefault(item['name'], item)
+            if not wanted:
+                continue
+            for name, pk in model.objects.filter(name__in=list(wanted)).order_by('pk').values_list('name', 'pk'):
+                lookup.setdefault(name, pk)
+            fields = {field.name for field in model._meta.concrete_fields if not field.primary_key}
+            missing = [
+                model(**{field: value for field, value in item.items() if field in fields})
+                for name, item in wanted.items() if name not in lookup
+            ]
+            for obj in model.objects.bulk_create(missing):
+                lookup[obj.name] = obj.pk
+            self.stats[key] += len(missing)
+
+    def _write_relations(self, entries, replaced):
+        for key, model in RELATIONS.items():
+            field = Script._meta.get_field(key)
+            through = field.remote_field.through
+            source, target = f'{field.m2m_field_name()}_id', f'{field.m2m_reverse_field_name()}_id'
+            if replaced[key]:
+                # Through models have no delete signals, so this is a single DELETE.
+                through.objects.filter(**{f'{source}__in': replaced[key]}).delete()
+            lookup = self.lookups[model]
+            links = {
+                (script.pk, lookup[_item_name(item)])
+                for row, script, is_update in entries
+                for item in row.get(key) or ()
+            }
+            through.objects.bulk_create(
+                [through(**{source: script_id, target: related_id}) for script_id, related_id in sorted(links)],
+                batch_size=self.batch_size, ignore_conflicts=True,
+            )
+
+    def _write_images(self, entries, replaced):
+        if replaced:
+            bulk.delete_rows(Image, 'script', replaced)
+        images = []
+        for row, script, is_update in entries:
+            for item in row.get('images') or ():
+                item = item if isinstance(item, dict) else {'image': item}
+                images.append(Image(script_id=script.pk, image=item.get('image'), alt=item.get('alt')))
+        Image.objects.bulk_create(images, batch_size=self.batch_size)
+        self.stats['images'] += len(images)
+
+    def _write_reviews(self, entries, replaced):
+        if replaced:
+            bulk.delete_rows(Review, 'script', replaced)
+        reviews, dated = [], []
+        for row, script, is_update in entries:
+            for item in row.get('reviews') or ():
+                review = Review(
+                    script_id=script.pk, name=item.get('name'), pfp=item.get('pfp'),
+                    rating=_parse_rating(item.get('rating')), description=item.get('description'),
+                )
+                created_at = _parse_created_at(item.get('created_at'))
+                reviews.append(review)
+                if created_at is not None:
+                    dated.append((review, created_at))
+        Review.objects.bulk_create(reviews, batch_size=self.batch_size)
+        if dated:
+            # auto_now_add overrides created_at on insert: restore the imported dates.
+            for review, created_at in dated:
+                review.created_at = created_at
+            Review.objects.bulk_update(
+                [review for review, created_at in dated], ['created_at'], batch_size=self.batch_size,
+            )
+        self.stats['reviews'] += len(reviews)
@@ -0,0 +1,196 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+from faker import Faker
+
+from . import bulk, search
+from .cache import invalidate_model
+from .models import BlogPost, Category, Framework, Review, Script, ShowcaseServer
+
+DEFAULT_BATCH_SIZE = 5000
+# Weights of ratings 1..5, skewed towards positive reviews like the live catalog.
+RATING_WEIGHTS = (5, 7, 15, 30, 43)
+# Rows are spread over this many days before the generator's ``now``.
+TIME_SPAN_DAYS = 730
+# The default ``now``: a fixed instant, so a seed always yields the same timestamps.
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+POOL_SIZE = 1000
+# Review timestamps are drawn from this many distinct, pre-adapted instants.
+TIME_POOL_SIZE = 100_000
+
+SCRIPT_FIELDS = (
+    'id', 'title', 'slug', 'description', 'price', 'image', 'video', 'is_featured', 'is_bestseller', 'created_at',
+    'tebex_id', 'key_benefits', 'core_features', 'system_requirements', *Script.REVIEW_AGGREGATE_FIELDS,
+    'version', 'updated_at',
+)
+REVIEW_FIELDS = ('script', 'name', 'pfp', 'rating', 'description', 'created_at')
+POST_FIELDS = (
+    'id', 'title', 'description', 'content', 'author', 'published_date', 'modified_date', 'category', 'slug',
+    'version', 'updated_at',
+)
+
+
+class DatasetGenerator:
+    """Builds a large synthetic catalog, deterministically for a given seed.
+
+    Text is sampled from pools generated once with Faker instead of calling
+    Faker per row, every batch draws its random values with single
+    ``choices(k=...)`` calls, and rows are written as plain value lists
+    with bulk.insert_rows(), one transaction per table. Scripts and posts
+    get explicit pks after the current maximum, so reviews and M2M rows can
+    reference them without reading anything back, and their review
+    aggregates are computed while generating. Timestamps, written
+    explicitly like every other column, lie before ``now`` (EPOCH by
+    default). Apart from pks and slugs, the generated content depends only
+    on the seed, ``now`` and the Faker version.
+    """
+
+    def __init__(self, seed=0, batch_size=DEFAULT_BATCH_SIZE, now=EPOCH):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.words = sorted(set(fake.words(nb=POOL_SIZE * 3)))
+        self.names = [fake.name() for _ in range(POOL_SIZE)]
+        self.sentences = [fake.sentence(nb_words=12) for _ in range(POOL_SIZE)]
+        self.paragraphs = [fake.paragraph(nb_sentences=5) for _ in range(POOL_SIZE // 4)]
+        self.now = now
+        self.counts = {}
+        self.elapsed = {}
+
+    def _phase(self, name, func, *args):
+        start = time.perf_counter()
+        self.counts[name] = func(*args)
+        self.elapsed[name] = time.perf_counter() - start
+
+    def generate(self, scripts=0, reviews_per_script=0, posts=0, categories=20, frameworks=3, showcase_servers=50):
+        """Generates the dataset and returns ``{table: rows}``; per-phase timings are left in ``elapsed``."""
+        related = {}
+        if scripts:
+            for name, model, count in (
+                ('categories', Category, categories), ('frameworks', Framework, frameworks),
+                ('showcase servers', ShowcaseServer, showcase_servers),
+            ):
+                self._phase(name, self._generate_related, model, count, related)
+            self._phase('scripts', self._generate_scripts, scripts, reviews_per_script, related)
+            self.counts['reviews'] = scripts * reviews_per_script
+        if posts:
+            self._phase('blog posts', self._generate_posts, posts)
+
+        for model in (Script, Review, BlogPost, Category, Framework, ShowcaseServer):
+            invalidate_model(model)
+        return self.counts
+
+    def _text(self, count, words):
+        choices = self.rng.choices(self.words, k=count * words)
+        return [' '.join(choices[i:i + words]) for i in range(0, len(choices), words)]
+
+    def _datetimes(self, count):
+        """Returns ``count`` aware datetimes within the last TIME_SPAN_DAYS days."""
+        span = TIME_SPAN_DAYS * 86400
+        return [self.now - timedelta(seconds=int(self.rng.random() * span)) for _ in range(count)]
+
+    def _next_pk(self, model):
+        return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    def _generate_related(self, model, count, related):
+        if model is ShowcaseServer:
+            objs = [
+                ShowcaseServer(name=f'{name.title()} RP', url=f'https://{slugify(name)}.example')
+                for name in self._text(count, 2)
+            ]
+        else:
+            objs = [model(name=name.title()) for name in self._text(count, 2)]
+        related[model] = [obj.pk for obj in model.objects.bulk_create(objs)]
+        return len(objs)
+
+    def _generate_scripts(self, count, reviews_per_script, related):
+        rng = self.rng
+        connection = connections[router.db_for_write(Review)]
+        # Converting a million datetimes to their database form dominates the run; convert a pool once.
+        time_pool = [connection.ops.adapt_datetimefield_value(value) for value in self._datetimes(TIME_POOL_SIZE)]
+        relations = [
+            (Script._meta.get_field(name), related[model], low, high)
+            for name, model, low, high in (
+                ('categories', Category, 1, 3), ('frameworks', Framework, 1, 2),
+                ('showcase_servers', ShowcaseServer, 0, 2),
+            )
+        ]
+        start_pk = self._next_pk(Script)
+        with transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                pks = range(start_pk + offset, start_pk + offset + size)
+                titles = [title.title() for title in self._text(size, 3)]
+                created = self._datetimes(size)
+                ratings = rng.choices(range(1, 6), weights=RATING_WEIGHTS, k=size * reviews_per_script)
+
+                scripts = []
+                for i, pk in enumerate(pks):
+                    script_ratings = ratings[i * reviews_per_script:(i + 1) * reviews_per_script]
+                    histogram = [script_ratings.count(value) for value in Script.RATING_VALUES]
+                    scripts.append([
+                        pk, titles[i], f'{slugify(titles[i])}-{pk}', rng.choice(self.sentences),
+                        Decimal(rng.randrange(499, 9999)) / 100, None, None, rng.random() < 0.05, rng.random() < 0.1,
+                        created[i], None, rng.choice(self.sentences), rng.choice(self.sentences),
+                        rng.choice(self.sentences), len(script_ratings), sum(script_ratings), len(script_ratings),
+                        *histogram, 0, created[i],
+                    ])
+
+                links = {}
+                for field, related_pks, low, high in relations:
+                    rows = links.setdefault(field.remote_field.through, [])
+                    for pk in pks:
+                        picked = rng.sample(related_pks, min(len(related_pks), rng.randint(low, high)))
+                        rows.extend([pk, related_pk] for related_pk in picked)
+
+                names = rng.choices(self.names, k=len(ratings))
+                descriptions = rng.choices(self.sentences, k=len(ratings))
+                review_times = rng.choices(time_pool, k=len(ratings))
+                reviews = [
+                    [pks[i // reviews_per_script], names[i], None, rating, descriptions[i], review_times[i]]
+                    for i, rating in enumerate(ratings)
+                ]
+
+                bulk.insert_rows(Script, SCRIPT_FIELDS, scripts)
+                for field, _, _, _ in relations:
+                    through = field.remote_field.through
+                    bulk.insert_rows(
+                        through, [field.m2m_field_name(), field.m2m_reverse_field_name()], links[through],
+                        prepared=True,
+                    )
+                for start in range(0, len(reviews), self.batch_size):
+                    bulk.insert_rows(Review, REVIEW_FIELDS, reviews[start:start + self.batch_size], prepared=True)
+
+        bulk.reset_sequences(Script, Review)
+        search.index_objects(Script, pks=Script.objects.filter(pk__gte=start_pk).values('pk'))
+        return count
+
+    def _generate_posts(self, count):
+        rng = self.rng
+        authors = self.names[:50]
+        categories = [word.title() for word in self.words[:12]]
+        start_pk = self._next_pk(BlogPost)
+        with transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                titles = [title.capitalize() for title in self._text(size, 6)]
+                published = self._datetimes(size)
+                posts = []
+                for i, pk in enumerate(range(start_pk + offset, start_pk + offset + size)):
+                    content = ''.join(f'<p>{paragraph}</p>' for paragraph in rng.choices(self.paragraphs, k=3))
+                    modified = min(self.now, published[i] + timedelta(days=rng.randrange(30)))
+                    posts.append([
+                        pk, titles[i], rng.choice(self.sentences), content, rng.choice(authors), published[i], modified,
+                        rng.choice(categories), f'{slugify(titles[i])}-{pk}', 0, modified,
+                    ])
+                bulk.insert_rows(BlogPost, POST_FIELDS, posts)
+
+        bulk.reset_sequences(BlogPost)
+        search.index_objects(BlogPost, pks=BlogPost.objects.filter(pk__gte=start_pk).values('pk'))
+        return count
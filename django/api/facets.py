@@ -0,0 +1,154 @@
+"""Filtering, sorting and facet counts of the script catalog.
+
+``/api/scripts/`` switches from the full array to a filtered page as soon
+as one of FILTER_PARAMS is given:
+
+- ``categories`` / ``frameworks``: comma-separated ids; a script matches
+  when it has any of them;
+- ``min_price`` / ``max_price``: inclusive bounds;
+- ``is_featured`` / ``is_bestseller``: ``true`` or ``false``;
+- ``sort``: a key of SCRIPT_SORTS (``newest`` by default).
+
+Facet counts tell, per Category and per Framework, how many scripts match
+the other filters and that value. Each facet is one GROUP BY over the M2M
+table plus one query for the names, so the number of queries does not
+depend on the number of values;
+a facet ignores its own selection, so the counts of the alternatives stay
+visible while some are selected.
+"""
+import decimal
+
+from django.db.models import Count, Q
+
+from .models import Script
+
+FACETS = ('categories', 'frameworks')
+SCRIPT_SORTS = {
+    'newest': '-created_at',
+    'oldest': 'created_at',
+    'price_low': 'price',
+    'price_high': '-price',
+    'popular': '-reviews_count',
+    'title': 'title',
+}
+FLAGS = ('is_featured', 'is_bestseller')
+FILTER_PARAMS = (*FACETS, 'min_price', 'max_price', *FLAGS, 'sort')
+BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+# Ids are positive 64-bit integers; larger values would overflow the database parameter.
+MAX_ID = 2 ** 63 - 1
+
+
+class InvalidFilter(ValueError):
+    """Raised when a filter or sort query parameter cannot be parsed."""
+
+
+def wants_filtering(request):
+    """Filtered pages are opt-in so existing clients keep receiving the full array."""
+    return any(param in request.GET for param in FILTER_PARAMS)
+
+
+def parse_filters(params):
+    """Returns the filters and sort of the query parameters ``params``."""
+    filters = {'sort': params.get('sort') or 'newest'}
+    if filters['sort'] not in SCRIPT_SORTS:
+        raise InvalidFilter(f"Invalid sort. Use one of: {', '.join(SCRIPT_SORTS)}.")
+    for facet in FACETS:
+        if params.get(facet):
+            try:
+                filters[facet] = sorted({int(value) for value in params[facet].split(',') if value})
+            except ValueError:
+                raise InvalidFilter(f'Invalid {facet}: use comma-separated ids.')
+            if filters[facet] and not 1 <= filters[facet][0] <= filters[facet][-1] <= MAX_ID:
+                raise InvalidFilter(f'Invalid {facet}: use comma-separated ids.')
+    for bound in ('min_price', 'max_price'):
+        if params.get(bound):
+            try:
+                filters[bound] = decimal.Decimal(params[bound])
+            except decimal.InvalidOperation:
+                raise InvalidFilter(f'Invalid {bound}.')
+            if not filters[bound].is_finite():
+                raise InvalidFilter(f'Invalid {bound}.')
+    for flag in FLAGS:
+        if params.get(flag):
+            if params[flag].lower() not in BOOLEANS:
+                raise InvalidFilter(f'Invalid {flag}: use true or false.')
+            filters[flag] = BOOLEANS[params[flag].lower()]
+    return filters
+
+
+def _through(facet):
+    """Returns the M2M table of ``facet`` and the name of its value column."""
+    field = Script._meta.get_field(facet)
+    return field.remote_field.through, field.m2m_reverse_field_name()
+
+
+def conditions(filters, exclude=None, prefix=''):
+    """Returns the Q of ``filters`` (but the ``exclude`` facet) on the scripts at ``prefix``."""
+    condition = Q()
+    for facet in FACETS:
+        if facet in filters and facet != exclude:
+            through, column = _through(facet)
+            # A subquery on the M2M table (indexed by value, script) rather than
+            # a join, which would repeat scripts having several of the values.
+            matching = through.objects.filter(**{f'{column}_id__in': filters[facet]}).values('script_id')
+            condition &= Q(**{f'{prefix}pk__in': matching})
+    if 'min_price' in filters:
+        condition &= Q(**{f'{prefix}price__gte': filters['min_price']})
+    if 'max_price' in filters:
+        condition &= Q(**{f'{prefix}price__lte': filters['max_price']})
+    for flag in FLAGS:
+        if flag in filters:
+            # NULL flags count as false.
+            condition &= Q(**{f'{prefix}{flag}': True}) if filters[flag] else ~Q(**{f'{prefix}{flag}': True})
+    return condition
+
+
+def filter_scripts(queryset, filters):
+    """Applies ``filters`` to a Script queryset."""
+    return queryset.filter(conditions(filters))
+
+
+def facet_queries(filters):
+    """Returns ``{facet: queryset}`` of the ``(value id, count)`` rows of every facet.
+
+    The rows are grouped by the value id alone, which walks the (value,
+    script) index in order; the names are read separately (facet_names).
+    """
+    queries = {}
+    for facet in FACETS:
+        through, column = _through(facet)
+        # Joined to the scripts rather than through a subquery of their ids.
+        rows = through.objects.filter(conditions(filters, exclude=facet, prefix='script__'))
+        queries[facet] = rows.values_list(f'{column}_id').annotate(count=Count('script_id')).order_by()
+    return queries
+
+
+def facet_names(facet, rows):
+    """Returns the queryset of the ``(id, name)`` of the values in a facet's rows."""
+    model = Script._meta.get_field(facet).related_model
+    return model.objects.filter(pk__in=[pk for pk, _ in rows]).values_list('pk', 'name')
+
+
+def facet_data(rows, names):
+    """Returns the ``{'id', 'name', 'count'}`` values of a facet's rows, most frequent first."""
+    names = dict(names)
+    values = [{'id': pk, 'name': names[pk], 'count': count} for pk, count in rows if pk in names]
+    return sorted(values, key=lambda value: (-value['count'], value['name'], value['id']))
+
+
+def facet_counts(filters):
+    """Returns the facet counts of the scripts matching ``filters``, in two queries per facet."""
+    counts = {}
+    for facet, query in facet_queries(filters).items():
+        rows = list(query)
+        counts[facet] = facet_data(rows, facet_names(facet, rows))
+    return counts
+
+
+async def afacet_counts(filters):
+    """Async version of facet_counts()."""
+    counts = {}
+    for facet, query in facet_queries(filters).items():
+        rows = [row async for row in query]
+        counts[facet] = facet_data(rows, [row async for row in facet_names(facet, rows)])
+    return counts
@@ -0,0 +1,68 @@
+"""FiveM OAuth calls, made through the pooled client of api.outbound."""
+from django.conf import settings
+
+from . import outbound
+
+
+class FiveMError(Exception):
+    """Raised when FiveM rejects a call; ``status`` is the API status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def oauth_url(endpoint):
+    base_url = getattr(settings, 'FIVEM_OAUTH_BASE_URL', 'https://idms.fivem.net/oauth2')
+    return f'{base_url.rstrip("/")}/{endpoint}'
+
+
+def _token_request(code, redirect_uri):
+    return {
+        'data': {
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': redirect_uri,
+            'client_id': settings.FIVEM_CLIENT_ID,
+            'client_secret': settings.FIVEM_CLIENT_SECRET,
+        },
+    }
+
+
+def _userinfo_request(access_token):
+    return {'headers': {'Authorization': f'Bearer {access_token}'}}
+
+
+def _access_token(response):
+    if response.status_code != 200:
+        raise FiveMError('Token exchange failed')
+    return response.json().get('access_token')
+
+
+def _userinfo(response):
+    if response.status_code != 200:
+        raise FiveMError('Failed to fetch user info')
+    return response.json()
+
+
+def _unavailable(e):
+    return FiveMError(f'FiveM is unavailable: {type(e).__name__}', status=502)
+
+
+def fetch_user(code, redirect_uri):
+    """Exchanges an authorization code for the FiveM user info."""
+    try:
+        access_token = _access_token(outbound.request('post', oauth_url('token'), **_token_request(code, redirect_uri)))
+        return _userinfo(outbound.request('get', oauth_url('userinfo'), **_userinfo_request(access_token)))
+    except outbound.OutboundError as e:
+        raise _unavailable(e)
+
+
+async def afetch_user(code, redirect_uri):
+    """Async version of fetch_user()."""
+    try:
+        response = await outbound.arequest('post', oauth_url('token'), **_token_request(code, redirect_uri))
+        access_token = _access_token(response)
+        return _userinfo(await outbound.arequest('get', oauth_url('userinfo'), **_userinfo_request(access_token)))
+    except outbound.OutboundError as e:
+        raise _unavailable(e)
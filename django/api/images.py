@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image as PILImage, features
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+VARIANT_WIDTHS = tuple(getattr(settings, 'API_IMAGE_VARIANT_WIDTHS', (320, 640, 1280)))
+# Preferred formats first; formats the installed Pillow cannot encode are skipped.
+VARIANT_FORMATS = tuple(
+    fmt for fmt in getattr(settings, 'API_IMAGE_VARIANT_FORMATS', ('avif', 'webp')) if features.check(fmt)
+)
+VARIANT_QUALITY = {'avif': 50, 'webp': 80}
+DERIVATIVES_DIR = 'derivatives'
+MANIFEST_NAME = f'{DERIVATIVES_DIR}/manifest.json'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+# How often a process re-checks the manifest file for updates made by other processes.
+MANIFEST_RECHECK_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+_manifest = {'mtime': None, 'checked': 0.0, 'data': {}}
+# Images queued by process_in_background(), and the thread working through them.
+_pending = queue.SimpleQueue()
+_worker_lock = threading.Lock()
+_worker = None
+
+
+def media_root():
+    return str(settings.MEDIA_ROOT)
+
+
+def variant_name(name, width, fmt):
+    """Returns the MEDIA_ROOT-relative name of the ``width`` px ``fmt`` variant of ``name``."""
+    stem, _ = os.path.splitext(name)
+    return f'{DERIVATIVES_DIR}/{stem}-{width}w.{fmt}'
+
+
+def _is_fresh(path, source_mtime):
+    try:
+        return os.path.getmtime(path) >= source_mtime
+    except OSError:
+        return False
+
+
+def build_variants(root, name, force=False):
+    """Writes the resized variants of the image ``name`` under ``root`` and returns them.
+
+    Returns ``{format: [[width, variant_name], ...]}`` with widths ascending.
+    Widths at or above the original's are skipped (a single variant at the
+    original width is produced for images narrower than every target), and
+    variants newer than their source are reused unless ``force`` is set.
+    This only touches the filesystem so it can run in worker processes.
+    """
+    source = os.path.join(root, name)
+    source_mtime = os.path.getmtime(source)
+    variants = {}
+    with PILImage.open(source) as original:
+        original.load()
+        if original.mode not in ('RGB', 'RGBA'):
+            has_alpha = original.mode in ('LA', 'PA', 'P') and (
+                original.mode != 'P' or 'transparency' in original.info
+            )
+            original = original.convert('RGBA' if has_alpha else 'RGB')
+        widths = [width for width in VARIANT_WIDTHS if width < original.width] or [original.width]
+        for width in widths:
+            resized = None
+            for fmt in VARIANT_FORMATS:
+                target_name = variant_name(name, width, fmt)
+                target = os.path.join(root, target_name)
+                if force or not _is_fresh(target, source_mtime):
+                    if resized is None:
+                        height = max(1, round(original.height * width / original.width))
+                        resized = original.resize((width, height), PILImage.LANCZOS)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=f'.{fmt}')
+                    os.close(fd)
+                    try:
+                        resized.save(tmp, format=fmt.upper(), quality=VARIANT_QUALITY.get(fmt, 80))
+                        os.replace(tmp, target)
+                    except BaseException:
+                        os.unlink(tmp)
+                        raise
+                variants.setdefault(fmt, []).append([width, target_name])
+    return variants
+
+
+def iter_source_images(root):
+    """Yields the MEDIA_ROOT-relative names of every original image in the media tree."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.relpath(dirpath, root) == '.':
+            dirnames[:] = [d for d in dirnames if d != DERIVATIVES_DIR]
+        for filename in filenames:
+            if filename.lower().endswith(SOURCE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_manifest(entries):
+    """Merges ``{name: variants}`` into the manifest; a ``None`` value removes the entry."""
+    root = media_root()
+    path = os.path.join(root, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        data = _read_manifest(path)
+        for name, variants in entries.items():
+            if variants:
+                data[name] = variants
+            else:
+                data.pop(name, None)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp, path)
+    _manifest.update(mtime=os.path.getmtime(path), checked=time.monotonic(), data=data, root=root)
+    return data
+
+
+def get_manifest():
+    """Returns the manifest, re-reading the file at most every MANIFEST_RECHECK_SECONDS."""
+    root = media_root()
+    now = time.monotonic()
+    if _manifest.get('root') == root and now - _manifest['checked'] < MANIFEST_RECHECK_SECONDS:
+        return _manifest['data']
+    path = os.path.join(root, MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if mtime != _manifest['mtime'] or _manifest.get('root') != root:
+        _manifest.update(mtime=mtime, data=_read_manifest(path) if mtime else {}, root=root)
+    _manifest['checked'] = now
+    return _manifest['data']
+
+
+def process_file(field_file, force=False):
+    """Generates and records the variants of a stored image; missing or unreadable files are skipped."""
+    if not field_file or not VARIANT_FORMATS:
+        return None
+    root = media_root()
+    if not os.path.exists(os.path.join(root, field_file.name)):
+        return None
+    try:
+        variants = build_variants(root, field_file.name, force=force)
+    except (OSError, PILImage.DecompressionBombError):
+        return None
+    update_manifest({field_file.name: variants})
+    return variants
+
+
+def process_in_background(field_file, on_done=None):
+    """Queues process_file() for a worker thread, so uploads do not wait for the encoders.
+
+    ``on_done()`` runs on the worker once the variants are recorded, e.g. to
+    drop the payloads built before they existed.
+    """
+    global _worker
+    with _worker_lock:
+        _pending.put((field_file, on_done))
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name='image-variants', daemon=True)
+            _worker.start()
+
+
+def _work():
+    global _worker
+    try:
+        while True:
+            with _worker_lock:
+                try:
+                    field_file, on_done = _pending.get_nowait()
+                except queue.Empty:
+                    _worker = None
+                    return
+            try:
+                if process_file(field_file) and on_done is not None:
+                    on_done()
+            except Exception:
+                logger.exception('Could not generate the variants of %s', field_file.name)
+    finally:
+        connections.close_all()
+
+
+def get_srcset(field_file):
+    """Returns ``{format: srcset}`` for the image's variants, or None when none were generated."""
+    if not field_file:
+        return None
+    variants = get_manifest().get(field_file.name)
+    if not variants:
+        return None
+    return {
+        fmt: ', '.join(f'{default_storage.url(name)} {width}w' for width, name in entries)
+        for fmt, entries in variants.items()
+    }
@@ -0,0 +1,237 @@
+"""Spooled review ingestion: accept reviews as files, publish them in batches.
+
+With API_REVIEW_INGESTION = 'spool', write_review_view validates a
+submission and writes it as one JSON file into the ``incoming/``
+directory of API_REVIEW_SPOOL_DIR (fsynced, then renamed into place), so a
+burst of reviews never waits on the database's write lock. The
+flush_review_spool command claims the oldest files by renaming them into
+``processing/`` and publishes each batch in one transaction: one
+bulk_create() and one aggregate UPDATE per script. Reviews keep the
+spool token as ``ingest_token``, which makes a batch retried after a crash
+idempotent and lets review_status_view report on it; submissions whose
+script disappeared meanwhile are moved to ``failed/``.
+"""
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import invalidate_model
+from .models import Review, Script
+
+QUEUED = 'queued'
+PUBLISHED = 'published'
+REJECTED = 'rejected'
+
+INCOMING = 'incoming'
+PROCESSING = 'processing'
+FAILED = 'failed'
+TMP = 'tmp'
+
+NAME_MAX_LENGTH = Review._meta.get_field('name').max_length
+RATINGS = range(1, 6)
+
+
+class InvalidReview(ValueError):
+    """Raised when a review submission is incomplete or malformed."""
+
+
+def is_spooled():
+    return getattr(settings, 'API_REVIEW_INGESTION', 'sync') == 'spool'
+
+
+def spool_dir(name=None):
+    root = Path(getattr(settings, 'API_REVIEW_SPOOL_DIR', Path(settings.BASE_DIR) / 'spool' / 'reviews'))
+    return root / name if name else root
+
+
+def _ensure_dirs():
+    for name in (TMP, INCOMING, PROCESSING, FAILED):
+        spool_dir(name).mkdir(parents=True, exist_ok=True)
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data):
+    """Writes ``data`` to ``path`` through a temporary file, so readers never see a partial file."""
+    tmp_path = spool_dir(TMP) / path.name
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+def _integer(value):
+    """Returns ``value`` as an int if it is one or a string of digits; int() would take True and truncate 4.9."""
+    if type(value) is int:
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    raise ValueError(value)
+
+
+def validate(data):
+    """Returns the cleaned review fields of a submission, or raises InvalidReview."""
+    if not isinstance(data, dict):
+        raise InvalidReview('Invalid JSON data.')
+    script_id, name, rating, description = (data.get(key) for key in ('script_id', 'name', 'rating', 'description'))
+    if not all([script_id, name, rating, description]):
+        raise InvalidReview('All fields are required.')
+    try:
+        script_id, rating = _integer(script_id), _integer(rating)
+    except ValueError:
+        raise InvalidReview('script_id and rating must be integers.')
+    if rating not in RATINGS:
+        raise InvalidReview('rating must be between 1 and 5.')
+    if not isinstance(name, str) or not isinstance(description, str):
+        raise InvalidReview('name and description must be strings.')
+    if len(name) > NAME_MAX_LENGTH:
+        raise InvalidReview(f'name must be at most {NAME_MAX_LENGTH} characters.')
+    return {'script_id': script_id, 'name': name, 'rating': rating, 'description': description}
+
+
+def enqueue(review):
+    """Durably spools cleaned review fields; returns the token identifying the submission."""
+    _ensure_dirs()
+    token = uuid.uuid4()
+    # Names sort by submission time, so the oldest submissions are published first.
+    path = spool_dir(INCOMING) / f'{time.time_ns():020d}-{token}.json'
+    _write_atomic(path, {**review, 'token': str(token)})
+    return token
+
+
+def _find(name, token):
+    return next(spool_dir(name).glob(f'*-{token}.json'), None)
+
+
+def get_status(token):
+    """Returns ``{'status': ..., ...}`` for a submission token, or None if it is unknown."""
+    review_id = Review.objects.filter(ingest_token=token).values_list('pk', flat=True).first()
+    if review_id is not None:
+        return {'status': PUBLISHED, 'review_id': review_id}
+    if _find(INCOMING, token) or _find(PROCESSING, token):
+        return {'status': QUEUED}
+    failed = _find(FAILED, token)
+    if failed:
+        with open(failed) as f:
+            return {'status': REJECTED, 'error': json.load(f).get('error')}
+    return None
+
+
+def requeue_stale(timeout):
+    """Moves submissions claimed more than ``timeout`` seconds ago (by a worker that died) back to incoming/."""
+    _ensure_dirs()
+    requeued = 0
+    cutoff = time.time() - timeout
+    for path in spool_dir(PROCESSING).glob('*.json'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                os.replace(path, spool_dir(INCOMING) / path.name)
+                requeued += 1
+        except FileNotFoundError:
+            pass
+    return requeued
+
+
+def prune_failed(retention):
+    """Deletes rejected submissions older than ``retention`` seconds; returns how many."""
+    pruned = 0
+    cutoff = time.time() - retention
+    for path in spool_dir(FAILED).glob('*.json'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                pruned += 1
+        except FileNotFoundError:
+            pass
+    return pruned
+
+
+def claim(limit):
+    """Claims up to ``limit`` of the oldest submissions; returns their paths under processing/.
+
+    A rename is atomic, so concurrent workers never claim the same file.
+    """
+    _ensure_dirs()
+    claimed = []
+    for name in sorted(os.listdir(spool_dir(INCOMING))):
+        if len(claimed) >= limit:
+            break
+        target = spool_dir(PROCESSING) / name
+        try:
+            os.replace(spool_dir(INCOMING) / name, target)
+        except FileNotFoundError:
+            continue
+        # Claim time, for requeue_stale().
+        os.utime(target)
+        claimed.append(target)
+    return claimed
+
+
+def publish(paths):
+    """Publishes the claimed submissions in one transaction; returns ``(published, rejected)`` counts."""
+    entries = []
+    for path in paths:
+        with open(path) as f:
+            entries.append((path, json.load(f)))
+    tokens = [uuid.UUID(entry['token']) for _, entry in entries]
+    existing = set(Review.objects.filter(ingest_token__in=tokens).values_list('ingest_token', flat=True))
+    script_ids = set(Script.objects.filter(
+        pk__in={entry['script_id'] for _, entry in entries},
+    ).values_list('pk', flat=True))
+
+    reviews, rejected = [], []
+    for (path, entry), token in zip(entries, tokens):
+        if token in existing:
+            # Published by an earlier attempt that died before removing the file.
+            continue
+        if entry['script_id'] not in script_ids:
+            rejected.append((path, entry))
+            continue
+        reviews.append(Review(
+            script_id=entry['script_id'], name=entry['name'], rating=entry['rating'],
+            description=entry['description'], ingest_token=token,
+        ))
+
+    if reviews:
+        deltas = {}
+        for review in reviews:
+            delta = deltas.setdefault(review.script_id, {})
+            for field, change in Review.aggregate_delta(review.rating).items():
+                delta[field] = delta.get(field, 0) + change
+        with transaction.atomic():
+            # bulk_create() sends no signals: apply the aggregates and
+            # invalidate the cached responses here, once per batch.
+            Review.objects.bulk_create(reviews)
+            for script_id, delta in deltas.items():
+                Script.adjust_review_aggregates(script_id, delta)
+            invalidate_model(Review)
+            invalidate_model(Script)
+
+    for path, entry in rejected:
+        _write_atomic(spool_dir(FAILED) / path.name, {**entry, 'error': 'Script not found.'})
+    for path in paths:
+        path.unlink(missing_ok=True)
+    return len(reviews), len(rejected)
+
+
+def flush(batch_size):
+    """Publishes every queued submission in batches of ``batch_size``; returns ``(published, rejected)``."""
+    published = rejected = 0
+    while paths := claim(batch_size):
+        batch_published, batch_rejected = publish(paths)
+        published += batch_published
+        rejected += batch_rejected
+    return published, rejected
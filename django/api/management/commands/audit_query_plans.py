@@ -0,0 +1,128 @@
+import json
+import tempfile
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from api import outbound, queryplans
+from api.cache import get_cache
+from api.facets import SCRIPT_SORTS
+from api.views import REVIEW_SORTS
+
+# Parameters replayed besides the request benchmarks.endpoints makes of each endpoint.
+VARIANTS = {
+    'all_scripts': [
+        *({'sort': sort, 'limit': 20} for sort in SCRIPT_SORTS),
+        {'is_featured': 'true'},
+        {'is_bestseller': 'true', 'sort': 'popular'},
+        {'is_featured': 'false', 'max_price': 20, 'sort': 'price_high'},
+    ],
+    'script_reviews': [{'sort': sort, 'limit': 5} for sort in REVIEW_SORTS],
+    'all_testimonials': [{'limit': 5}],
+    # A login, answered by the stub OAuth server of benchmarks.oauth.
+    'fivem_callback': [{'code': 'audit-code'}],
+}
+
+class Command(BaseCommand):
+    help = (
+        'Replay every API endpoint against a seeded throwaway database and report the statements whose '
+        'SQLite query plan scans a table or sorts in a temp B-tree, with the indexes that would avoid it'
+    )
+
+    def add_arguments(self, parser):
+        from benchmarks.endpoints import SIZES
+
+        parser.add_argument('--size', choices=list(SIZES), default='small', help='Dataset to seed (see benchmarks.endpoints)')
+        parser.add_argument('--endpoints', nargs='*', help='Only replay these url names')
+        parser.add_argument('--output', help='Also write the report as JSON')
+        parser.add_argument('--check', action='store_true', help='Exit with status 1 when an index is missing')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans can only be audited on SQLite.')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = self.audit(options['size'], options['endpoints'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        findings = [finding for statement in report for finding in statement['findings']]
+        missing = [finding for finding in findings if finding['index']]
+        for statement in report:
+            for finding in statement['findings']:
+                self.write_finding(statement, finding)
+        requests = {name for statement in report for name in statement['requests']}
+        self.stdout.write(
+            f'{len(report)} distinct statements from {len(requests)} requests: {len(findings)} findings, '
+            f'{len(missing)} with a missing index'
+        )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if missing and options['check']:
+            raise CommandError(f'{len(missing)} query plans scan or sort without an index.')
+
+    def audit(self, size, only):
+        """Replays the endpoints and returns every distinct statement with its plan and findings."""
+        from benchmarks import endpoints
+        from benchmarks.oauth import StubOAuthServer
+
+        statements = {}
+        # The snapshot directory keeps the seeding from marking the real snapshots stale.
+        with tempfile.TemporaryDirectory() as snapshot_dir, StubOAuthServer() as idp, override_settings(
+            API_RATE_LIMIT_ENABLED=False, API_SNAPSHOT_DIR=snapshot_dir, FIVEM_OAUTH_BASE_URL=idp.url,
+        ):
+            fixtures = endpoints.seed(size)
+            clients = endpoints.make_clients()
+            for name, (method, path, params) in endpoints.endpoint_requests(fixtures).items():
+                if only and name not in only:
+                    continue
+                client = clients[1] if name in endpoints.STAFF_ENDPOINTS else clients[0]
+                for variant in [params, *VARIANTS.get(name, ())]:
+                    label = name if variant is params else f'{name}?{urlencode(variant)}'
+                    for alias, sql, sql_params in self.replay(endpoints, client, method, path, variant):
+                        if queryplans.is_explained(sql):
+                            statement = statements.setdefault(sql, {'alias': alias, 'params': sql_params, 'requests': []})
+                            if label not in statement['requests']:
+                                statement['requests'].append(label)
+        # Drop the pooled connections to the stopped stub.
+        outbound.close_session()
+
+        report = []
+        for sql, statement in statements.items():
+            plan, findings = queryplans.inspect(statement['alias'], sql, statement['params'])
+            report.append({'requests': statement['requests'], 'sql': sql, 'plan': plan, 'findings': findings})
+        return report
+
+    def replay(self, endpoints, client, method, path, params):
+        """Returns the statements of a request with a cold cache, and of its next page if it has one."""
+        get_cache().clear()
+        with queryplans.capture_statements() as statements:
+            response = endpoints.request(client, method, path, params)
+        if response.get('Content-Type') == 'application/json' and response.content.startswith(b'{'):
+            next_url = json.loads(response.content).get('next')
+            if next_url:
+                get_cache().clear()
+                with queryplans.capture_statements() as next_statements:
+                    client.get(next_url)
+                statements += next_statements
+        return statements
+
+    def write_finding(self, statement, finding):
+        self.stdout.write(self.style.WARNING(
+            f'{", ".join(statement["requests"])}: {finding["kind"]} of {finding["table"]} ({finding["detail"]})'
+        ))
+        self.stdout.write(f'    {statement["sql"][:300]}')
+        if finding['existing_index']:
+            self.stdout.write(f'    existing index {finding["existing_index"]} not chosen by the planner')
+        elif finding['index']:
+            model = queryplans.model_for_table(finding['table'])
+            if model is not None and not model._meta.auto_created:
+                fields = {field.column: field.name for field in model._meta.concrete_fields}
+                names = [fields.get(column, column) for column in finding['index']]
+                self.stdout.write(f'    proposed index: {model._meta.label} models.Index(fields={names!r})')
+            else:
+                self.stdout.write(f'    proposed index: {queryplans.index_ddl(finding["table"], finding["index"])}')
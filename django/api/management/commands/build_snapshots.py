@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import snapshots
+
+class Command(BaseCommand):
+    help = 'Write the precompressed JSON snapshots of the full catalog lists served by the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Snapshots to build (default: all of {", ".join(snapshots.SNAPSHOTS)})')
+        parser.add_argument('--stale', action='store_true', help='Only rebuild built snapshots that are stale')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(snapshots.SNAPSHOTS)
+        if unknown:
+            raise CommandError(f'Unknown snapshots: {", ".join(sorted(unknown))}')
+        if options['stale']:
+            rebuilt = snapshots.rebuild_stale()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rebuilt)} stale snapshots: {", ".join(rebuilt) or "none"}'))
+            return
+
+        for name in options['names'] or snapshots.SNAPSHOTS:
+            start = time.perf_counter()
+            manifest = snapshots.build(name)
+            sizes = ', '.join(f'{encoding} {size}' for encoding, size in manifest['bytes'].items())
+            self.stdout.write(self.style.SUCCESS(
+                f'Built {name} {manifest["version"]} ({sizes} bytes) in {time.perf_counter() - start:.2f}s'
+            ))
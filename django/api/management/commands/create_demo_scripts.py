@@ -88,15 +88,18 @@ class Command(BaseCommand):
         ]
 
         for script_data in demo_scripts:
-            script = Script.objects.create(
-                title=script_data['title'],
-                description=script_data['description'],
-                price=script_data['price'],
-                image=script_data['image'],
-                video=script_data['video'],
-                is_featured=script_data['is_featured'],
-                is_bestseller=script_data['is_bestseller'],
-                tebex_id=script_data['tebex_id']
+            # tebex_id is unique: running the command again updates the demo scripts.
+            script, _ = Script.objects.update_or_create(
+                tebex_id=script_data['tebex_id'],
+                defaults={
+                    'title': script_data['title'],
+                    'description': script_data['description'],
+                    'price': script_data['price'],
+                    'image': script_data['image'],
+                    'video': script_data['video'],
+                    'is_featured': script_data['is_featured'],
+                    'is_bestseller': script_data['is_bestseller'],
+                },
             )
             script.categories.set(script_data['categories'])
             script.frameworks.set(script_data['frameworks'])
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api import ingest
+
+class Command(BaseCommand):
+    help = 'Publish spooled review submissions in batched transactions (once, or every --interval seconds)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'API_REVIEW_SPOOL_BATCH_SIZE', 500))
+        parser.add_argument('--interval', type=float, help='Keep flushing every INTERVAL seconds until interrupted')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        if options['interval'] is not None and options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+        claim_timeout = getattr(settings, 'API_REVIEW_SPOOL_CLAIM_TIMEOUT', 300)
+        retention = getattr(settings, 'API_REVIEW_SPOOL_RETENTION', 60 * 60 * 24)
+
+        while True:
+            requeued = ingest.requeue_stale(claim_timeout)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale submissions'))
+            ingest.prune_failed(retention)
+            start = time.perf_counter()
+            published, rejected = ingest.flush(options['batch_size'])
+            if published or rejected or options['interval'] is None:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Published {published} reviews, rejected {rejected} in {time.perf_counter() - start:.2f}s'
+                ))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,49 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from api import images
+from api.signals import refresh_image_payloads
+
+REFRESH_CHUNK = 500
+
+class Command(BaseCommand):
+    help = 'Generate resized AVIF/WebP variants of every image under MEDIA_ROOT in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes')
+        parser.add_argument('--force', action='store_true', help='Re-encode variants even if they are up to date')
+
+    def handle(self, *args, **options):
+        if not images.VARIANT_FORMATS:
+            self.stdout.write(self.style.WARNING('Pillow cannot encode any of the configured variant formats.'))
+            return
+        root = images.media_root()
+        names = list(images.iter_source_images(root))
+        previous = dict(images.get_manifest())
+        entries = {name: None for name in previous if name not in names}
+
+        start = time.perf_counter()
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            futures = {pool.submit(images.build_variants, root, name, options['force']): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    entries[name] = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Skipped {name}: {e}')
+        manifest = images.update_manifest(entries)
+
+        changed = sorted(name for name in manifest.keys() | previous.keys() if manifest.get(name) != previous.get(name))
+        # Variant URLs are embedded in API payloads: drop the cached responses and bump
+        # the ETags of what shows the changed images, in chunks that fit SQLite's IN limit.
+        for offset in range(0, len(changed), REFRESH_CHUNK):
+            refresh_image_payloads(changed[offset:offset + REFRESH_CHUNK])
+        elapsed = time.perf_counter() - start
+        variants = sum(len(widths) for formats in manifest.values() for widths in formats.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(names) - failed} images ({failed} failed) into {variants} variants in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api import dataset
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset for performance testing, e.g. '
+        '--scripts 50000 --reviews-per-script 200 --posts 100000. Rows are added to the existing data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scripts', type=int, default=1000, help='Number of scripts')
+        parser.add_argument('--reviews-per-script', type=int, default=20, help='Number of reviews of each script')
+        parser.add_argument('--posts', type=int, default=1000, help='Number of blog posts')
+        parser.add_argument('--categories', type=int, default=20, help='Number of categories scripts are spread over')
+        parser.add_argument('--frameworks', type=int, default=3, help='Number of frameworks scripts are spread over')
+        parser.add_argument('--showcase-servers', type=int, default=50, help='Number of showcase servers')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed yields the same content')
+        parser.add_argument(
+            '--now', default=dataset.EPOCH.isoformat(),
+            help='ISO datetime the generated timestamps lie before; the same value yields the same timestamps',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=dataset.DEFAULT_BATCH_SIZE, help='Rows generated and inserted per batch'
+        )
+
+    def handle(self, *args, **options):
+        sizes = ('scripts', 'reviews_per_script', 'posts', 'categories', 'frameworks', 'showcase_servers')
+        if any(options[name] < 0 for name in sizes) or options['batch_size'] < 1:
+            raise CommandError('Sizes must not be negative and --batch-size must be positive')
+        if options['scripts'] and not (options['categories'] and options['frameworks']):
+            raise CommandError('Scripts need at least one category and one framework')
+        now = parse_datetime(options['now'])
+        if now is None:
+            raise CommandError(f"Invalid --now {options['now']!r}")
+        if timezone.is_naive(now):
+            now = timezone.make_aware(now)
+
+        start = time.perf_counter()
+        generator = dataset.DatasetGenerator(seed=options['seed'], batch_size=options['batch_size'], now=now)
+        counts = generator.generate(**{name: options[name] for name in sizes})
+        elapsed = time.perf_counter() - start
+
+        for name, count in counts.items():
+            phase = generator.elapsed.get(name)
+            timing = f' in {phase:.2f}s' if phase is not None else ''
+            self.stdout.write(f'  {count} {name}{timing}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from api import catalog
+
+class Command(BaseCommand):
+    help = (
+        'Import scripts with their images, categories, frameworks, showcase servers and reviews from a JSONL or '
+        'CSV file, upserting scripts by tebex_id. CSV list cells are "|"-separated and the reviews cell is a '
+        'JSON array.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file, or - to read JSONL from stdin')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), help='File format (default: from the extension)')
+        parser.add_argument(
+            '--batch-size', type=int, default=catalog.DEFAULT_BATCH_SIZE, help='Rows written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        importer = catalog.CatalogImporter(batch_size=options['batch_size'])
+
+        def progress(stats, elapsed):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"{stats['rows']} rows in {elapsed:.1f}s ({stats['rows'] / elapsed:.0f} rows/s)")
+
+        try:
+            stats = importer.run(catalog.read_rows(options['path'], options['format']), progress=progress)
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        except ValueError as e:
+            raise CommandError(f'Invalid catalog row ({e}); chunks written before it were kept')
+
+        elapsed = importer.elapsed or 1e-9
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows']} rows ({stats['created']} scripts created, {stats['updated']} updated, "
+            f"{stats['images']} images, {stats['reviews']} reviews) in {elapsed:.2f}s "
+            f"({stats['rows'] / elapsed:.0f} rows/s)"
+        ))
+        created = ', '.join(f'{stats[key]} {key}' for key in catalog.RELATIONS if stats[key])
+        if created:
+            self.stdout.write(f'Created {created}')
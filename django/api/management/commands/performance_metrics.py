@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+from api import performance
+
+class Command(BaseCommand):
+    help = 'Dump the rolling per-route request timing histograms kept by PerformanceMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', help='Only this url name')
+        parser.add_argument('--json', action='store_true', help='Print the full histograms as JSON')
+
+    def handle(self, *args, **options):
+        routes = performance.get_histograms(options['route'])
+        if options['json']:
+            self.stdout.write(json.dumps(routes, indent=2))
+            return
+        if not routes:
+            self.stdout.write(self.style.WARNING('No requests recorded in the kept windows.'))
+            return
+        columns = ('route', 'requests', 'queries/req', *(f'{metric} p50/p95' for metric in performance.METRICS))
+        rows = []
+        for route, entry in routes.items():
+            row = [route, str(entry['requests']), f"{entry['queries'] / entry['requests']:.1f}"]
+            for metric in performance.METRICS:
+                stats = entry.get(metric)
+                row.append(f"{self._bound(stats['p50_ms'])}/{self._bound(stats['p95_ms'])}ms" if stats else '-')
+            rows.append(row)
+        widths = [max(len(str(value)) for value in column) for column in zip(columns, *rows)]
+        for row in (columns, *rows):
+            self.stdout.write('  '.join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+
+    @staticmethod
+    def _bound(ms):
+        return f'>{performance.BUCKETS_MS[-1]}' if ms is None else f'<={ms}'
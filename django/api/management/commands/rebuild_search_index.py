@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import search
+
+class Command(BaseCommand):
+    help = 'Rebuild the FTS5 search index for blog posts, scripts and team members'
+
+    def add_arguments(self, parser):
+        parser.add_argument('types', nargs='*', help=f"Only rebuild these indexes: {', '.join(search.INDEXES)} (default: all)")
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Full-text search requires SQLite FTS5; nothing to rebuild.'))
+            return
+        unknown = set(options['types']) - set(search.INDEXES)
+        if unknown:
+            raise CommandError(f"Unknown search types: {', '.join(sorted(unknown))}")
+        for name in options['types'] or search.INDEXES:
+            start = time.perf_counter()
+            count = search.rebuild(search.INDEXES[name].model)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} {name} in {elapsed:.2f}s'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.models import Script
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized review count and rating aggregates of scripts from their reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('script_ids', nargs='*', type=int, help='Only recompute these scripts (default: all)')
+
+    def handle(self, *args, **options):
+        updated = Script.recompute_review_aggregates(options['script_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed review aggregates for {updated} scripts'))
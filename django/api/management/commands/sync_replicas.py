@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.routing import PRIMARY, get_read_replicas
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to its read replicas (once, or every --interval seconds)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replica aliases (default: API_READ_REPLICAS)')
+        parser.add_argument('--interval', type=float, help='Keep syncing every INTERVAL seconds until interrupted')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or get_read_replicas()
+        if not aliases:
+            raise CommandError('No replicas to sync: pass aliases or set API_READ_REPLICAS.')
+        for alias in (PRIMARY, *aliases):
+            if alias not in connections:
+                raise CommandError(f'Unknown database alias: {alias}')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} is not a SQLite database; use the database\'s own replication.')
+        for alias in aliases:
+            if connections[alias].settings_dict['NAME'] == connections[PRIMARY].settings_dict['NAME']:
+                raise CommandError(f'{alias} is the primary database itself (e.g. a test mirror).')
+        if options['interval'] is not None and options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        while True:
+            for alias in aliases:
+                start = time.perf_counter()
+                self.sync(alias)
+                self.stdout.write(self.style.SUCCESS(f'Synced {alias} in {time.perf_counter() - start:.2f}s'))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self, alias):
+        """Snapshots the primary with SQLite's online backup API and swaps the copy in atomically.
+
+        Readers that have the old replica file open keep reading it until
+        they reconnect.
+        """
+        path = str(connections[alias].settings_dict['NAME'])
+        tmp_path = f'{path}.sync'
+        primary = connections[PRIMARY]
+        primary.ensure_connection()
+        target = sqlite3.connect(tmp_path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        os.replace(tmp_path, path)
+        connections[alias].close()
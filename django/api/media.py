@@ -0,0 +1,134 @@
+"""Media file serving with byte ranges, conditional GETs and proxy offload.
+
+serve_media answers from MEDIA_ROOT with an ETag (from the file's mtime
+and size) and Last-Modified, 304s for If-None-Match/If-Modified-Since,
+and single byte ranges as 206 (If-Range aware; unsatisfiable ones get a
+416). Bodies are FileResponses over the open file, which WSGI servers
+with ``wsgi.file_wrapper`` (gunicorn, uWSGI) send with sendfile(): whole
+files and open-ended ``bytes=N-`` ranges keep that zero-copy path, while
+bounded ranges are read through Python.
+
+With API_MEDIA_ACCEL set, Django only resolves the file and checks the
+conditional headers; the body is left to the fronting proxy through
+``X-Accel-Redirect`` (nginx: API_MEDIA_ACCEL_PREFIX is an ``internal``
+location aliasing MEDIA_ROOT) or ``X-Sendfile`` (Apache, lighttpd).
+"""
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+UNSATISFIABLE = 'unsatisfiable'
+
+
+class FileRange:
+    """The ``length`` bytes of an open file starting at ``start``, read in blocks."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Returns the inclusive ``(first, last)`` byte of a Range header, None to send the whole file, or UNSATISFIABLE."""
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match[0] == 'bytes=-':
+        # Malformed and multi-range requests get the whole file.
+        return None
+    first, last = match[1], match[2]
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if not length or not size:
+            return UNSATISFIABLE
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        return UNSATISFIABLE
+    return first, last
+
+
+def range_applies(request, etag, last_modified):
+    """If-Range: only a range of the same version of the file may be sent."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_media(request, path):
+    """Serves a file of MEDIA_ROOT; see the module docstring."""
+    fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Not found.')
+    if not fullpath.is_file():
+        raise Http404('Not found.')
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(fullpath.name)
+        content_type = content_type or 'application/octet-stream'
+        accel = getattr(settings, 'API_MEDIA_ACCEL', None)
+        if accel == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            prefix = getattr(settings, 'API_MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path.lstrip('/')
+        elif accel == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = str(fullpath)
+        else:
+            response = file_response(request, fullpath, stat.st_size, content_type, etag, last_modified)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def file_response(request, fullpath, size, content_type, etag, last_modified):
+    """Returns the whole file, or the requested byte range of it."""
+    byte_range = None
+    if 'Range' in request.headers and request.method in ('GET', 'HEAD') and range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.headers['Range'], size)
+    if byte_range == UNSATISFIABLE:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    else:
+        first, last = byte_range
+        file = open(fullpath, 'rb')
+        if last == size - 1:
+            # Up to the end: the positioned file itself, which sendfile() can still take.
+            file.seek(first)
+            response = FileResponse(file, status=206, content_type=content_type)
+        else:
+            response = FileResponse(FileRange(file, first, last - first + 1), status=206, content_type=content_type)
+            response['Content-Length'] = last - first + 1
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,101 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+from .performance import RequestTimings, histograms, install_query_hook
+
+logger = logging.getLogger('api.performance')
+
+
+def _loaded_user(request):
+    """Returns the user of ``request`` if the request already loaded it, else None; never queries."""
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        # Where request.auser() caches the user of async views.
+        return getattr(request, '_acached_user', None)
+    return user
+
+
+class PerformanceMiddleware:
+    """Measures each request's total, view, SQL and JSON serialization time.
+
+    The timings are sent back in a ``Server-Timing`` header to the clients
+    API_SERVER_TIMING allows (``'staff'``: staff users whose request already
+    loaded the user, so the header never costs a session query; True:
+    everyone; False: nobody), logged as one JSON line on the
+    ``api.performance`` logger (at WARNING for requests slower than
+    API_PERFORMANCE_SLOW_MS, INFO otherwise) and added to the per-route
+    histograms of api.performance. Place it first in MIDDLEWARE so ``total``
+    covers the other middleware; ``view`` runs from URL resolution to the
+    view's response. Streamed bodies are produced after the response leaves
+    the middleware and are not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before the connection_created hook was registered.
+        for connection in connections.all(initialized_only=True):
+            install_query_hook(connection)
+        timings = RequestTimings()
+        request.timings = timings
+        token = timings.activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings.deactivate(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        request.timings = timings
+        token = timings.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.deactivate(token)
+        return self.finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timings.view_start = time.perf_counter()
+
+    def finish(self, request, response, timings):
+        now = time.perf_counter()
+        if timings.view_start is not None:
+            timings.view = now - timings.view_start
+        timings.total = now - timings.start
+
+        server_timing = getattr(settings, 'API_SERVER_TIMING', 'staff')
+        if server_timing == 'staff':
+            user = _loaded_user(request)
+            server_timing = user is not None and user.is_staff
+        if server_timing:
+            response['Server-Timing'] = timings.server_timing()
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unresolved'
+        histograms.record(route, timings)
+        slow = timings.total * 1000 >= getattr(settings, 'API_PERFORMANCE_SLOW_MS', 500)
+        level = logging.WARNING if slow else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'queries': timings.queries,
+                **{f'{metric}_ms': ms for metric, ms in timings.durations_ms().items()},
+            }))
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Script = apps.get_model('api', 'Script')
+    Review = apps.get_model('api', 'Review')
+    reviews = Review.objects.filter(script=OuterRef('pk')).order_by().values('script')
+    Script.objects.update(
+        reviews_count=Coalesce(Subquery(reviews.annotate(value=Count('pk')).values('value')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(value=Sum('rating')).values('value')), 0),
+        rating_count=Coalesce(Subquery(reviews.annotate(value=Count('rating')).values('value')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='script',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='script',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='script',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
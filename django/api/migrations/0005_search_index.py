@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# FTS5 tables backing api.search; the rowid of each table is the model's pk.
+SEARCH_TABLES = {
+    'blogpost': ('title', 'description', 'content'),
+    'script': ('title', 'description', 'key_benefits'),
+    'teammember': ('name', 'role', 'short_description'),
+}
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        if ('ENABLE_FTS5',) not in cursor.fetchall():
+            # api.search falls back to LIKE queries.
+            return
+    for model_name, columns in SEARCH_TABLES.items():
+        table = f'api_search_{model_name}'
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, tokenize='porter unicode61')"
+        )
+        model = apps.get_model('api', model_name)
+        rows = [
+            [pk, *(strip_tags(value or '') if column == 'content' else (value or '') for column, value in zip(columns, values))]
+            for pk, *values in model.objects.values_list('pk', *columns)
+        ]
+        if rows:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})",
+                    rows,
+                )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for model_name in SEARCH_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS api_search_{model_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_content_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_review_pagination'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='ingest_token',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
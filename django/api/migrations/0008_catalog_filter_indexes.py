@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+# The auto-created M2M tables only index (script_id, value_id) and value_id alone;
+# filtering scripts by value reads script_id from a covering (value_id, script_id) index.
+M2M_INDEXES = {
+    'api_script_categories_category_script': ('api_script_categories', 'category_id'),
+    'api_script_frameworks_framework_script': ('api_script_frameworks', 'framework_id'),
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_review_ingest_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['price'], name='api_script_price'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['reviews_count'], name='api_script_reviews_count'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['title'], name='api_script_title'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['created_at'], name='api_script_featured_created'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(condition=models.Q(('is_bestseller', True)), fields=['created_at'], name='api_script_bestseller_created'),
+        ),
+        *(
+            migrations.RunSQL(
+                f'CREATE INDEX {name} ON {table} ({column}, script_id)',
+                f'DROP INDEX {name}',
+            )
+            for name, (table, column) in M2M_INDEXES.items()
+        ),
+    ]
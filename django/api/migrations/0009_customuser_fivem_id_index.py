@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_catalog_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='fivem_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
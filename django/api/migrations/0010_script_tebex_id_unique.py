@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+def blank_tebex_ids_to_null(apps, schema_editor):
+    # Several scripts may lack an id, but only NULLs are exempt from the unique constraint.
+    Script = apps.get_model('api', 'Script')
+    Script.objects.filter(tebex_id='').update(tebex_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_customuser_fivem_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_tebex_ids_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='script',
+            name='tebex_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -1,9 +1,14 @@
 from django.db import models
 from django.utils.text import slugify
-from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from ckeditor.fields import RichTextField
 from django.contrib.auth.models import AbstractUser
 
+from .slugs import SlugQuerySet, save_with_unique_slug
+
 # Create your models here.
 
 class Stats(models.Model):
@@ -65,40 +70,125 @@ class Script(models.Model):
     frameworks = models.ManyToManyField(Framework, related_name='scripts', blank=True)
     is_featured = models.BooleanField(default=False, blank=True, null=True)
     is_bestseller = models.BooleanField(default=False, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
-    tebex_id = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True, db_index=True)
+    # Unique so catalog imports can upsert on it.
+    tebex_id = models.CharField(max_length=255, unique=True, blank=True, null=True)
     showcase_servers = models.ManyToManyField(ShowcaseServer, related_name='scripts', blank=True)
     key_benefits = models.TextField(blank=True, null=True)
     core_features = models.TextField(blank=True, null=True)
     system_requirements = models.TextField(blank=True, null=True)
+    # Denormalized review aggregates, maintained by Review.save() and the
+    # review post_delete signal. Use recompute_review_aggregates() to fix drift.
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever the script, its images, reviews or M2M relations change;
+    # backs the ETag/Last-Modified headers of the detail endpoint.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    RATING_VALUES = range(1, 6)
+    REVIEW_AGGREGATE_FIELDS = (
+        'reviews_count', 'rating_sum', 'rating_count', *(f'rating_{value}_count' for value in RATING_VALUES)
+    )
+
+    objects = SlugQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Sorts and filters of the catalog (see api.facets); each index ends
+            # with the pk keyset pagination uses as tiebreaker.
+            models.Index(fields=['price'], name='api_script_price'),
+            models.Index(fields=['reviews_count'], name='api_script_reviews_count'),
+            models.Index(fields=['title'], name='api_script_title'),
+            # Flag filters compile to a bare ``WHERE is_featured``, which only a
+            # partial index can serve; it holds just the few flagged scripts.
+            models.Index(fields=['created_at'], condition=Q(is_featured=True), name='api_script_featured_created'),
+            models.Index(fields=['created_at'], condition=Q(is_bestseller=True), name='api_script_bestseller_created'),
+        ]
+
+    def get_slug_base(self):
+        return slugify(self.title or "") or "untitled-script"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            if self.title:
-                base_slug = slugify(self.title)
+        bump_version = not self._state.adding
+        if bump_version:
+            if kwargs.get('update_fields') is None:
+                # Never write back possibly stale aggregates loaded with the instance.
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.REVIEW_AGGREGATE_FIELDS
+                ]
             else:
-                base_slug = "untitled-script"
-
-            self.slug = base_slug
-            counter = 1
-            while True:
-                try:
-                    super(Script, self).save(*args, **kwargs)
-                    break
-                except IntegrityError:
-                    self.slug = f"{base_slug}-{counter}"
-                    counter += 1
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
+            self.version = F('version') + 1
+        if not self.slug:
+            save_with_unique_slug(self, lambda: super(Script, self).save(*args, **kwargs))
         else:
             super(Script, self).save(*args, **kwargs)
+        if bump_version:
+            self.refresh_from_db(fields=['version'])
+
+    @classmethod
+    def touch(cls, script_ids):
+        """Bumps the version stamp of scripts whose related objects changed."""
+        cls.objects.filter(pk__in=script_ids).update(version=F('version') + 1, updated_at=timezone.now())
+
+    @classmethod
+    def showing_images(cls, names):
+        """Returns the queryset of the ids of the scripts whose payloads embed one of the stored images ``names``."""
+        # Subqueries rather than joins, which would multiply the gallery, reviews and servers.
+        return cls.objects.filter(
+            Q(image__in=names)
+            | Q(pk__in=Image.objects.filter(image__in=names).values('script_id'))
+            | Q(pk__in=Review.objects.filter(pfp__in=names).values('script_id'))
+            | Q(pk__in=cls.showcase_servers.through.objects.filter(showcaseserver__logo__in=names).values('script_id'))
+        ).values_list('pk', flat=True)
 
     def get_reviews_count(self):
         """Returns the count of reviews for the script."""
-        return self.reviews.count()
+        return self.reviews_count
 
     def get_rating(self):
         """Returns the average rating of the script based on its reviews as a float rounded to 1 decimal place."""
-        avg_rating = self.reviews.aggregate(models.Avg('rating'))['rating__avg'] or 0
-        return round(avg_rating, 1)
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def get_rating_histogram(self):
+        """Returns the number of reviews per star rating."""
+        return {str(value): getattr(self, f'rating_{value}_count') for value in self.RATING_VALUES}
+
+    @classmethod
+    def adjust_review_aggregates(cls, script_id, delta):
+        """Applies a ``{field: change}`` delta to a script's review aggregates and bumps its version."""
+        cls.objects.filter(pk=script_id).update(
+            **{field: F(field) + change for field, change in delta.items() if change},
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def recompute_review_aggregates(cls, script_ids=None):
+        """Recomputes the review aggregates from the Review table in a single UPDATE."""
+        reviews = Review.objects.filter(script=OuterRef('pk')).order_by().values('script')
+        scripts = cls.objects.all() if script_ids is None else cls.objects.filter(pk__in=script_ids)
+        return scripts.update(
+            reviews_count=Coalesce(Subquery(reviews.annotate(value=Count('pk')).values('value')), 0),
+            rating_sum=Coalesce(Subquery(reviews.annotate(value=Sum('rating')).values('value')), 0),
+            rating_count=Coalesce(Subquery(reviews.annotate(value=Count('rating')).values('value')), 0),
+            **{
+                f'rating_{value}_count': Coalesce(
+                    Subquery(reviews.filter(rating=value).annotate(count=Count('pk')).values('count')), 0
+                )
+                for value in cls.RATING_VALUES
+            },
+        )
 
     def get_reviews(self):
         """Returns all reviews for the script."""
@@ -124,6 +214,48 @@ class Review(models.Model):
     rating = models.IntegerField(choices=[(i, str(i)) for i in range(1, 6)], blank=True, null=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
+    # Token of the spooled submission the review was published from (see api.ingest).
+    ingest_token = models.UUIDField(unique=True, blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a script's reviews by each supported sort.
+            models.Index(fields=['script', 'created_at'], name='api_review_script_created'),
+            models.Index(fields=['script', 'rating'], name='api_review_script_rating'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Saves the review and updates the script's rating aggregates in the same transaction."""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Review.objects.filter(pk=self.pk).values('script_id', 'rating').first()
+            super().save(*args, **kwargs)
+
+            added = self.aggregate_delta(self.rating)
+            if previous and previous['script_id'] == self.script_id:
+                removed = self.aggregate_delta(previous['rating'], sign=-1)
+                delta = {field: added.get(field, 0) + removed.get(field, 0) for field in {*added, *removed}}
+                Script.adjust_review_aggregates(self.script_id, delta)
+            else:
+                if previous:
+                    Script.adjust_review_aggregates(
+                        previous['script_id'], self.aggregate_delta(previous['rating'], sign=-1)
+                    )
+                Script.adjust_review_aggregates(self.script_id, added)
+
+    @staticmethod
+    def aggregate_delta(rating, sign=1):
+        """Returns the ``{Script field: change}`` delta contributed by a review with the given rating."""
+        rating = None if rating in (None, '') else int(rating)
+        delta = {
+            'reviews_count': sign,
+            'rating_sum': sign * (rating or 0),
+            'rating_count': sign * (rating is not None),
+        }
+        if rating in Script.RATING_VALUES:
+            delta[f'rating_{rating}_count'] = sign
+        return delta
 
     def __str__(self) -> str:
         return f"Review by {self.name} for {self.script.title}" if self.name and self.script.title else "Unnamed Review"
@@ -133,7 +265,7 @@ class Testimonial(models.Model):
     pfp = models.ImageField(upload_to='testimonials/pfps/', blank=True, null=True)
     name = models.CharField(max_length=255, blank=True, null=True)
     comment = models.TextField(blank=True, null=True)
-    date = models.DateTimeField(auto_now_add=True, blank=True, null=True)
+    date = models.DateTimeField(auto_now_add=True, blank=True, null=True, db_index=True)
 
     def __str__(self) -> str:
         return f"Testimonial by {self.name}" if self.name else "Unnamed Testimonial"
@@ -152,25 +284,31 @@ class BlogPost(models.Model):
     description = models.TextField()
     content = RichTextField()
     author = models.CharField(max_length=255)
-    published_date = models.DateTimeField()
+    published_date = models.DateTimeField(db_index=True)
     modified_date = models.DateTimeField()
     category = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True, null=True)
+    # Bumped on every save; backs the ETag/Last-Modified headers of the detail endpoint.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SlugQuerySet.as_manager()
+
+    def get_slug_base(self):
+        return slugify(self.title) or "untitled-post"
 
     def save(self, *args, **kwargs):
+        bump_version = not self._state.adding
+        if bump_version:
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
+            self.version = F('version') + 1
         if not self.slug:
-            base_slug = slugify(self.title)
-            self.slug = base_slug
-            counter = 1
-            while True:
-                try:
-                    super(BlogPost, self).save(*args, **kwargs)
-                    break
-                except IntegrityError:
-                    self.slug = f"{base_slug}-{counter}"
-                    counter += 1
+            save_with_unique_slug(self, lambda: super(BlogPost, self).save(*args, **kwargs))
         else:
             super(BlogPost, self).save(*args, **kwargs)
+        if bump_version:
+            self.refresh_from_db(fields=['version'])
 
     def __str__(self):
         return self.title
@@ -186,7 +324,8 @@ class TeamMember(models.Model):
 
 
 class CustomUser(AbstractUser):
-    fivem_id = models.CharField(max_length=255, blank=True, null=True)
+    # Every FiveM login looks the user up by it.
+    fivem_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     groups = models.ManyToManyField(
         'auth.Group',
         related_name='customuser_groups',  # Updated related_name
@@ -0,0 +1,91 @@
+"""Shared outbound HTTP client for calls to third-party services (the FiveM OAuth provider).
+
+One requests.Session per process keeps TCP/TLS connections alive in a
+pool (API_HTTP_POOL_SIZE per host), so consecutive calls skip the
+handshakes. Every request is bounded by API_HTTP_CONNECT_TIMEOUT and
+API_HTTP_READ_TIMEOUT; a connection that cannot be established is retried
+up to API_HTTP_RETRIES times with exponential backoff, as are idempotent
+requests that time out or get a 502/503/504. POSTs are never resent once
+they may have reached the server. ``arequest()`` runs the same pooled
+client off the event loop for async views.
+"""
+import threading
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (502, 503, 504)
+
+# Raised for timeouts, refused connections and exhausted retries.
+OutboundError = requests.RequestException
+
+_lock = threading.Lock()
+_session = None
+
+
+def _setting(name, default):
+    return getattr(settings, f'API_HTTP_{name}', default)
+
+
+def get_timeout():
+    """Returns the ``(connect, read)`` timeout in seconds applied to every request."""
+    return (_setting('CONNECT_TIMEOUT', 3.05), _setting('READ_TIMEOUT', 5))
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies get_timeout() to requests made without an explicit timeout."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', get_timeout())
+        return super().request(method, url, **kwargs)
+
+
+def new_session():
+    """Returns a session with a keep-alive connection pool and bounded retries."""
+    retries = _setting('RETRIES', 2)
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries, other=0,
+        # Only read errors and statuses are restricted to these; connect errors mean nothing was sent.
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=_setting('RETRY_BACKOFF', 0.1),
+        raise_on_status=False,
+    )
+    pool_size = _setting('POOL_SIZE', 10)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = TimeoutSession()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Returns the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = new_session()
+    return _session
+
+
+def close_session():
+    """Closes the pooled connections; the next request opens a new session."""
+    global _session
+    with _lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def request(method, url, **kwargs):
+    """Sends a request through the pooled session; raises OutboundError on network failures."""
+    return get_session().request(method, url, **kwargs)
+
+
+async def arequest(method, url, **kwargs):
+    """Async version of request(): waits on a worker thread, not on the ORM's thread."""
+    return await sync_to_async(request, thread_sensitive=False)(method, url, **kwargs)
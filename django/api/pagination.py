@@ -0,0 +1,208 @@
+import base64
+import datetime
+import decimal
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .responses import ApiJsonResponse
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'API_DEFAULT_PAGE_SIZE', 20)
+MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor or limit query parameter cannot be decoded."""
+
+
+def wants_pagination(request):
+    """Pagination is opt-in so existing clients keep receiving the full array."""
+    return 'cursor' in request.GET or 'limit' in request.GET
+
+
+def _cursor_default(value):
+    # Unlike DjangoJSONEncoder, keep full microsecond precision: a truncated
+    # timestamp would make the keyset filter skip rows.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values):
+    """Encodes the sort key of the last row of a page into an opaque token."""
+    raw = json.dumps(values, default=_cursor_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodes a token produced by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor('Invalid cursor.')
+    return values
+
+
+def get_limit(request):
+    """Returns the requested page size, capped at MAX_PAGE_SIZE."""
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise InvalidCursor('Invalid limit.')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _segments(queryset, ordering):
+    """Splits the ordered queryset into the segments that keyset pages walk through in order.
+
+    NULLs cannot be compared with ``<``/``>``, so a nullable sort field is
+    served as two index-ordered segments: non-NULL values, then NULLs
+    (ordered by pk). Each element is ``(holds_nulls, queryset)``.
+    """
+    descending = ordering.startswith('-')
+    field = ordering.lstrip('-')
+    pk_order = '-pk' if descending else 'pk'
+    if field == 'pk':
+        return [(False, queryset.order_by(pk_order))]
+
+    values = queryset.order_by(f'-{field}' if descending else field, pk_order)
+    if not queryset.model._meta.get_field(field).null:
+        return [(False, values)]
+    values = values.filter(**{f'{field}__isnull': False})
+    nulls = (True, queryset.filter(**{f'{field}__isnull': True}).order_by(pk_order))
+    return [(False, values), nulls]
+
+
+def _after(queryset, ordering, value, pk):
+    """Filters a segment down to the rows strictly after ``(value, pk)``.
+
+    The condition is written as ``field <= value AND (field < value OR pk < last_pk)``
+    (mirrored when ascending) so the database can seek into the index
+    instead of scanning it from the start.
+    """
+    descending = ordering.startswith('-')
+    field = ordering.lstrip('-')
+    after = 'lt' if descending else 'gt'
+    if field == 'pk' or value is None:
+        return queryset.filter(**{f'pk__{after}': pk})
+    return queryset.filter(
+        Q(**{f'{field}__{after}e': value}),
+        Q(**{f'{field}__{after}': value}) | Q(**{f'pk__{after}': pk}),
+    )
+
+
+def _decode_sort_key(queryset, ordering, token):
+    field = ordering.lstrip('-')
+    value, pk = decode_cursor(token)
+    try:
+        pk = queryset.model._meta.pk.to_python(pk)
+        value = pk if field == 'pk' else queryset.model._meta.get_field(field).to_python(value)
+    except ValidationError:
+        raise InvalidCursor('Invalid cursor.')
+    return value, pk
+
+
+def fetch_page(queryset, ordering, limit, token=None):
+    """Returns ``(rows, next_cursor)`` for the page of ``queryset`` following ``token``.
+
+    ``ordering`` is a field name, optionally prefixed with ``-``; the pk is
+    used as tiebreaker and NULLs sort last. Pages are selected with a WHERE
+    clause on the sort key of the previous page's last row rather than with
+    OFFSET, so deep pages cost the same as the first one.
+    """
+    cursor = _decode_sort_key(queryset, ordering, token) if token else None
+
+    rows = []
+    for holds_nulls, segment in _segments(queryset, ordering):
+        if cursor is not None:
+            value, pk = cursor
+            if (value is None) != holds_nulls:
+                # The cursor points into a later segment.
+                continue
+            segment = _after(segment, ordering, value, pk)
+            cursor = None
+        rows.extend(segment[:limit + 1 - len(rows)])
+        if len(rows) > limit:
+            break
+
+    return _trim_page(rows, ordering, limit)
+
+
+def _trim_page(rows, ordering, limit):
+    """Drops the look-ahead row of a page and returns ``(rows, next_cursor)``."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        field = ordering.lstrip('-')
+        value = last.pk if field == 'pk' else getattr(last, field)
+        next_cursor = encode_cursor([value, last.pk])
+    return rows, next_cursor
+
+
+async def afetch_page(queryset, ordering, limit, token=None):
+    """Async version of fetch_page()."""
+    cursor = _decode_sort_key(queryset, ordering, token) if token else None
+
+    rows = []
+    for holds_nulls, segment in _segments(queryset, ordering):
+        if cursor is not None:
+            value, pk = cursor
+            if (value is None) != holds_nulls:
+                continue
+            segment = _after(segment, ordering, value, pk)
+            cursor = None
+        rows.extend([row async for row in segment[:limit + 1 - len(rows)]])
+        if len(rows) > limit:
+            break
+    return _trim_page(rows, ordering, limit)
+
+
+def paginate(request, queryset, ordering):
+    """Returns ``(rows, next_cursor)`` for the page selected by the request's ``limit`` and ``cursor``."""
+    return fetch_page(queryset, ordering, get_limit(request), request.GET.get('cursor'))
+
+
+async def apaginate(request, queryset, ordering):
+    """Async version of paginate()."""
+    return await afetch_page(queryset, ordering, get_limit(request), request.GET.get('cursor'))
+
+
+def next_page_url(request, next_cursor):
+    """Builds the absolute URL of the next page, keeping the other query parameters."""
+    if next_cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = next_cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def paginated_response(request, queryset, serialize, ordering='pk'):
+    """Returns a JSON page of ``queryset`` rendered with ``serialize`` plus a ``next`` link."""
+    try:
+        rows, next_cursor = paginate(request, queryset, ordering)
+    except InvalidCursor as e:
+        return ApiJsonResponse({'error': str(e)}, status=400)
+    return ApiJsonResponse({
+        'results': [serialize(row) for row in rows],
+        'next': next_page_url(request, next_cursor),
+    })
+
+
+async def apaginated_response(request, queryset, serialize, ordering='pk'):
+    """Async version of paginated_response()."""
+    try:
+        rows, next_cursor = await apaginate(request, queryset, ordering)
+    except InvalidCursor as e:
+        return ApiJsonResponse({'error': str(e)}, status=400)
+    return ApiJsonResponse({
+        'results': [serialize(row) for row in rows],
+        'next': next_page_url(request, next_cursor),
+    })
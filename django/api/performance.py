@@ -0,0 +1,248 @@
+"""Per-request timings and rolling per-route latency histograms.
+
+PerformanceMiddleware (api.middleware) collects a RequestTimings for every
+request; SQL queries are timed by an execute wrapper installed on every
+database connection. Finished requests are aggregated in memory per
+process and added to cache counters every API_PERFORMANCE_FLUSH_INTERVAL
+seconds, in windows of API_PERFORMANCE_WINDOW_SECONDS of which the last
+API_PERFORMANCE_WINDOWS are kept. With a shared cache backend the
+histograms cover every worker; with the default local-memory cache, only
+the process that serves the dump.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .cache import KEY_PREFIX, get_cache
+
+METRICS = ('total', 'view', 'db', 'serialize')
+# Upper bounds (ms) of the histogram buckets; slower samples land in an overflow bucket.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+OVERFLOW = len(BUCKETS_MS)
+
+_current = ContextVar('api_request_timings', default=None)
+
+
+class RequestTimings:
+    """Durations (in seconds) and SQL query count of one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.view_start = None
+        self.view = None
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def durations_ms(self):
+        """Returns ``{metric: ms}`` for the metrics that were measured."""
+        return {
+            metric: round(getattr(self, metric) * 1000, 2)
+            for metric in METRICS if getattr(self, metric) is not None
+        }
+
+    def server_timing(self):
+        """Formats the timings as a Server-Timing header value."""
+        entries = []
+        for metric, ms in self.durations_ms().items():
+            entry = f'{metric};dur={ms}'
+            if metric == 'db':
+                entry += f';desc="{self.queries} queries"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def track_query(execute, sql, params, many, context):
+    """Execute wrapper that counts and times the queries of the current request, if any.
+
+    The timings are found through a context variable, which asgiref copies
+    into the worker threads running the ORM for async views.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install_query_hook(connection):
+    if track_query not in connection.execute_wrappers:
+        # First, so that popping a temporary wrapper added later never removes it.
+        connection.execute_wrappers.insert(0, track_query)
+
+
+@receiver(connection_created)
+def install_query_hook_on_connect(sender, connection, **kwargs):
+    install_query_hook(connection)
+
+
+def add_serialization_time(seconds):
+    """Adds ``seconds`` of response encoding to the current request's timings, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.serialize += seconds
+
+
+def _setting(name, default):
+    return getattr(settings, f'API_PERFORMANCE_{name}', default)
+
+
+def current_window():
+    return int(time.time() // _setting('WINDOW_SECONDS', 60))
+
+
+def bucket_index(ms):
+    for index, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return OVERFLOW
+
+
+def _routes_key(window):
+    return f'{KEY_PREFIX}:performance:{window}:routes'
+
+
+def _counter_key(window, route, counter):
+    return f'{KEY_PREFIX}:performance:{window}:{route}:{counter}'
+
+
+def _counter_names():
+    """Every counter kept per route and window: totals, then one per metric and bucket."""
+    names = ['requests', 'queries']
+    for metric in METRICS:
+        names.append(f'{metric}:count')
+        names.append(f'{metric}:sum_us')
+        names.extend(f'{metric}:{index}' for index in range(OVERFLOW + 1))
+    return names
+
+
+class RouteHistograms:
+    """Accumulates request timings per route in memory and periodically adds them to the cache counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (window, route) -> {counter: value}
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, route, timings):
+        window = current_window()
+        with self._lock:
+            counters = self._pending.setdefault((window, route), {})
+            counters['requests'] = counters.get('requests', 0) + 1
+            counters['queries'] = counters.get('queries', 0) + timings.queries
+            for metric, ms in timings.durations_ms().items():
+                for counter, value in (
+                    (f'{metric}:count', 1), (f'{metric}:sum_us', int(ms * 1000)), (f'{metric}:{bucket_index(ms)}', 1),
+                ):
+                    counters[counter] = counters.get(counter, 0) + value
+            due = time.monotonic() - self._last_flush >= _setting('FLUSH_INTERVAL', 5)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Adds the pending counters to the cache."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        cache = get_cache()
+        timeout = _setting('WINDOW_SECONDS', 60) * (_setting('WINDOWS', 10) + 1)
+        routes_by_window = {}
+        for (window, route), counters in pending.items():
+            routes_by_window.setdefault(window, set()).add(route)
+            for counter, value in counters.items():
+                key = _counter_key(window, route, counter)
+                if not cache.add(key, value, timeout):
+                    try:
+                        cache.incr(key, value)
+                    except ValueError:
+                        cache.set(key, value, timeout)
+        for window, routes in routes_by_window.items():
+            key = _routes_key(window)
+            known = cache.get(key, set())
+            if not routes <= known:
+                cache.set(key, known | routes, timeout)
+
+
+histograms = RouteHistograms()
+
+
+def _percentile(buckets, count, fraction):
+    """Upper bound (ms) of the bucket holding the ``fraction`` quantile; None when it overflows."""
+    threshold = fraction * count
+    seen = 0
+    for index, bound in enumerate(BUCKETS_MS):
+        seen += buckets[index]
+        if seen >= threshold:
+            return bound
+    return None
+
+
+def get_histograms(route=None):
+    """Returns the histograms of every route (or only ``route``) over the kept windows.
+
+    Each route maps to its request and query totals and, per metric, the
+    sample count, mean, p50/p95/p99 (as bucket upper bounds) and the bucket
+    counts keyed by their upper bound in ms.
+    """
+    histograms.flush()
+    cache = get_cache()
+    last = current_window()
+    windows = range(last - _setting('WINDOWS', 10) + 1, last + 1)
+    routes_by_window = cache.get_many([_routes_key(window) for window in windows])
+    names = _counter_names()
+    keys = {}
+    for window in windows:
+        for name in routes_by_window.get(_routes_key(window), ()):
+            if route is None or name == route:
+                for counter in names:
+                    keys[_counter_key(window, name, counter)] = (name, counter)
+    values = cache.get_many(list(keys))
+
+    totals = {}
+    for key, value in values.items():
+        name, counter = keys[key]
+        counters = totals.setdefault(name, {})
+        counters[counter] = counters.get(counter, 0) + value
+
+    result = {}
+    for name in sorted(totals):
+        counters = totals[name]
+        entry = {'requests': counters.get('requests', 0), 'queries': counters.get('queries', 0)}
+        for metric in METRICS:
+            count = counters.get(f'{metric}:count', 0)
+            if not count:
+                continue
+            buckets = [counters.get(f'{metric}:{index}', 0) for index in range(OVERFLOW + 1)]
+            entry[metric] = {
+                'count': count,
+                'mean_ms': round(counters.get(f'{metric}:sum_us', 0) / count / 1000, 2),
+                'p50_ms': _percentile(buckets, count, 0.5),
+                'p95_ms': _percentile(buckets, count, 0.95),
+                'p99_ms': _percentile(buckets, count, 0.99),
+                'buckets': {
+                    str(bound): buckets[index] for index, bound in enumerate(BUCKETS_MS) if buckets[index]
+                },
+            }
+            if buckets[OVERFLOW]:
+                entry[metric]['buckets']['+Inf'] = buckets[OVERFLOW]
+        result[name] = entry
+    return result
@@ -0,0 +1,182 @@
+"""SQLite query plan inspection: full scans, temp B-tree sorts and the indexes that would avoid them.
+
+capture_statements() records the SQL (with its parameters) run on every
+database connection; inspect() runs ``EXPLAIN QUERY PLAN`` on a statement
+and returns its findings:
+
+- ``full_scan``: a table whose rows the statement filters is read row by
+  row (``SCAN <table>``);
+- ``temp_btree``: rows are sorted or grouped by a column in a temporary
+  B-tree (``USE TEMP B-TREE FOR ORDER BY``/``GROUP BY``/``DISTINCT``).
+
+Each finding proposes an index: the columns the statement compares for
+equality, then the ORDER BY/GROUP BY columns (or the first column compared
+with a range). When an existing index already starts with those columns,
+the finding names it instead: the planner preferred another access path,
+usually because a more selective filter drives the query. Without ANALYZE
+statistics SQLite plans from the schema alone, so a small database shows
+the plans of a large one.
+"""
+import re
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.db import connections
+
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+SCAN_RE = re.compile(r'^SCAN (\w+)$')
+TEMP_BTREE_RE = re.compile(r'USE TEMP B-TREE FOR (?:(?:RIGHT PART|LAST TERM) OF )?(ORDER BY|GROUP BY|DISTINCT)')
+TABLE_RE = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (?!ON\b|WHERE\b|INNER\b|LEFT\b|ORDER\b|GROUP\b|LIMIT\b)(\w+))?')
+CLAUSE_END = r'(?= GROUP BY | HAVING | ORDER BY | LIMIT |\)|$)'
+COLUMN_RE = r'(?:"(\w+)"|([A-Z]\d+))\."(\w+)"'
+EQUALITY_OPERATORS = ('=', 'IN (', 'IS NULL')
+
+
+@contextmanager
+def capture_statements():
+    """Collects the ``(alias, sql, params)`` of the statements run on every connection in the block."""
+    statements = []
+
+    def recorder(alias):
+        def record(execute, sql, params, many, context):
+            if not many:
+                statements.append((alias, sql, params))
+            return execute(sql, params, many, context)
+        return record
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder(connection.alias)))
+        yield statements
+
+
+def is_explained(sql):
+    return sql.lstrip().split(None, 1)[0].upper() in EXPLAINED
+
+
+def explain(alias, sql, params):
+    """Returns the detail lines of the SQLite query plan of a statement."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def tables_by_name(sql):
+    """Returns ``{name used in the plan: table}`` for the tables and aliases of a statement."""
+    names = {}
+    for table, alias in TABLE_RE.findall(sql):
+        names[table] = table
+        if alias:
+            names[alias] = table
+    return names
+
+
+def _columns(text):
+    """Yields the ``(table or alias, column)`` of the qualified column references in ``text``."""
+    for match in re.finditer(COLUMN_RE, text):
+        yield match[1] or match[2], match[3]
+
+
+def _select_columns(sql):
+    return list(_columns(sql[:sql.find(' FROM ')]))
+
+
+def clause_columns(sql, clause):
+    """Returns the columns of the last ``clause`` (e.g. ``ORDER BY``) of a statement, positions resolved."""
+    found = re.findall(rf' {clause} (.*?){CLAUSE_END}', sql)
+    if not found:
+        return []
+    columns = []
+    for term in found[-1].split(', '):
+        if term.strip('() ').isdigit():
+            # Django groups by the position of the column in the select list.
+            selected = _select_columns(sql)
+            position = int(term.strip('() ')) - 1
+            if position < len(selected):
+                columns.append(selected[position])
+        else:
+            columns.extend(_columns(term))
+    return columns
+
+
+def compared_columns(sql):
+    """Returns the equality- and range-compared ``(name, column)`` of a statement's WHERE clauses."""
+    equal, ranged = [], []
+    # Subqueries stay in the text of the WHERE clause containing them.
+    for where in re.findall(r' WHERE (.*?)(?= GROUP BY | HAVING | ORDER BY | LIMIT |$)', sql):
+        for match in re.finditer(rf'{COLUMN_RE}\s*(=|IN \(|IS NULL|[<>]=?|(?=\)| AND | OR |$))?', where):
+            if match[4] is None:
+                # Selected by a subquery, not compared.
+                continue
+            column = (match[1] or match[2], match[3])
+            # A bare column is a boolean test.
+            if match[4] in EQUALITY_OPERATORS or not match[4]:
+                equal.append(column)
+            else:
+                ranged.append(column)
+    return equal, ranged
+
+
+def propose_index(sql, name, sorted_by=()):
+    """Returns the columns of an index of the ``name`` table (or alias) serving ``sql``, or None."""
+    equal, ranged = compared_columns(sql)
+    equal = [column for table, column in equal if table == name]
+    ranged = [column for table, column in ranged if table == name]
+    ordered = [column for table, column in sorted_by if table == name]
+    # The rowid is the tiebreaker of every index already, and a pk lookup needs no index.
+    columns = [column for column in dict.fromkeys(equal + (ordered or ranged[:1])) if column != 'id']
+    return columns or None
+
+
+def existing_index(alias, table, columns):
+    """Returns the name of an index of ``table`` whose leading columns are ``columns``, or None."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return next((
+        name for name, constraint in constraints.items()
+        if constraint['index'] and constraint['columns'][:len(columns)] == columns
+    ), None)
+
+
+def model_for_table(table):
+    return next((model for model in apps.get_models(include_auto_created=True) if model._meta.db_table == table), None)
+
+
+def index_ddl(table, columns):
+    quoted = ', '.join(f'"{column}"' for column in columns)
+    return f'CREATE INDEX "{table}_{"_".join(columns)}" ON "{table}" ({quoted})'
+
+
+def inspect(alias, sql, params):
+    """Returns the plan of a statement and its findings (see the module docstring)."""
+    plan = explain(alias, sql, params)
+    names = tables_by_name(sql)
+    equal, ranged = compared_columns(sql)
+    filtered = {name for name, _ in equal + ranged}
+    findings = []
+    for detail in plan:
+        scan = SCAN_RE.match(detail)
+        if scan and scan[1] in names and scan[1] in filtered:
+            findings.append(('full_scan', scan[1], detail, clause_columns(sql, 'ORDER BY')))
+        temp_btree = TEMP_BTREE_RE.search(detail)
+        if temp_btree:
+            clause = 'ORDER BY' if temp_btree[1] == 'DISTINCT' else temp_btree[1]
+            sorted_by = clause_columns(sql, clause)
+            # Rows sorted by an expression (e.g. a bm25() rank) cannot come from an index.
+            if sorted_by and sorted_by[0][0] in names:
+                findings.append(('temp_btree', sorted_by[0][0], detail, sorted_by))
+
+    results = []
+    for kind, name, detail, sorted_by in findings:
+        table = names[name]
+        columns = propose_index(sql, name, sorted_by)
+        existing = columns and existing_index(alias, table, columns)
+        results.append({
+            'kind': kind,
+            'table': table,
+            'detail': detail,
+            'index': None if existing else columns,
+            'existing_index': existing or None,
+        })
+    return plan, results
@@ -0,0 +1,205 @@
+"""Token-bucket rate limiting of API views.
+
+``@ratelimit(rate='10/m', key='ip')`` gives every client of the view a
+bucket of ``burst`` tokens (the rate's count by default) refilled at the
+rate; a request takes one token, and requests finding the bucket empty
+get a 429 with Retry-After before the view runs, without touching the
+database. API_RATE_LIMITS overrides the rate, burst and key of a view by
+its group name (the view's name unless given), e.g.
+``{'search_view': {'rate': '120/m'}}``, or disables it with ``None``.
+
+Buckets live in the process (API_RATE_LIMIT_BACKEND = 'memory') or in the
+API_RATE_LIMIT_CACHE_ALIAS cache ('cache'), which is shared by every
+worker when it is Memcached or Redis. The cache backend reads and writes
+a bucket without a lock, so concurrent requests of one client on
+different workers may occasionally both get the last token.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+from .responses import ApiJsonResponse
+
+KEY_PREFIX = 'api:ratelimit'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+
+
+def parse_rate(rate):
+    """Parses ``'<count>/<period>'`` (``s``, ``m``, ``h``, ``d``, optionally multiplied as in ``10/30s``)."""
+    match = RATE_RE.match(rate)
+    if not match or not int(match[1]):
+        raise ValueError(f'Invalid rate: {rate!r}')
+    return int(match[1]), int(match[2] or 1) * PERIODS[match[3]]
+
+
+def client_ip(request):
+    """The client address; behind a proxy, the last address it appended to API_RATE_LIMIT_IP_HEADER."""
+    header = getattr(settings, 'API_RATE_LIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def session_or_ip(request):
+    """The session cookie (hashed) when there is one, else the client address.
+
+    Reading the cookie instead of request.user keeps the check free of
+    session and user queries. Clients choose their cookies, so pair a
+    'user' limit with an 'ip' one.
+    """
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        return 'session:' + hashlib.sha256(session.encode()).hexdigest()[:32]
+    return 'ip:' + client_ip(request)
+
+
+KEY_FUNCTIONS = {'ip': lambda request: 'ip:' + client_ip(request), 'user': session_or_ip}
+
+
+def take(bucket, count, period, burst, now):
+    """Takes a token from ``bucket`` (``(tokens, updated)`` or None for a full one).
+
+    Returns the new bucket and the seconds to wait for a token, 0 when one
+    was taken.
+    """
+    interval = period / count
+    tokens, updated = bucket if bucket else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated) / interval)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * interval
+
+
+class MemoryBackend:
+    """Buckets in a dict of this process, swept of refilled buckets as it grows."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        # key -> time at which the bucket is full again and can be forgotten.
+        self._expiry = {}
+
+    def consume(self, key, count, period, burst):
+        now = time.monotonic()
+        with self._lock:
+            bucket, wait = take(self._buckets.get(key), count, period, burst, now)
+            self._buckets[key] = bucket
+            self._expiry[key] = now + (burst - bucket[0]) * period / count
+            max_keys = getattr(settings, 'API_RATE_LIMIT_MEMORY_KEYS', 10000)
+            if len(self._buckets) > max_keys:
+                self._sweep(now, max_keys)
+        return wait
+
+    async def aconsume(self, key, count, period, burst):
+        return self.consume(key, count, period, burst)
+
+    def _sweep(self, now, max_keys):
+        for key in [key for key, expiry in self._expiry.items() if expiry <= now]:
+            del self._buckets[key], self._expiry[key]
+        if len(self._buckets) > max_keys:
+            # Flooded with distinct clients: forget the earliest seen half.
+            for key in list(self._buckets)[:len(self._buckets) // 2]:
+                del self._buckets[key], self._expiry[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._expiry.clear()
+
+
+class CacheBackend:
+    """Buckets in a Django cache, shared by every worker using it; they expire once refilled."""
+
+    def _cache(self):
+        return caches[getattr(settings, 'API_RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _store(key, bucket, count, period, burst):
+        return f'{KEY_PREFIX}:{key}', bucket, math.ceil((burst - bucket[0]) * period / count) + 1
+
+    def consume(self, key, count, period, burst):
+        cache = self._cache()
+        bucket, wait = take(cache.get(f'{KEY_PREFIX}:{key}'), count, period, burst, time.time())
+        cache.set(*self._store(key, bucket, count, period, burst))
+        return wait
+
+    async def aconsume(self, key, count, period, burst):
+        cache = self._cache()
+        bucket, wait = take(await cache.aget(f'{KEY_PREFIX}:{key}'), count, period, burst, time.time())
+        await cache.aset(*self._store(key, bucket, count, period, burst))
+        return wait
+
+
+BACKENDS = {'memory': MemoryBackend(), 'cache': CacheBackend()}
+
+
+def get_backend():
+    return BACKENDS[getattr(settings, 'API_RATE_LIMIT_BACKEND', 'memory')]
+
+
+def get_limit(group, rate, burst, key):
+    """Returns ``(count, period, burst, key)`` for ``group`` after API_RATE_LIMITS, or None when disabled."""
+    if not getattr(settings, 'API_RATE_LIMIT_ENABLED', True):
+        return None
+    overrides = getattr(settings, 'API_RATE_LIMITS', {})
+    if group in overrides:
+        if overrides[group] is None:
+            return None
+        rate = overrides[group].get('rate', rate)
+        burst = overrides[group].get('burst', burst)
+        key = overrides[group].get('key', key)
+    count, period = parse_rate(rate)
+    return count, period, burst or count, key
+
+
+def too_many_requests(wait):
+    response = ApiJsonResponse({'error': 'Too many requests.'}, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def ratelimit(rate, key='ip', burst=None, group=None):
+    """Limits each client (``key``: 'ip' or 'user') of the decorated view to ``rate`` requests."""
+    parse_rate(rate)
+    if key not in KEY_FUNCTIONS:
+        raise ValueError(f'Unknown rate limit key: {key!r}')
+
+    def decorator(view):
+        name = group or view.__name__
+
+        def bucket(request):
+            limit = get_limit(name, rate, burst, key)
+            if limit is None:
+                return None
+            count, period, capacity, key_name = limit
+            return f'{name}:{KEY_FUNCTIONS[key_name](request)}', count, period, capacity
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limit = bucket(request)
+            if limit is not None:
+                wait = get_backend().consume(*limit)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            limit = bucket(request)
+            if limit is not None:
+                wait = await get_backend().aconsume(*limit)
+                if wait:
+                    return too_many_requests(wait)
+            return await view(request, *args, **kwargs)
+
+        return async_wrapper if iscoroutinefunction(view) else wrapper
+
+    return decorator
@@ -0,0 +1,207 @@
+import gzip
+import json
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from .performance import add_serialization_time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+STREAM_CHUNK_SIZE = getattr(settings, 'API_STREAM_CHUNK_SIZE', 500)
+STREAM_BUFFER_BYTES = 64 * 1024
+# Content-Encoding -> suffix of a precompressed sibling file, in order of preference.
+PRECOMPRESSED_ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+class StdlibJsonEncoder:
+    """Encodes with json.dumps() and DjangoJSONEncoder, exactly like JsonResponse."""
+
+    name = 'json'
+    item_separator = b', '
+
+    def dumps(self, data):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class OrjsonEncoder:
+    """Encodes with orjson, delegating datetimes and decimals to DjangoJSONEncoder.
+
+    orjson's native datetime format keeps microseconds and writes UTC as
+    ``+00:00``; passing datetimes through to DjangoJSONEncoder.default keeps
+    the values byte-for-byte identical to the stdlib encoder. Only the
+    insignificant whitespace between tokens differs.
+    """
+
+    name = 'orjson'
+    item_separator = b','
+
+    def __init__(self):
+        self._default = DjangoJSONEncoder().default
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+_encoder = None
+
+
+def get_json_encoder():
+    """Returns the encoder selected by API_JSON_ENCODER.
+
+    ``'auto'`` (the default) uses orjson when it is installed and the stdlib
+    encoder otherwise; ``'orjson'`` and ``'json'`` force one of them, and any
+    other value is imported as a dotted path to an encoder class.
+    """
+    global _encoder
+    if _encoder is None:
+        choice = getattr(settings, 'API_JSON_ENCODER', 'auto')
+        if choice == 'auto':
+            encoder_class = OrjsonEncoder if orjson is not None else StdlibJsonEncoder
+        elif choice == 'json':
+            encoder_class = StdlibJsonEncoder
+        elif choice == 'orjson':
+            if orjson is None:
+                raise ImportError("API_JSON_ENCODER is 'orjson' but orjson is not installed.")
+            encoder_class = OrjsonEncoder
+        else:
+            encoder_class = import_string(choice)
+        _encoder = encoder_class()
+    return _encoder
+
+
+@receiver(setting_changed)
+def reset_json_encoder(setting, **kwargs):
+    """Forgets the cached encoder when API_JSON_ENCODER is overridden (e.g. in tests)."""
+    global _encoder
+    if setting == 'API_JSON_ENCODER':
+        _encoder = None
+
+
+class ApiJsonResponse(JsonResponse):
+    """JsonResponse that serializes with the configured fast encoder; shared by all API views."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        start = time.perf_counter()
+        content = get_json_encoder().dumps(data)
+        add_serialization_time(time.perf_counter() - start)
+        HttpResponse.__init__(self, content=content, **kwargs)
+
+
+def precompress(content):
+    """Returns ``{encoding: bytes}`` of ``content`` for every precompressed encoding available.
+
+    Brotli is only produced when the optional brotli package is installed.
+    """
+    encoded = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(content, quality=11)
+    return encoded
+
+
+def accepted_encodings(request):
+    """Returns the content codings of Accept-Encoding with a non-zero quality."""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def wants_streaming(request):
+    """Streams unpaginated lists on ``?stream=1``, or always when API_STREAM_LIST_RESPONSES is set."""
+    if request.GET.get('stream') in ('1', 'true'):
+        return True
+    return getattr(settings, 'API_STREAM_LIST_RESPONSES', False)
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """A JSON array response emitted element by element.
+
+    The queryset is walked with ``.iterator(chunk_size=...)`` (prefetches
+    run per chunk) and each serialized element is written as soon as it is
+    encoded, so peak memory is bounded by a chunk instead of the whole
+    payload. The bytes are identical to ``ApiJsonResponse(list(...), safe=False)``.
+    Async views pass ``asynchronous=True`` to walk the queryset with
+    ``.aiterator()``, which ASGI servers stream without a worker thread.
+    """
+
+    def __init__(self, queryset, serialize, chunk_size=STREAM_CHUNK_SIZE, asynchronous=False, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        encoder = get_json_encoder()
+        if asynchronous:
+            content = self._aiter_json(queryset.aiterator(chunk_size=chunk_size), serialize, encoder)
+        else:
+            content = self._iter_json(queryset.iterator(chunk_size=chunk_size), serialize, encoder)
+        super().__init__(content, **kwargs)
+
+    @staticmethod
+    def _iter_json(objects, serialize, encoder):
+        buffer = JsonArrayBuffer(encoder)
+        for obj in objects:
+            chunk = buffer.add(serialize(obj))
+            if chunk:
+                yield chunk
+        yield buffer.close()
+
+    @staticmethod
+    async def _aiter_json(objects, serialize, encoder):
+        buffer = JsonArrayBuffer(encoder)
+        async for obj in objects:
+            chunk = buffer.add(serialize(obj))
+            if chunk:
+                yield chunk
+        yield buffer.close()
+
+
+class JsonArrayBuffer:
+    """Encodes JSON array elements and hands them out in chunks of about STREAM_BUFFER_BYTES."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.buffer = [b'[']
+        self.size = 1
+        self.separator = b''
+
+    def add(self, data):
+        """Appends one element; returns a chunk to send once the buffer is full, else None."""
+        start = time.perf_counter()
+        element = self.encoder.dumps(data)
+        add_serialization_time(time.perf_counter() - start)
+        self.buffer.append(self.separator)
+        self.buffer.append(element)
+        self.size += len(element)
+        # Match the item separator the encoder uses for a whole list.
+        self.separator = self.encoder.item_separator
+        if self.size >= STREAM_BUFFER_BYTES:
+            chunk = b''.join(self.buffer)
+            self.buffer, self.size = [], 0
+            return chunk
+        return None
+
+    def close(self):
+        self.buffer.append(b']')
+        return b''.join(self.buffer)
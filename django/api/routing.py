@@ -0,0 +1,155 @@
+"""Primary/replica database routing with read-your-writes stickiness.
+
+Writes always go to the primary (``default``). Reads go to one of the
+API_READ_REPLICAS aliases only inside views decorated with
+read_from_replica(), and only while the client is not "sticky": every
+request that writes through ReplicaRoutingMiddleware pins its browser
+session to the primary for API_REPLICA_STICKY_SECONDS with a short-lived
+cookie, so users see their own writes even when the replicas lag behind
+(a cookie, unlike the session store, costs no query to check). Everything
+else (admin, management commands, undecorated views, cached_response()
+fills) reads from the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'replica_sticky'
+
+_state = ContextVar('api_routing_state', default=None)
+
+
+class RoutingState:
+    """Per-request routing decisions: the replica chosen for reads, and whether anything was written."""
+
+    def __init__(self):
+        self.read_alias = None
+        self.wrote = False
+
+
+def get_read_replicas():
+    return list(getattr(settings, 'API_READ_REPLICAS', ()))
+
+
+def is_sticky(request):
+    return STICKY_COOKIE in request.COOKIES
+
+
+@contextmanager
+def primary_reads():
+    """Sends the reads of the block to the primary, even inside read_from_replica().
+
+    Data that outlives the request, such as cached responses, must not be
+    built from a replica: filled after the commit that invalidated it, it
+    would keep the replica's pre-write state long after the replica caught up.
+    """
+    state = _state.get()
+    read_alias = state.read_alias if state is not None else None
+    if state is not None:
+        state.read_alias = None
+    try:
+        yield
+    finally:
+        if state is not None:
+            state.read_alias = read_alias
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.read_alias and not state.wrote:
+            return state.read_alias
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Later reads of this request must see the write.
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary, so objects from any alias may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema with the data (see the sync_replicas command).
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Tracks each request's writes and makes the client sticky to the primary after one."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    def finish(self, state, response):
+        if state.wrote and get_read_replicas():
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=getattr(settings, 'API_REPLICA_STICKY_SECONDS', 30),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def read_from_replica(view):
+    """Serves the view's reads from a random read replica unless the client is sticky to the primary."""
+
+    def choose_replica(request):
+        state = _state.get()
+        replicas = get_read_replicas()
+        if state is None or not replicas or is_sticky(request):
+            return None
+        state.read_alias = random.choice(replicas)
+        return state
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = choose_replica(request)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            if state is not None:
+                state.read_alias = None
+
+    @wraps(view)
+    async def async_wrapper(request, *args, **kwargs):
+        # The state reaches the ORM's worker thread through the copied context.
+        state = choose_replica(request)
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            if state is not None:
+                state.read_alias = None
+
+    return async_wrapper if iscoroutinefunction(view) else wrapper
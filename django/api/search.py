@@ -0,0 +1,177 @@
+import functools
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape, strip_tags
+
+from .models import BlogPost, Script, TeamMember
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+REBUILD_CHUNK_SIZE = 2000
+# snippet() brackets matches with these control characters; they become <mark> tags once the text is escaped.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+
+class SearchIndex:
+    """An FTS5 virtual table mirroring the searchable columns of a model.
+
+    The table's rowid is the model's pk. ``weights`` are the per-column BM25
+    weights, in the same order as ``columns``.
+    """
+
+    def __init__(self, name, model, columns, weights, html_columns=()):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.weights = weights
+        self.html_columns = html_columns
+        self.table = f'api_search_{model._meta.model_name}'
+
+    def document(self, values):
+        """Returns the column values to index for a row of ``model`` field values."""
+        return [
+            strip_tags(value or '') if column in self.html_columns else (value or '')
+            for column, value in zip(self.columns, values)
+        ]
+
+    def legacy_filter(self, query):
+        """The LIKE-based filter used when FTS5 is unavailable."""
+        condition = Q()
+        for column in self.columns:
+            condition |= Q(**{f'{column}__icontains': query})
+        return condition
+
+
+# Keep in sync with the virtual tables created in migration 0005_search_index.
+INDEXES = {
+    'blog_posts': SearchIndex(
+        'blog_posts', BlogPost, ('title', 'description', 'content'), (10.0, 5.0, 1.0), html_columns=('content',)
+    ),
+    'scripts': SearchIndex('scripts', Script, ('title', 'description', 'key_benefits'), (10.0, 3.0, 1.0)),
+    'team_members': SearchIndex('team_members', TeamMember, ('name', 'role', 'short_description'), (10.0, 5.0, 1.0)),
+}
+INDEXES_BY_MODEL = {index.model: index for index in INDEXES.values()}
+
+
+@functools.cache
+def _sqlite_has_fts5(database):
+    """Whether the SQLite library of the ``database`` DB-API module was built with FTS5."""
+    probe = database.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text)')
+    except database.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def is_available():
+    """FTS5 tables are only created on SQLite built with FTS5; otherwise searches use the LIKE fallback.
+
+    The library is probed once per process, on a throwaway in-memory database.
+    """
+    return connection.vendor == 'sqlite' and _sqlite_has_fts5(connection.Database)
+
+
+def index_object(instance):
+    """Adds or replaces the index entry of a saved object."""
+    index = INDEXES_BY_MODEL.get(type(instance))
+    if index is None or not is_available():
+        return
+    values = index.document([getattr(instance, column) for column in index.columns])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {index.table} (rowid, {", ".join(index.columns)}) '
+            f'VALUES (%s, {", ".join(["%s"] * len(index.columns))})',
+            [instance.pk, *values],
+        )
+
+
+def remove_object(instance):
+    """Removes the index entry of a deleted object."""
+    index = INDEXES_BY_MODEL.get(type(instance))
+    if index is None or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {index.table} WHERE rowid = %s', [instance.pk])
+
+
+def index_objects(model, pks=None):
+    """(Re)indexes the given objects of ``model``, or all of them, in chunks. Returns the row count."""
+    index = INDEXES_BY_MODEL[model]
+    if not is_available():
+        return 0
+    queryset = model.objects.order_by()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    sql = (
+        f'INSERT OR REPLACE INTO {index.table} (rowid, {", ".join(index.columns)}) '
+        f'VALUES (%s, {", ".join(["%s"] * len(index.columns))})'
+    )
+    count = 0
+    batch = []
+    # One transaction: in autocommit mode every executemany() row would be committed (and synced) separately.
+    with transaction.atomic(), connection.cursor() as cursor:
+        for row in queryset.values_list('pk', *index.columns).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            batch.append([row[0], *index.document(row[1:])])
+            if len(batch) >= REBUILD_CHUNK_SIZE:
+                cursor.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
+
+
+def rebuild(model):
+    """Empties and repopulates the index of ``model``. Returns the number of indexed rows."""
+    index = INDEXES_BY_MODEL[model]
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {index.table}')
+    count = index_objects(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {index.table} ({index.table}) VALUES ('optimize')")
+    return count
+
+
+def build_match_query(query):
+    """Turns free text into an FTS5 query matching every term as a prefix.
+
+    Terms are quoted so user input can never be parsed as FTS5 syntax.
+    """
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def highlight(snippet):
+    """HTML-escapes the indexed text of a snippet and marks its matches with ``<mark>``."""
+    return escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search(index, query, limit=DEFAULT_LIMIT):
+    """Returns ``[(pk, snippet)]`` for the best BM25 matches of ``query`` in ``index``.
+
+    Snippets are safe HTML: the stored text is escaped, only the ``<mark>`` tags are markup.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+    if not is_available():
+        pks = index.model.objects.filter(index.legacy_filter(query)).values_list('pk', flat=True)[:limit]
+        return [(pk, None) for pk in pks]
+
+    weights = ', '.join(str(weight) for weight in index.weights)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({index.table}, -1, %s, %s, '…', 12) "
+            f'FROM {index.table} WHERE {index.table} MATCH %s '
+            f'ORDER BY bm25({index.table}, {weights}) LIMIT %s',
+            [MATCH_START, MATCH_END, match, limit],
+        )
+        return [(pk, highlight(snippet)) for pk, snippet in cursor.fetchall()]
@@ -0,0 +1,184 @@
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from . import images, search, snapshots
+from .cache import invalidate_model, model_invalidated
+from .models import Script, Review, Image, Category, Framework, ShowcaseServer, BlogPost, TeamMember, FeaturedServer
+
+SCRIPT_M2M_THROUGH = (Script.categories.through, Script.frameworks.through, Script.showcase_servers.through)
+IMAGE_FIELDS = {Script: 'image', Image: 'image', FeaturedServer: 'image', ShowcaseServer: 'logo', Review: 'pfp'}
+# The deletion in progress on each thread: the aggregate deltas of its reviews,
+# grouped per script, and the scripts it deletes along with them.
+_deleting = threading.local()
+
+
+def _deletion(origin):
+    """Returns the state of the deletion started from ``origin`` on this thread."""
+    state = getattr(_deleting, 'state', None)
+    if state is None or state['origin'] is not origin:
+        state = _deleting.state = {'origin': origin, 'pending': 0, 'deltas': {}, 'scripts': set()}
+    return state
+
+
+@receiver(pre_delete, sender=Script)
+def script_deleting(sender, instance, origin=None, **kwargs):
+    """Remembers the scripts being deleted, whose review aggregates need no update."""
+    _deletion(origin)['scripts'].add(instance.pk)
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, origin=None, **kwargs):
+    """Adds a review about to be deleted to the aggregate delta of its script."""
+    state = _deletion(origin)
+    state['pending'] += 1
+    state['deltas'].setdefault(instance.script_id, Counter()).update(Review.aggregate_delta(instance.rating, sign=-1))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    """Removes the deleted reviews from their scripts' aggregates, in one UPDATE per script."""
+    # The collector sends every pre_delete before deleting anything, and the
+    # post_deletes inside its transaction, so the last one sees every delta
+    # and its updates are committed or rolled back with the DELETEs.
+    state = _deletion(origin)
+    state['pending'] -= 1
+    if state['pending']:
+        return
+    del _deleting.state
+    for script_id, delta in state['deltas'].items():
+        if script_id not in state['scripts']:
+            Script.adjust_review_aggregates(script_id, delta)
+
+
+def refresh_image_payloads(names):
+    """Drops the cached payloads and bumps the ETags that embed the srcsets of the stored images ``names``."""
+    if FeaturedServer.objects.filter(image__in=names).exists():
+        invalidate_model(FeaturedServer)
+    scripts = Script.showing_images(names)
+    if scripts.exists():
+        # touch() is a queryset update, which sends no signal to mark the scripts snapshot stale.
+        invalidate_model(Script)
+        Script.touch(scripts)
+
+
+@receiver(post_save, sender=Script)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=FeaturedServer)
+@receiver(post_save, sender=ShowcaseServer)
+@receiver(post_save, sender=Review)
+def generate_image_variants(sender, instance, **kwargs):
+    """Generates the responsive variants of a newly stored image, on a worker thread by default."""
+    mode = getattr(settings, 'API_IMAGE_VARIANTS_ON_SAVE', 'background')
+    field_file = getattr(instance, IMAGE_FIELDS[sender])
+    if not mode or not field_file or field_file.name in images.get_manifest():
+        return
+    if mode == 'sync':
+        # Registered ahead of image_changed so the variants exist before the script's ETag changes.
+        images.process_file(field_file)
+    else:
+        name = field_file.name
+        transaction.on_commit(lambda: images.process_in_background(
+            field_file, on_done=lambda: refresh_image_payloads([name]),
+        ))
+
+
+@receiver(pre_save, sender=Image)
+def remember_image_script(sender, instance, **kwargs):
+    """Remembers the script an existing image belonged to, in case it is being moved."""
+    if not instance._state.adding:
+        instance._previous_script_id = (
+            Image.objects.filter(pk=instance.pk).values_list('script_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def image_changed(sender, instance, **kwargs):
+    """Bumps the version of the script(s) whose image list changed."""
+    Script.touch({instance.script_id, getattr(instance, '_previous_script_id', None)} - {None})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Framework)
+@receiver(post_save, sender=ShowcaseServer)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Framework)
+@receiver(pre_delete, sender=ShowcaseServer)
+def script_relation_changed(sender, instance, created=False, **kwargs):
+    """Bumps the version of the scripts that embed a renamed or deleted category, framework or server."""
+    if not created:
+        Script.touch(instance.scripts.values('pk'))
+
+
+@receiver(m2m_changed)
+def script_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bumps the version of the scripts whose categories, frameworks or showcase servers changed."""
+    if sender not in SCRIPT_M2M_THROUGH:
+        return
+    if not reverse:
+        if action.startswith('post_'):
+            Script.touch([instance.pk])
+    elif action == 'pre_clear':
+        # pk_set is not provided for clear(); collect the affected scripts first.
+        instance._cleared_script_ids = list(instance.scripts.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        Script.touch(instance._cleared_script_ids)
+    elif action.startswith('post_'):
+        Script.touch(pk_set)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    """Drops cached API responses built from the saved or deleted model."""
+    invalidate_model(sender)
+
+
+# Connected per model rather than to every sender: a delete receiver of the
+# auto-created M2M through models would keep Django from deleting their rows
+# in one query (their changes are reported by m2m_changed below).
+for model in apps.get_models():
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(m2m_changed)
+def invalidate_cached_responses_on_m2m(sender, instance, model, action, **kwargs):
+    """Drops cached API responses built from either side of a changed M2M relation."""
+    if action.startswith('post_'):
+        invalidate_model(type(instance))
+        invalidate_model(model)
+
+
+@receiver(model_invalidated)
+def mark_snapshots_stale(sender, **kwargs):
+    """Stops serving the catalog snapshots built from the changed model."""
+    snapshots.mark_stale(sender)
+
+
+@receiver(post_save, sender=LogEntry)
+def rebuild_snapshots_after_admin_edit(sender, instance, created, **kwargs):
+    """Rebuilds the snapshots an admin add, change or delete made stale, once it is committed."""
+    if created and getattr(settings, 'API_SNAPSHOT_REBUILD_ON_ADMIN', True):
+        transaction.on_commit(snapshots.rebuild_in_background)
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=Script)
+@receiver(post_save, sender=TeamMember)
+def update_search_index(sender, instance, **kwargs):
+    """Keeps the FTS5 search index in sync with saved objects."""
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=Script)
+@receiver(post_delete, sender=TeamMember)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drops deleted objects from the FTS5 search index."""
+    search.remove_object(instance)
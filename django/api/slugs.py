@@ -0,0 +1,160 @@
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Length
+
+# Attempts before giving up when concurrent writers keep taking the allocated slug.
+MAX_ATTEMPTS = 5
+# Rows fetched at a time when non-numeric siblings force an ordered scan.
+SCAN_CHUNK_SIZE = 100
+# Bases looked up per query by bulk_create(); two parameters each.
+BULK_LOOKUP_BATCH = 400
+
+
+def highest_suffix(queryset, base, field='slug'):
+    """Returns the largest N among taken ``base``/``base-N`` slugs (0 for ``base``), or None if none is taken.
+
+    This is a single aggregate query over the unique slug index range
+    ``base <= slug < 'base-:'`` (``':'`` sorts right after ``'9'``): among
+    the longest slugs in the range, the largest one carries the numerically
+    largest suffix. Only when that row is not ``base-N`` (e.g. a sibling
+    like ``base-2-pro``) are the candidates scanned in order instead.
+    """
+    siblings = queryset.order_by().filter(**{f'{field}__gte': base, f'{field}__lt': f'{base}-:'})
+    longest = siblings.annotate(slug_length=Length(field)).order_by('-slug_length').values('slug_length')[:1]
+    top = (
+        siblings.annotate(slug_length=Length(field))
+        .filter(slug_length=models.Subquery(longest))
+        .aggregate(top=models.Max(field))['top']
+    )
+    if top is None:
+        return None
+
+    pattern = re.compile(rf'{re.escape(base)}(-[1-9][0-9]*)?')
+    if not pattern.fullmatch(top):
+        candidates = (
+            siblings.annotate(slug_length=Length(field))
+            .order_by('-slug_length', f'-{field}')
+            .values_list(field, flat=True)
+        )
+        top = next((slug for slug in candidates.iterator(chunk_size=SCAN_CHUNK_SIZE) if pattern.fullmatch(slug)), None)
+        if top is None:
+            return None
+    return 0 if top == base else int(top[len(base) + 1:])
+
+
+def next_free_slug(queryset, base, field='slug'):
+    """Returns ``base`` if it is free, otherwise ``base-N`` with N one above the highest taken suffix."""
+    suffix = highest_suffix(queryset, base, field)
+    return base if suffix is None else f'{base}-{suffix + 1}'
+
+
+def is_slug_conflict(error, model, field='slug'):
+    """Whether the IntegrityError ``error`` is a unique violation of ``field``, the one retrying can fix."""
+    table, column = model._meta.db_table, model._meta.get_field(field).column
+    # PostgreSQL names the violated constraint: <table>_<column>_key, or <table>_<column>_<hash>_uniq.
+    constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if constraint is not None:
+        return constraint.startswith(f'{table}_{column}_')
+    message = str(error)
+    # SQLite: "UNIQUE constraint failed: <table>.<column>"; MySQL: "Duplicate entry ... for key '<table>.<column>'".
+    return bool(
+        re.search(rf'UNIQUE constraint failed: (?:.*, )?{re.escape(table)}\.{re.escape(column)}(?:,|$)', message)
+        or re.search(rf"Duplicate entry .* for key '(?:{re.escape(table)}\.)?{re.escape(column)}'", message)
+    )
+
+
+def save_with_unique_slug(instance, save, field='slug'):
+    """Allocates a free slug for ``instance`` and calls ``save()``, retrying if a concurrent writer took it.
+
+    Each attempt runs in a savepoint, so a lost race does not break the
+    caller's transaction. Violations of other constraints are raised at once.
+    """
+    base = instance.get_slug_base()
+    manager = type(instance)._default_manager
+    for attempt in range(MAX_ATTEMPTS):
+        setattr(instance, field, next_free_slug(manager.all(), base, field))
+        try:
+            with transaction.atomic(using=manager.db):
+                save()
+            return
+        except IntegrityError as e:
+            if attempt == MAX_ATTEMPTS - 1 or not is_slug_conflict(e, type(instance), field):
+                raise
+
+
+def parse_suffix(slug, bases):
+    """Returns ``(base, N)`` if ``slug`` is one of ``bases`` (N=0) or ``base-N`` for one of them, else None."""
+    if slug in bases:
+        return slug, 0
+    head, _, tail = slug.rpartition('-')
+    if head in bases and tail.isdigit() and tail.isascii() and tail[0] != '0':
+        return head, int(tail)
+    return None
+
+
+def highest_suffixes(queryset, bases, field='slug'):
+    """Returns ``{base: highest_suffix}`` for many bases, with one query per BULK_LOOKUP_BATCH bases.
+
+    Unlike highest_suffix() this reads every slug in each base's index range,
+    which is what a bulk insert needs anyway to skip taken suffixes.
+    """
+    bases = list(dict.fromkeys(bases))
+    highest = dict.fromkeys(bases)
+    for start in range(0, len(bases), BULK_LOOKUP_BATCH):
+        batch = bases[start:start + BULK_LOOKUP_BATCH]
+        condition = models.Q()
+        for base in batch:
+            condition |= models.Q(**{f'{field}__gte': base, f'{field}__lt': f'{base}-:'})
+        batch_set = set(batch)
+        for slug in queryset.order_by().filter(condition).values_list(field, flat=True):
+            parsed = parse_suffix(slug, batch_set)
+            if parsed is not None:
+                base, suffix = parsed
+                if highest[base] is None or suffix > highest[base]:
+                    highest[base] = suffix
+    return highest
+
+
+def assign_slugs(queryset, objs, field='slug'):
+    """Gives every object in ``objs`` without a slug a distinct free one."""
+    taken = {getattr(obj, field) for obj in objs if getattr(obj, field)}
+    pending = [(obj, obj.get_slug_base()) for obj in objs if not getattr(obj, field)]
+    next_suffix = {
+        base: 0 if suffix is None else suffix + 1
+        for base, suffix in highest_suffixes(queryset, [base for _, base in pending], field).items()
+    }
+    for obj, base in pending:
+        while True:
+            suffix = next_suffix[base]
+            next_suffix[base] += 1
+            slug = base if suffix == 0 else f'{base}-{suffix}'
+            if slug not in taken:
+                break
+        taken.add(slug)
+        setattr(obj, field, slug)
+
+
+class SlugQuerySet(models.QuerySet):
+    """QuerySet whose bulk_create() allocates slugs for objects that do not have one.
+
+    Like save_with_unique_slug(), it retries only when the slug itself was taken meanwhile.
+    """
+
+    slug_field = 'slug'
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        pending = [obj for obj in objs if not getattr(obj, self.slug_field)]
+        if not pending:
+            return super().bulk_create(objs, *args, **kwargs)
+        for attempt in range(MAX_ATTEMPTS):
+            assign_slugs(self.model._default_manager.db_manager(self.db).all(), objs, self.slug_field)
+            try:
+                with transaction.atomic(using=self.db):
+                    return super().bulk_create(objs, *args, **kwargs)
+            except IntegrityError as e:
+                if attempt == MAX_ATTEMPTS - 1 or not is_slug_conflict(e, self.model, self.slug_field):
+                    raise
+                for obj in pending:
+                    setattr(obj, self.slug_field, None)
@@ -0,0 +1,253 @@
+"""Precomputed, precompressed snapshots of the full catalog list payloads.
+
+build() renders an endpoint's unpaginated JSON exactly as its view does
+and writes it under API_SNAPSHOT_DIR as ``<name>-<version>.json`` with a
+``.gz`` sibling (and ``.br`` when the brotli package is installed), then
+atomically replaces ``<name>.manifest``, which points at that version.
+Views decorated with @serve_snapshot answer full-list GETs from those
+files, in the best encoding the client accepts, and run their queries
+only when the snapshot is missing, belongs to another database or is
+stale.
+
+A snapshot is stale once one of its models changes: invalidate_model()
+(every save, delete, M2M change and bulk write) increments the generation
+counter in ``<name>.stale``, and a build records the generation it read
+before querying, so a counter past the manifest's wins over it. The
+build_snapshots command rebuilds them; so does every admin edit, on a
+background thread once the transaction commits (see api.signals).
+"""
+import hashlib
+import json
+import os
+import threading
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .facets import wants_filtering
+from .pagination import wants_pagination
+from .responses import PRECOMPRESSED_ENCODINGS as ENCODINGS, ApiJsonResponse, accepted_encodings, precompress
+from .routing import PRIMARY
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# name -> (dotted path of a function returning the payload, labels of the models it is built from)
+SNAPSHOTS = {
+    'scripts': ('api.views.all_scripts_data', ('api.script', 'api.category', 'api.framework', 'api.showcaseserver', 'api.review')),
+    'blog_posts': ('api.views.all_blog_posts_data', ('api.blogpost',)),
+    'faqs': ('api.views.all_faqs_data', ('api.faq',)),
+    'featured_servers': ('api.views.all_featured_servers_data', ('api.featuredserver',)),
+}
+
+_rebuild_lock = threading.Lock()
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'API_SNAPSHOT_DIR', Path(settings.BASE_DIR) / 'snapshots'))
+
+
+def _manifest_path(name):
+    return snapshot_dir() / f'{name}.manifest'
+
+
+def _stale_path(name):
+    return snapshot_dir() / f'{name}.stale'
+
+
+def _data_path(name, version, encoding=None):
+    return snapshot_dir() / f'{name}-{version}.json{ENCODINGS.get(encoding, "")}'
+
+
+def _database():
+    # Snapshots of another database (e.g. the test database) are never served.
+    return str(connections[PRIMARY].settings_dict['NAME'])
+
+
+def _write_atomic(path, content):
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(name):
+    try:
+        return json.loads(_manifest_path(name).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def read_generation(name):
+    """Returns how many times the ``name`` snapshot was marked stale."""
+    try:
+        return int(_stale_path(name).read_bytes() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def is_stale(name, manifest):
+    # Manifests written before generations were recorded are always stale.
+    return read_generation(name) > manifest.get('generation', -1)
+
+
+def current(name):
+    """Returns the manifest of the ``name`` snapshot if it can be served, else None."""
+    manifest = read_manifest(name)
+    if manifest is None or manifest['database'] != _database() or is_stale(name, manifest):
+        return None
+    return manifest
+
+
+def build(name):
+    """Renders the ``name`` payload and swaps in its snapshot; returns the new manifest."""
+    path, labels = SNAPSHOTS[name]
+    generation = read_generation(name)
+    content = ApiJsonResponse(import_string(path)(), safe=False).content
+    version = hashlib.sha256(content).hexdigest()[:16]
+
+    snapshot_dir().mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(name)
+    encodings = {}
+    if not _data_path(name, version).exists():
+        for encoding, encoded in precompress(content).items():
+            _write_atomic(_data_path(name, version, encoding), encoded)
+        _write_atomic(_data_path(name, version), content)
+    for encoding in ENCODINGS:
+        if _data_path(name, version, encoding).exists():
+            encodings[encoding] = _data_path(name, version, encoding).stat().st_size
+
+    manifest = {
+        'version': version,
+        'generation': generation,
+        'database': _database(),
+        'models': list(labels),
+        'bytes': {'identity': len(content), **encodings},
+    }
+    _write_atomic(_manifest_path(name), json.dumps(manifest).encode())
+
+    # Keep the previous version for requests that are still reading it.
+    keep = {version, previous and previous['version']}
+    for old in snapshot_dir().glob(f'{name}-*.json*'):
+        if old.name.split('.', 1)[0][len(name) + 1:] not in keep:
+            old.unlink(missing_ok=True)
+    return manifest
+
+
+def mark_stale(model):
+    """Marks the built snapshots that depend on ``model`` as stale, again once the transaction commits."""
+    label = model._meta.label_lower
+    names = [name for name, (_, labels) in SNAPSHOTS.items() if label in labels and _manifest_path(name).exists()]
+    if not names:
+        return
+
+    def bump():
+        for name in names:
+            path = _stale_path(name)
+            with open(path.with_name(f'.{path.name}.lock'), 'w') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                _write_atomic(path, str(read_generation(name) + 1).encode())
+
+    bump()
+    # A build that read the data before the commit recorded the generation before this bump.
+    transaction.on_commit(bump)
+
+
+def rebuild_stale():
+    """Rebuilds every built snapshot that is stale; returns their names."""
+    rebuilt = []
+    for name in SNAPSHOTS:
+        manifest = read_manifest(name)
+        if manifest is not None and (manifest['database'] != _database() or is_stale(name, manifest)):
+            build(name)
+            rebuilt.append(name)
+    return rebuilt
+
+
+def rebuild_in_background():
+    """Rebuilds the stale snapshots on a thread, unless a rebuild is already running."""
+    if not _rebuild_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            # Edits made during a rebuild leave it stale: go again.
+            while rebuild_stale():
+                pass
+        finally:
+            connections.close_all()
+            _rebuild_lock.release()
+
+    threading.Thread(target=run, name='snapshot-rebuild', daemon=True).start()
+
+
+def snapshot_response(request, name, buffered=False):
+    """Returns the response serving the ``name`` snapshot, or None to fall back to the view."""
+    manifest = current(name)
+    if manifest is None:
+        return None
+    etag = f'"{name}-{manifest["version"]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        accepted = accepted_encodings(request)
+        encoding = next((encoding for encoding in ENCODINGS if encoding in manifest['bytes'] and encoding in accepted), None)
+        try:
+            file = open(_data_path(name, manifest['version'], encoding), 'rb')
+        except FileNotFoundError:
+            # Replaced by two rebuilds since the manifest was read.
+            return None
+        if buffered:
+            with file:
+                response = HttpResponse(file.read(), content_type='application/json')
+        else:
+            response = FileResponse(file, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def wants_snapshot(request):
+    """Only unpaginated, unstreamed, unfiltered GETs get the full payload the snapshot holds."""
+    return (
+        request.method in ('GET', 'HEAD') and not wants_pagination(request) and not wants_filtering(request)
+        and 'stream' not in request.GET
+    )
+
+
+def serve_snapshot(name):
+    """Answers full-list requests to the view from the ``name`` snapshot while it is fresh."""
+    if name not in SNAPSHOTS:
+        raise ValueError(f'Unknown snapshot: {name!r}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if wants_snapshot(request):
+                response = snapshot_response(request, name)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if wants_snapshot(request):
+                # Files are read off the event loop, into memory: an async
+                # response cannot stream a sync file without blocking.
+                response = await sync_to_async(snapshot_response, thread_sensitive=False)(request, name, buffered=True)
+                if response is not None:
+                    return response
+            return await view(request, *args, **kwargs)
+
+        return async_wrapper if iscoroutinefunction(view) else wrapper
+
+    return decorator
@@ -0,0 +1,124 @@
+"""Content-hashed, precompressed static files and the view serving them.
+
+CompressedManifestStaticFilesStorage is Django's ManifestStaticFilesStorage
+(collectstatic copies every file under a name containing its content hash
+and records the mapping in staticfiles.json, which {% static %} in
+templates/index.html resolves through) that also writes ``.gz`` (and, with
+the brotli package, ``.br``) siblings of the hashed text assets.
+
+serve_static serves STATIC_ROOT when Django itself serves static files.
+A hashed name never changes content, so it is sent with a one-year
+``immutable`` Cache-Control; other names must be revalidated. Either way
+the preferred precompressed sibling the client accepts is sent as is.
+"""
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core import checks
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .responses import PRECOMPRESSED_ENCODINGS, accepted_encodings, precompress
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.json', '.map', '.svg', '.html', '.txt', '.xml', '.webmanifest'}
+# A variant has to save at least this fraction of the file to be kept.
+MIN_SAVING = 0.05
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashes static files and writes precompressed siblings of the hashed text files.
+
+    Names missing from the manifest (e.g. before the first collectstatic)
+    resolve to their unhashed URL instead of failing the page with a
+    ValueError; ``manage.py check --deploy`` warns about a missing manifest.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected either, so there is no content to hash.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if os.path.splitext(hashed_name)[1] in COMPRESSIBLE_EXTENSIONS:
+                self.write_compressed(hashed_name)
+
+    def write_compressed(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        for encoding, encoded in precompress(content).items():
+            path = self.path(name + PRECOMPRESSED_ENCODINGS[encoding])
+            if len(encoded) <= len(content) * (1 - MIN_SAVING):
+                with open(path, 'wb') as f:
+                    f.write(encoded)
+            elif os.path.exists(path):
+                os.remove(path)
+
+
+@checks.register(checks.Tags.staticfiles, deploy=True)
+def check_manifest(app_configs, **kwargs):
+    """Warns when the static files manifest has not been written by collectstatic."""
+    if not isinstance(staticfiles_storage, ManifestStaticFilesStorage) or staticfiles_storage.read_manifest():
+        return []
+    return [checks.Warning(
+        'The static files manifest is missing, so {% static %} links unhashed files.',
+        hint="Run 'manage.py collectstatic'.",
+        id='api.W001',
+    )]
+
+
+def immutable_names():
+    """Returns the hashed names recorded in the static files manifest."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if not hashed_files:
+        return frozenset()
+    # Cached on the storage, which is replaced whenever the static settings change.
+    names = getattr(staticfiles_storage, 'immutable_names', None)
+    if names is None:
+        names = staticfiles_storage.immutable_names = frozenset(hashed_files.values())
+    return names
+
+
+def serve_static(request, path):
+    """Serves a file of STATIC_ROOT, precompressed when possible, with caching headers by kind of name."""
+    fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Not found.')
+    if not fullpath.is_file():
+        raise Http404('Not found.')
+
+    immutable = path in immutable_names()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(fullpath.name)[0] or 'application/octet-stream'
+        accepted = accepted_encodings(request)
+        encoding = next((
+            encoding for encoding, suffix in PRECOMPRESSED_ENCODINGS.items()
+            if encoding in accepted and os.path.exists(f'{fullpath}{suffix}')
+        ), None)
+        served = f'{fullpath}{PRECOMPRESSED_ENCODINGS[encoding]}' if encoding else fullpath
+        response = FileResponse(open(served, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
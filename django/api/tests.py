@@ -1,6 +1,45 @@
-from django.test import TestCase
-from django.urls import reverse
-from .models import Script, Image
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from unittest import addModuleCleanup, mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count, Max, Min
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from .models import Script, Image, Category, Framework, ShowcaseServer, Review, FAQ, BlogPost, TeamMember, FeaturedServer, Stats, Testimonial
+from .cache import cached_response, get_cache, get_metrics
+from .responses import ApiJsonResponse, StdlibJsonEncoder, get_json_encoder
+from . import async_views, dataset, images, ingest, outbound, performance, queryplans, ratelimit, routing, search, slugs, snapshots, views
+from PIL import Image as PILImage
+from .pagination import MAX_PAGE_SIZE
+from .staticfiles import check_manifest
+
+
+def setUpModule():
+    # Slow-request lines of api.performance would interleave with the runner's output; assertLogs still sees them.
+    for handler in logging.getLogger("api.performance").handlers:
+        if handler.name == "performance":
+            handler.setLevel(logging.CRITICAL + 1)
+            addModuleCleanup(handler.setLevel, logging.NOTSET)
 
 class ScriptBySlugViewTest(TestCase):
     def setUp(self):
@@ -20,4 +59,1570 @@ class ScriptBySlugViewTest(TestCase):
         self.assertIn("images", response.json())
         self.assertEqual(response.json()["images"], ["test_image.jpg"])
 
+class AllScriptsViewQueryCountTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Roleplay")
+        self.framework = Framework.objects.create(name="ESX")
+        self.server = ShowcaseServer.objects.create(name="Eclipse RP")
+
+    def add_scripts(self, count):
+        scripts = Script.objects.bulk_create(
+            [Script(title=f"Script {i}", price=9.99) for i in range(count)]
+        )
+        Script.categories.through.objects.bulk_create(
+            [Script.categories.through(script=s, category=self.category) for s in scripts]
+        )
+        Script.frameworks.through.objects.bulk_create(
+            [Script.frameworks.through(script=s, framework=self.framework) for s in scripts]
+        )
+        Script.showcase_servers.through.objects.bulk_create(
+            [Script.showcase_servers.through(script=s, showcaseserver=self.server) for s in scripts]
+        )
+        Review.objects.bulk_create(
+            [Review(script=s, name="Reviewer", rating=r, description="ok") for s in scripts for r in (4, 5)]
+        )
+        Script.recompute_review_aggregates([s.pk for s in scripts])
+
+    def test_query_count_is_independent_of_catalog_size(self):
+        url = reverse("all_scripts")
+        total = 0
+        for size in (10, 1000, 10000):
+            self.add_scripts(size - total)
+            total = size
+            with self.subTest(size=size):
+                # scripts + categories + frameworks + showcase servers
+                with self.assertNumQueries(4):
+                    response = self.client.get(url)
+                data = response.json()
+                self.assertEqual(len(data), size)
+                self.assertEqual(data[0]["categories"], ["Roleplay"])
+                self.assertEqual(data[0]["frameworks"], ["ESX"])
+                self.assertEqual(data[0]["showcase_servers"], ["Eclipse RP"])
+                self.assertEqual(data[0]["rating"], 4.5)
+                self.assertEqual(data[0]["reviews_count"], 2)
+
+class ReviewAggregateTest(TestCase):
+    def setUp(self):
+        self.script = Script.objects.create(title="Aggregated Script", price=5)
+        self.other = Script.objects.create(title="Other Script", price=5)
+
+    def assertAggregates(self, script, reviews_count, rating):
+        script.refresh_from_db()
+        self.assertEqual(script.get_reviews_count(), reviews_count)
+        self.assertEqual(script.get_rating(), rating)
+
+    def test_create_update_and_delete_keep_aggregates_in_sync(self):
+        first = Review.objects.create(script=self.script, name="A", rating=5, description="great")
+        Review.objects.create(script=self.script, name="B", rating=2, description="meh")
+        Review.objects.create(script=self.script, name="C", rating=None, description="no rating")
+        self.assertAggregates(self.script, 3, 3.5)
+
+        first.rating = 3
+        first.save()
+        self.assertAggregates(self.script, 3, 2.5)
+
+        first.script = self.other
+        first.save()
+        self.assertAggregates(self.script, 2, 2.0)
+        self.assertAggregates(self.other, 1, 3.0)
+
+        self.script.refresh_from_db()
+        self.assertEqual(self.script.get_rating_histogram(), {"1": 0, "2": 1, "3": 0, "4": 0, "5": 0})
+
+        Review.objects.filter(script=self.script).delete()
+        self.assertAggregates(self.script, 0, 0)
+        self.assertEqual(set(self.script.get_rating_histogram().values()), {0})
+
+    def test_deletes_update_each_script_once(self):
+        for script in (self.script, self.other):
+            for rating in (5, 4, 1):
+                Review.objects.create(script=script, name="H", rating=rating, description="x")
+        with CaptureQueriesContext(connection) as queries:
+            Review.objects.filter(rating__gte=4).delete()
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "api_script"')]
+        self.assertEqual(len(updates), 2)
+        self.assertAggregates(self.script, 1, 1.0)
+        self.assertAggregates(self.other, 1, 1.0)
+
+        # Reviews deleted along with their script leave no update of it behind.
+        with CaptureQueriesContext(connection) as queries:
+            self.other.delete()
+        self.assertFalse(any(q["sql"].startswith('UPDATE "api_script"') for q in queries))
+        self.assertAggregates(self.script, 1, 1.0)
+
+    def test_write_review_view_updates_aggregates(self):
+        response = self.client.post(
+            reverse("write_review"),
+            data={"script_id": self.script.pk, "name": "D", "rating": "4", "description": "good"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertAggregates(self.script, 1, 4.0)
+
+    def test_saving_script_does_not_overwrite_aggregates(self):
+        stale = Script.objects.get(pk=self.script.pk)
+        Review.objects.create(script=self.script, name="E", rating=5, description="nice")
+        stale.title = "Renamed"
+        stale.save()
+        self.assertAggregates(self.script, 1, 5.0)
+
+    def test_recompute_command_fixes_drift(self):
+        Review.objects.create(script=self.script, name="F", rating=4, description="ok")
+        Script.objects.filter(pk=self.script.pk).update(reviews_count=42, rating_sum=1, rating_count=7)
+        call_command("recompute_review_aggregates", stdout=StringIO())
+        self.assertAggregates(self.script, 1, 4.0)
+        self.assertAggregates(self.other, 0, 0)
+
+    def test_detail_view_serves_rating_without_aggregate_queries(self):
+        Review.objects.create(script=self.script, name="G", rating=5, description="top")
+        url = reverse("script_by_slug", args=[self.script.slug])
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+        self.assertEqual((data["rating"], data["reviews_count"]), (5.0, 1))
+        self.assertFalse(any("AVG(" in q["sql"] or "COUNT(" in q["sql"] for q in queries))
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        same_time = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+        scripts = Script.objects.bulk_create([Script(title=f"Script {i}", price=1) for i in range(25)])
+        # Ties on the sort key and NULL timestamps must neither be skipped nor repeated.
+        Script.objects.filter(pk__in=[s.pk for s in scripts[:10]]).update(created_at=same_time)
+        Script.objects.filter(pk__in=[s.pk for s in scripts[10:13]]).update(created_at=None)
+
+    def walk(self, url, **params):
+        seen, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen.extend(page["results"])
+            pages += 1
+            if not page["next"]:
+                return seen, pages
+            response = self.client.get(page["next"])
+
+    def test_pages_cover_every_row_once_in_order(self):
+        results, pages = self.walk(reverse("all_scripts"), limit=4)
+        self.assertEqual(pages, 7)
+        ids = [item["id"] for item in results]
+        self.assertEqual(sorted(ids), sorted(Script.objects.values_list("pk", flat=True)))
+        expected = [
+            script.pk for script in sorted(
+                Script.objects.all(),
+                key=lambda s: (s.created_at is None, -(s.created_at.timestamp() if s.created_at else 0), -s.pk),
+            )
+        ]
+        self.assertEqual(ids, expected)
+
+    def test_deep_pages_issue_the_same_queries_as_the_first(self):
+        url = reverse("all_scripts")
+        first = self.client.get(url, {"limit": 2}).json()
+        with CaptureQueriesContext(connection) as first_queries:
+            self.client.get(url, {"limit": 2})
+        with CaptureQueriesContext(connection) as deep_queries:
+            self.client.get(first["next"])
+        self.assertEqual(len(first_queries), len(deep_queries))
+        self.assertFalse(any("OFFSET" in q["sql"] for q in deep_queries))
+
+    def test_unpaginated_response_is_unchanged(self):
+        data = self.client.get(reverse("all_scripts")).json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 25)
+
+    def test_limit_is_capped(self):
+        Script.objects.bulk_create([Script(title="Bulk", price=1) for _ in range(MAX_PAGE_SIZE)])
+        page = self.client.get(reverse("all_scripts"), {"limit": MAX_PAGE_SIZE * 10}).json()
+        self.assertEqual(len(page["results"]), MAX_PAGE_SIZE)
+        self.assertIsNotNone(page["next"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("all_scripts"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_list_endpoints_paginate(self):
+        FAQ.objects.bulk_create([FAQ(question=f"Q{i}", answer="A") for i in range(5)])
+        BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f"Post {i}", slug=f"post-{i}", description="d", content="c", author="a", category="c",
+                published_date=datetime(2025, 5, i + 1, tzinfo=timezone.utc),
+                modified_date=datetime(2025, 5, i + 1, tzinfo=timezone.utc),
+            )
+            for i in range(5)
+        ])
+        faqs, _ = self.walk(reverse("faq_view"), limit=2)
+        self.assertEqual([faq["question"] for faq in faqs], [f"Q{i}" for i in range(5)])
+        posts, _ = self.walk(reverse("all_blog_posts_view"), limit=2)
+        self.assertEqual([post["slug"] for post in posts], [f"post-{i}" for i in reversed(range(5))])
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.faq = FAQ.objects.create(question="Q1", answer="A1")
+
+    def test_repeated_requests_are_served_from_cache(self):
+        url = reverse("faq_view")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+        self.assertEqual(get_metrics()["faq_view"], {"hits": 1, "misses": 1})
+
+    def test_query_parameters_are_part_of_the_key(self):
+        url = reverse("faq_view")
+        self.assertIsInstance(self.client.get(url).json(), list)
+        self.assertIn("results", self.client.get(url, {"limit": 1}).json())
+
+    @override_settings(ALLOWED_HOSTS=["internal.example", "public.example"])
+    def test_scheme_and_host_are_part_of_the_key(self):
+        FAQ.objects.create(question="Q2", answer="A2")
+        url = reverse("faq_view")
+        internal = self.client.get(url, {"limit": 1}, headers={"host": "internal.example"}).json()
+        self.assertTrue(internal["next"].startswith("http://internal.example/"))
+        public = self.client.get(url, {"limit": 1}, headers={"host": "public.example"}, secure=True).json()
+        self.assertTrue(public["next"].startswith("https://public.example/"))
+        self.assertEqual(get_metrics()["faq_view"], {"hits": 0, "misses": 2})
+
+    def test_save_and_delete_invalidate(self):
+        url = reverse("faq_view")
+        self.client.get(url)
+        self.faq.answer = "Changed"
+        self.faq.save()
+        self.assertEqual(self.client.get(url).json()[0]["answer"], "Changed")
+        self.faq.delete()
+        self.assertEqual(self.client.get(url).json(), [])
+
+    def test_unrelated_models_do_not_invalidate(self):
+        url = reverse("faq_view")
+        self.client.get(url)
+        Script.objects.create(title="Unrelated")
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_m2m_changes_invalidate(self):
+        @cached_response(Category)
+        def category_scripts_view(request):
+            return JsonResponse([[s.title for s in c.scripts.all()] for c in Category.objects.all()], safe=False)
+
+        request = RequestFactory().get("/")
+        category = Category.objects.create(name="Economy")
+        script = Script.objects.create(title="Bank")
+        self.assertEqual(category_scripts_view(request).content, b'[[]]')
+        script.categories.add(category)
+        self.assertEqual(category_scripts_view(request).content, b'[["Bank"]]')
+
+    def test_metrics_endpoint_is_staff_only(self):
+        url = reverse("cache_metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        staff = get_user_model().objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn("faq_view", self.client.get(url).json())
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.script = Script.objects.create(title="Versioned Script", price=10)
+        self.url = reverse("script_by_slug", args=[self.script.slug])
+
+    def etag(self):
+        return self.client.get(self.url)["ETag"]
+
+    def test_matching_etag_returns_304_with_a_single_query(self):
+        etag = self.etag()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_the_script_and_its_relations(self):
+        changes = [
+            lambda: Script.objects.get(pk=self.script.pk).save(),
+            lambda: Review.objects.create(script=self.script, name="R", rating=5, description="d"),
+            lambda: Image.objects.create(script=self.script, image="shot.jpg"),
+            lambda: self.script.categories.add(Category.objects.create(name="Jobs")),
+            lambda: Category.objects.filter(name="Jobs").first().scripts.clear(),
+            lambda: Framework.objects.create(name="QBCore").scripts.add(self.script),
+            lambda: Framework.objects.get(name="QBCore").save(),
+        ]
+        seen = {self.etag()}
+        for change in changes:
+            change()
+            etag = self.etag()
+            self.assertNotIn(etag, seen)
+            seen.add(etag)
+
+    def test_blog_post_etag(self):
+        post = BlogPost.objects.create(
+            title="Post", description="d", content="c", author="a", category="c",
+            published_date=datetime(2025, 5, 1, tzinfo=timezone.utc),
+            modified_date=datetime(2025, 5, 1, tzinfo=timezone.utc),
+        )
+        url = reverse("blog_post_view", args=[post.slug])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        post.title = "Edited"
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        post.description = "Partial"
+        post.save(update_fields=["description"])
+        self.assertEqual(post.version, 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(response.json()["title"], "Edited")
+
+class SearchViewTest(TestCase):
+    def setUp(self):
+        published = datetime(2025, 5, 1, tzinfo=timezone.utc)
+        self.post = BlogPost.objects.create(
+            title="Garage tuning guide", description="Make your cars faster", author="a", category="c",
+            content="<p>Install the <strong>garage</strong> script and tune engines.</p>",
+            published_date=published, modified_date=published,
+        )
+        BlogPost.objects.create(
+            title="Economy basics", description="Banks and jobs", author="a", category="c",
+            content="<p>A garage appears once in this text.</p>",
+            published_date=published, modified_date=published,
+        )
+        self.script = Script.objects.create(title="Garage System", description="Store vehicles", price=20)
+        TeamMember.objects.create(name="Sam", role="Developer", short_description="Builds garage scripts")
+
+    def search(self, **params):
+        response = self.client.get(reverse("search"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_results_are_ranked_and_have_snippets(self):
+        results = self.search(q="garage")
+        self.assertEqual([post["slug"] for post in results["blog_posts"]][0], self.post.slug)
+        self.assertEqual(len(results["blog_posts"]), 2)
+        self.assertIn("<mark>", results["blog_posts"][0]["snippet"])
+        self.assertNotIn("<strong>", results["blog_posts"][0]["snippet"])
+        self.assertEqual(results["scripts"][0]["slug"], self.script.slug)
+        self.assertEqual(results["team_members"][0]["name"], "Sam")
+
+    def test_prefix_matching_and_per_type_limits(self):
+        results = self.search(q="gar", limit=1, types="blog_posts")
+        self.assertEqual(list(results), ["blog_posts"])
+        self.assertEqual(len(results["blog_posts"]), 1)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.script.title = "Parking Lot"
+        self.script.description = "Park things"
+        self.script.save()
+        self.assertEqual(self.search(q="parking")["scripts"][0]["slug"], self.script.slug)
+        self.assertEqual(self.search(q="garage")["scripts"], [])
+        self.script.delete()
+        self.assertEqual(self.search(q="parking")["scripts"], [])
+
+    def test_fts_syntax_in_user_input_is_harmless(self):
+        self.assertEqual(len(self.search(q='garage"')["blog_posts"]), 2)
+        self.assertEqual(self.search(q='garage" OR NEAR(* -')["blog_posts"], [])
+        self.assertEqual(self.search(q="***"), {"blog_posts": [], "scripts": [], "team_members": []})
+
+    def test_rebuild_command_restores_bulk_created_rows(self):
+        TeamMember.objects.bulk_create([TeamMember(name="Riley", role="Support", short_description="Helps")])
+        self.assertEqual(self.search(q="riley")["team_members"], [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search(q="riley")["team_members"][0]["name"], "Riley")
+
+    def test_unknown_type_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("search"), {"q": "x", "types": "users"}).status_code, 400)
+
+    def test_snippets_escape_stored_markup(self):
+        TeamMember.objects.create(name="Eve", role="<img src=x onerror=alert(1)>", short_description="Tunes garage <b>cars</b>")
+        (member,) = [m for m in self.search(q="garage")["team_members"] if m["name"] == "Eve"]
+        self.assertEqual(member["snippet"], "Tunes <mark>garage</mark> &lt;b&gt;cars&lt;/b&gt;")
+        (member,) = self.search(q="onerror")["team_members"]
+        self.assertEqual(member["snippet"], "&lt;img src=x <mark>onerror</mark>=alert(1)&gt;")
+
+    def test_fts5_is_probed_once(self):
+        search._sqlite_has_fts5.cache_clear()
+        self.addCleanup(search._sqlite_has_fts5.cache_clear)
+        with mock.patch.object(connection.Database, "connect", wraps=connection.Database.connect) as connect:
+            self.assertTrue(search.is_available())
+            self.assertTrue(search.is_available())
+        connect.assert_called_once_with(":memory:")
+
+    def test_like_fallback_without_fts5(self):
+        with mock.patch.object(search, "_sqlite_has_fts5", return_value=False):
+            self.assertFalse(search.is_available())
+            results = self.search(q="garage")
+            TeamMember.objects.create(name="Riley", role="Support", short_description="Helps")
+        self.assertEqual(len(results["blog_posts"]), 2)
+        self.assertIsNone(results["scripts"][0]["snippet"])
+        # Not indexed while FTS5 was off.
+        self.assertEqual(self.search(q="riley")["team_members"], [])
+
+class ScriptReviewsViewTest(TestCase):
+    def setUp(self):
+        self.script = Script.objects.create(title="Reviewed Script", price=10)
+        ratings = [5, 4, 4, 3, 1, None] * 5
+        for i, rating in enumerate(ratings):
+            Review.objects.create(script=self.script, name=f"R{i}", rating=rating, description="d")
+        self.url = reverse("script_reviews", args=[self.script.slug])
+
+    def walk(self, **params):
+        results = []
+        page = self.client.get(self.url, params).json()
+        while True:
+            results.extend(page["results"])
+            if not page["next"]:
+                return results
+            page = self.client.get(page["next"]).json()
+
+    def test_summary_histogram(self):
+        summary = self.client.get(self.url).json()["summary"]
+        self.assertEqual(summary["count"], 30)
+        self.assertEqual(summary["rating"], 3.4)
+        self.assertEqual(summary["histogram"], {"1": 5, "2": 0, "3": 5, "4": 10, "5": 5})
+
+    def test_sorts_walk_every_review_once(self):
+        newest = self.walk(limit=7)
+        self.assertEqual([r["name"] for r in newest], [f"R{i}" for i in reversed(range(30))])
+        highest = [r["rating"] for r in self.walk(limit=7, sort="highest")]
+        self.assertEqual(highest, [5] * 5 + [4] * 10 + [3] * 5 + [1] * 5 + [None] * 5)
+        lowest = [r["rating"] for r in self.walk(limit=7, sort="lowest")]
+        self.assertEqual(lowest, [1] * 5 + [3] * 5 + [4] * 10 + [5] * 5 + [None] * 5)
+
+    def test_invalid_sort_and_unknown_script(self):
+        self.assertEqual(self.client.get(self.url, {"sort": "random"}).status_code, 400)
+        missing = reverse("script_reviews", args=["missing"])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_detail_embeds_only_the_first_page(self):
+        data = self.client.get(reverse("script_by_slug", args=[self.script.slug])).json()
+        self.assertEqual(len(data["reviews"]), 20)
+        self.assertEqual(data["reviews"][0]["name"], "R29")
+        self.assertEqual(data["reviews_summary"]["count"], 30)
+        rest = self.client.get(data["reviews_next"]).json()
+        self.assertEqual([r["name"] for r in rest["results"]], [f"R{i}" for i in reversed(range(10))])
+
+class StreamingListTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        category = Category.objects.create(name="Roleplay")
+        for i in range(7):
+            script = Script.objects.create(title=f"Streamed {i}", price="12.50")
+            script.categories.add(category)
+            Review.objects.create(script=script, name="R", rating=4, description="d")
+        for i in range(3):
+            BlogPost.objects.create(
+                title=f"Post {i}", description="d", content="c", author="a", category="c",
+                published_date=datetime(2025, 5, 1, 10, 0, 0, 123456, tzinfo=timezone.utc),
+                modified_date=datetime(2025, 5, 1, tzinfo=timezone.utc),
+            )
+
+    def assertStreamMatches(self, url_name):
+        url = reverse(url_name)
+        get_cache().clear()
+        buffered = self.client.get(url)
+        streamed = self.client.get(url, {"stream": "1"})
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(b"".join(streamed.streaming_content), buffered.content)
+        self.assertEqual(streamed["Content-Type"], buffered["Content-Type"])
+
+    def test_streamed_output_is_byte_identical(self):
+        for encoder in ("json", "orjson"):
+            for url_name in ("all_scripts", "all_blog_posts_view", "all_testimonials"):
+                with self.subTest(encoder=encoder, url_name=url_name), override_settings(API_JSON_ENCODER=encoder):
+                    self.assertStreamMatches(url_name)
+
+    def test_empty_list(self):
+        self.assertEqual(b"".join(self.client.get(reverse("all_testimonials"), {"stream": "1"}).streaming_content), b"[]")
+
+    def test_scripts_are_fetched_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            content = b"".join(self.client.get(reverse("all_scripts"), {"stream": "1"}).streaming_content)
+        self.assertEqual(len(json.loads(content)), 7)
+        # One chunk: the scripts query plus one query per prefetched relation.
+        self.assertEqual(len(queries), 4)
+
+    @override_settings(API_STREAM_LIST_RESPONSES=True)
+    def test_setting_streams_by_default(self):
+        self.assertTrue(self.client.get(reverse("all_scripts")).streaming)
+        self.assertFalse(self.client.get(reverse("all_scripts"), {"limit": 2}).streaming)
+
+class ApiJsonResponseTest(TestCase):
+    payload = {
+        "price": Decimal("12.50"),
+        "created_at": datetime(2025, 5, 1, 10, 0, 0, 123456, tzinfo=timezone.utc),
+        "day": date(2025, 5, 1),
+        "items": [{"name": "é", "rating": 4.5, "featured": None}],
+    }
+
+    def test_encoders_format_datetimes_and_decimals_identically(self):
+        with override_settings(API_JSON_ENCODER="json"):
+            stdlib = ApiJsonResponse(self.payload).content
+        with override_settings(API_JSON_ENCODER="orjson"):
+            fast = ApiJsonResponse(self.payload).content
+        self.assertEqual(json.loads(stdlib), json.loads(fast))
+        for value in (b'"12.50"', b'"2025-05-01T10:00:00.123Z"', b'"2025-05-01"'):
+            self.assertIn(value, stdlib)
+            self.assertIn(value, fast)
+
+    def test_stdlib_encoder_matches_json_response(self):
+        with override_settings(API_JSON_ENCODER="json"):
+            self.assertIsInstance(get_json_encoder(), StdlibJsonEncoder)
+            self.assertEqual(ApiJsonResponse(self.payload).content, JsonResponse(self.payload).content)
+
+    def test_safe_flag(self):
+        with self.assertRaises(TypeError):
+            ApiJsonResponse([1, 2])
+        self.assertEqual(json.loads(ApiJsonResponse([1, 2], safe=False).content), [1, 2])
+
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, API_IMAGE_VARIANTS_ON_SAVE="sync")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def png(self, name, width, height):
+        buffer = BytesIO()
+        PILImage.new("RGBA", (width, height), (200, 30, 30, 255)).save(buffer, format="PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def test_upload_generates_variants_exposed_as_srcset(self):
+        FeaturedServer.objects.create(name="Eclipse", url="https://example.com", image=self.png("big.png", 900, 300))
+        srcset = self.client.get(reverse("featured_servers")).json()[0]["image_srcset"]
+        self.assertEqual(set(srcset), set(images.VARIANT_FORMATS))
+        for fmt in images.VARIANT_FORMATS:
+            self.assertEqual(
+                srcset[fmt],
+                f"/media/derivatives/featured_servers/big-320w.{fmt} 320w, /media/derivatives/featured_servers/big-640w.{fmt} 640w",
+            )
+            with PILImage.open(os.path.join(self.media_root, "derivatives", "featured_servers", f"big-640w.{fmt}")) as variant:
+                self.assertEqual(variant.size, (640, 213))
+
+    def test_images_narrower_than_every_width_get_one_variant(self):
+        script = Script.objects.create(title="Tiny", image=self.png("tiny.png", 100, 50))
+        data = self.client.get(reverse("script_by_slug", args=[script.slug])).json()
+        self.assertTrue(all(value.endswith(" 100w") for value in data["image_srcset"].values()))
+        self.assertEqual(self.client.get(reverse("all_scripts")).json()[0]["image_srcset"], data["image_srcset"])
+
+    def test_command_processes_the_media_tree_in_a_process_pool(self):
+        other = Script.objects.create(title="Done", image=self.png("done.png", 700, 700))
+        with override_settings(API_IMAGE_VARIANTS_ON_SAVE=False):
+            script = Script.objects.create(title="Pool", image=self.png("pool.png", 700, 700))
+        self.assertIsNone(images.get_srcset(script.image))
+        version, other_version = script.version, other.version
+        with override_settings(API_SNAPSHOT_DIR=os.path.join(self.media_root, "snapshots")):
+            call_command("build_snapshots", "scripts", stdout=StringIO())
+            call_command("generate_image_variants", "--workers", "2", stdout=StringIO())
+            # The snapshot embeds the srcsets it was built without.
+            self.assertIsNone(snapshots.current("scripts"))
+        self.assertIn("640w", images.get_srcset(script.image)["webp"])
+        script.refresh_from_db()
+        other.refresh_from_db()
+        self.assertGreater(script.version, version)
+        # Only the scripts showing a changed image get a new ETag.
+        self.assertEqual(other.version, other_version)
+
+
+class BackgroundImageVariantTest(TransactionTestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, API_IMAGE_VARIANTS_ON_SAVE="background")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def png(self, name):
+        buffer = BytesIO()
+        PILImage.new("RGB", (700, 700), (30, 30, 200)).save(buffer, format="PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def test_variants_are_encoded_after_the_save_returns(self):
+        with mock.patch.object(images, "process_in_background") as queued:
+            script = Script.objects.create(title="Queued", image=self.png("queued.png"))
+        queued.assert_called_once()
+        self.assertIsNone(images.get_srcset(script.image))
+
+        script = Script.objects.create(title="Encoded", image=self.png("encoded.png"))
+        # The ETag clients got before the variants existed.
+        etag = f'"script-{script.pk}-{script.version}"'
+        worker = images._worker
+        if worker is not None:
+            worker.join()
+        self.assertIn("640w", images.get_srcset(script.image)["webp"])
+        response = self.client.get(reverse("script_by_slug", args=[script.slug]), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("640w", response.json()["image_srcset"]["webp"])
+
+class SlugAllocationTest(TestCase):
+    def test_suffixes_follow_highest_taken(self):
+        slugs = [Script.objects.create(title="Car Dealer").slug for _ in range(12)]
+        self.assertEqual(slugs, ["car-dealer"] + [f"car-dealer-{n}" for n in range(1, 12)])
+        # Unrelated slugs sharing the prefix are ignored.
+        Script.objects.create(title="Car Dealer Pro")
+        BlogPost.objects.create(title="", description="d", content="c", author="a",
+                                published_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                                modified_date=datetime(2024, 1, 1, tzinfo=timezone.utc), category="c")
+        self.assertEqual(Script.objects.create(title="Car Dealer").slug, "car-dealer-12")
+        self.assertTrue(BlogPost.objects.filter(slug="untitled-post").exists())
+
+    def test_allocation_is_one_query(self):
+        for _ in range(3):
+            Script.objects.create(title="Garage")
+        with CaptureQueriesContext(connection) as ctx:
+            script = Script.objects.create(title="Garage")
+        self.assertEqual(script.slug, "garage-3")
+        lookups = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and "api_script" in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+    def test_lost_race_retries_inside_savepoint(self):
+        Script.objects.create(title="Race")
+        Script.objects.create(title="Race")
+        real = slugs.highest_suffix
+        calls = []
+
+        def stale(*args, **kwargs):
+            calls.append(args)
+            # The first lookup misses a row a concurrent writer just inserted.
+            return None if len(calls) == 1 else real(*args, **kwargs)
+
+        with mock.patch("api.slugs.highest_suffix", side_effect=stale):
+            with transaction.atomic():
+                script = Script.objects.create(title="Race")
+                self.assertEqual(Script.objects.count(), 3)
+        self.assertEqual(script.slug, "race-2")
+        self.assertEqual(len(calls), 2)
+
+    def test_bulk_create_assigns_slugs(self):
+        Script.objects.create(title="Bulk")
+        created = Script.objects.bulk_create(
+            [Script(title="Bulk"), Script(title="Bulk", slug="bulk-2"), Script(title="Bulk"), Script(title="Other")]
+        )
+        self.assertEqual([s.slug for s in created], ["bulk-1", "bulk-2", "bulk-3", "other"])
+
+    def test_other_constraint_violations_are_not_retried(self):
+        Script.objects.create(title="Taken", tebex_id="42")
+        with mock.patch("api.slugs.assign_slugs", wraps=slugs.assign_slugs) as assign:
+            with self.assertRaisesMessage(IntegrityError, "tebex_id"):
+                Script.objects.bulk_create([Script(title="Dup", tebex_id="42")])
+        self.assertEqual(assign.call_count, 1)
+        with mock.patch("api.slugs.highest_suffix", wraps=slugs.highest_suffix) as lookup:
+            with self.assertRaisesMessage(IntegrityError, "tebex_id"):
+                Script.objects.create(title="Dup", tebex_id="42")
+        self.assertEqual(lookup.call_count, 1)
+
+    def test_stress_10k_same_title(self):
+        # Interleave single inserts with bulk batches: both paths must agree on the next free suffix.
+        for _ in range(100):
+            Script.objects.create(title="Same Title")
+            Script.objects.bulk_create([Script(title="Same Title") for _ in range(99)])
+        slugs_taken = list(Script.objects.values_list("slug", flat=True))
+        self.assertEqual(len(slugs_taken), 10000)
+        self.assertEqual(set(slugs_taken), {"same-title"} | {f"same-title-{n}" for n in range(1, 10000)})
+
+        with CaptureQueriesContext(connection) as ctx:
+            script = Script.objects.create(title="Same Title")
+        self.assertEqual(script.slug, "same-title-10000")
+        lookups = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and "api_script" in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+class ImportCatalogTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write_jsonl(self, rows, name="catalog.jsonl"):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w") as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+        return path
+
+    def import_catalog(self, path, *args):
+        out = StringIO()
+        call_command("import_catalog", path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_imports_scripts_with_relations(self):
+        Category.objects.create(name="Economy")
+        path = self.write_jsonl([
+            {
+                "tebex_id": "1", "title": "Bank Heist", "price": "19.99", "is_featured": True,
+                "categories": ["Economy", "Crime"], "frameworks": ["ESX"],
+                "showcase_servers": [{"name": "Eclipse RP", "url": "https://eclipse.example"}],
+                "images": ["scripts/images/a.png", {"image": "scripts/images/b.png", "alt": "Vault"}],
+                "reviews": [
+                    {"name": "Ann", "rating": 5, "created_at": "2024-01-02T03:04:05+00:00"},
+                    {"name": "Bob", "rating": 3},
+                ],
+            },
+            {"title": "Bank Heist", "categories": ["Crime"]},
+        ])
+        output = self.import_catalog(path)
+
+        self.assertIn("Imported 2 rows (2 scripts created, 0 updated, 2 images, 2 reviews)", output)
+        script = Script.objects.get(tebex_id="1")
+        self.assertEqual(script.slug, "bank-heist")
+        self.assertEqual(Script.objects.get(tebex_id=None).slug, "bank-heist-1")
+        self.assertEqual(script.price, Decimal("19.99"))
+        self.assertEqual(sorted(script.categories.values_list("name", flat=True)), ["Crime", "Economy"])
+        self.assertEqual(Category.objects.filter(name="Economy").count(), 1)
+        self.assertEqual(script.showcase_servers.get().url, "https://eclipse.example")
+        self.assertEqual(script.images.count(), 2)
+        self.assertEqual((script.reviews_count, script.get_rating()), (2, 4))
+        self.assertEqual(
+            script.reviews.get(name="Ann").created_at, datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        )
+        self.assertEqual(self.client.get(reverse("search"), {"q": "heist"}).json()["scripts"][0]["slug"], script.slug)
+
+    def test_upserts_by_tebex_id(self):
+        script = Script.objects.create(title="Old", tebex_id="7", description="Keep me")
+        script.categories.add(Category.objects.create(name="Old"))
+        Review.objects.create(script=script, name="Kept", rating=2)
+        version = Script.objects.get(pk=script.pk).version
+
+        path = self.write_jsonl([{"tebex_id": 7, "title": "New", "categories": ["Fresh"]}])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertIn("0 scripts created, 1 updated", self.import_catalog(path))
+        through = [q["sql"] for q in ctx.captured_queries if "api_script_categories" in q["sql"]]
+        # The replaced links are deleted without being loaded first.
+        self.assertEqual([sql.split()[0] for sql in through], ["DELETE", "INSERT"])
+        self.assertTrue(any('ON CONFLICT("tebex_id") DO UPDATE' in q["sql"] for q in ctx.captured_queries))
+
+        script.refresh_from_db()
+        self.assertEqual((script.title, script.description, script.slug), ("New", "Keep me", "old"))
+        self.assertEqual(list(script.categories.values_list("name", flat=True)), ["Fresh"])
+        # Relations absent from the row are left alone.
+        self.assertEqual(script.reviews_count, 1)
+        self.assertGreater(script.version, version)
+        self.assertEqual(Script.objects.count(), 1)
+
+    def test_csv(self):
+        path = os.path.join(self.tmpdir, "catalog.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["tebex_id", "title", "is_bestseller", "frameworks", "images", "reviews"])
+            writer.writerow(["9", "Garage", "yes", "ESX|QBCore", "", json.dumps([{"name": "C", "rating": 4}])])
+        self.import_catalog(path)
+
+        script = Script.objects.get(tebex_id="9")
+        self.assertTrue(script.is_bestseller)
+        self.assertEqual(script.frameworks.count(), 2)
+        self.assertEqual((script.images.count(), script.reviews_count), (0, 1))
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        def queries_for(count, prefix):
+            rows = [
+                {"tebex_id": f"{prefix}{i}", "title": f"Script {prefix}{i}", "categories": [f"Cat {i % 3}"],
+                 "images": ["scripts/images/x.png"], "reviews": [{"rating": 4}]}
+                for i in range(count)
+            ]
+            path = self.write_jsonl(rows, f"{prefix}.jsonl")
+            with CaptureQueriesContext(connection) as ctx:
+                self.import_catalog(path, "--batch-size", "500")
+            return len(ctx.captured_queries)
+
+        queries_for(3, "warm")
+        # Both fit in a single INSERT per table given SQLite's 999 parameter limit.
+        self.assertEqual(queries_for(5, "a"), queries_for(30, "b"))
+
+    def test_invalid_row(self):
+        path = os.path.join(self.tmpdir, "bad.jsonl")
+        with open(path, "w") as f:
+            f.write('{"title": "ok"}\nnot json\n')
+        with self.assertRaisesMessage(CommandError, "line 2"):
+            self.import_catalog(path, "--batch-size", "1")
+        self.assertEqual(Script.objects.count(), 1)
+
+    def test_invalid_items_and_ratings_are_reported_by_row(self):
+        for bad in (
+            {"categories": [{"label": "Jobs"}]}, {"frameworks": ["  "]}, {"showcase_servers": "Server"},
+            {"images": [{"alt": "no file"}]}, {"reviews": [{"rating": 4.7}]}, {"reviews": [{"rating": True}]},
+            {"reviews": [{"rating": "five"}]}, {"reviews": [{"created_at": 20250101}]},
+        ):
+            with self.subTest(bad=bad):
+                path = self.write_jsonl([{"title": "ok"}, {"title": "bad", **bad}])
+                with self.assertRaisesMessage(CommandError, "row 2"):
+                    self.import_catalog(path)
+                self.assertFalse(Script.objects.filter(title="bad").exists())
+
+        path = self.write_jsonl([{"title": "whole", "reviews": [{"rating": 5.0}, {"rating": "4"}, {"rating": 3}]}])
+        self.import_catalog(path)
+        self.assertEqual(list(Review.objects.order_by("pk").values_list("rating", flat=True)), [5, 4, 3])
+
+class GenerateLoadDatasetTest(TestCase):
+    def generate(self, *args):
+        out = StringIO()
+        call_command("generate_load_dataset", *args, "--batch-size", "7", stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        scripts = list(Script.objects.order_by("pk").values_list(
+            "title", "price", "description", "created_at", *Script.REVIEW_AGGREGATE_FIELDS
+        ))
+        reviews = list(Review.objects.order_by("pk").values_list("name", "rating", "description", "created_at"))
+        posts = list(BlogPost.objects.order_by("pk").values_list("title", "author", "content", "published_date"))
+        return scripts, reviews, posts
+
+    def test_generates_consistent_rows(self):
+        output = self.generate("--scripts", "20", "--reviews-per-script", "5", "--posts", "15", "--categories", "4")
+        self.assertIn("Generated", output)
+        self.assertEqual((Script.objects.count(), Review.objects.count(), BlogPost.objects.count()), (20, 100, 15))
+        self.assertEqual(Category.objects.count(), 4)
+
+        aggregates = list(Script.objects.order_by("pk").values_list(*Script.REVIEW_AGGREGATE_FIELDS))
+        Script.recompute_review_aggregates()
+        self.assertEqual(list(Script.objects.order_by("pk").values_list(*Script.REVIEW_AGGREGATE_FIELDS)), aggregates)
+        self.assertTrue(all(script.categories.exists() and script.frameworks.exists()
+                            for script in Script.objects.prefetch_related("categories", "frameworks")))
+
+        script = Script.objects.first()
+        self.assertEqual(self.client.get(reverse("script_by_slug", args=[script.slug])).status_code, 200)
+        word = script.title.split()[0]
+        self.assertTrue(self.client.get(reverse("search"), {"q": word}).json()["scripts"])
+        # Ids keep working after explicit-pk inserts.
+        self.assertGreater(Script.objects.create(title="After").pk, script.pk + 19)
+
+    def test_same_seed_same_content(self):
+        args = ("--scripts", "10", "--reviews-per-script", "3", "--posts", "5", "--seed", "42")
+        self.generate(*args)
+        first = self.snapshot()
+        Script.objects.all().delete()
+        BlogPost.objects.all().delete()
+        self.generate(*args)
+        self.assertEqual(self.snapshot(), first)
+
+        Script.objects.all().delete()
+        self.generate("--scripts", "10", "--reviews-per-script", "3", "--posts", "0", "--seed", "43")
+        self.assertNotEqual(self.snapshot()[0], first[0])
+
+    def test_timestamps_lie_before_now(self):
+        self.generate("--scripts", "5", "--reviews-per-script", "2", "--posts", "3")
+        epoch = dataset.EPOCH
+        for model, field in ((Script, "created_at"), (Script, "updated_at"), (Review, "created_at"),
+                             (BlogPost, "published_date"), (BlogPost, "updated_at")):
+            span = model.objects.aggregate(low=Min(field), high=Max(field))
+            self.assertLessEqual(span["high"], epoch)
+            self.assertGreaterEqual(span["low"], epoch - timedelta(days=dataset.TIME_SPAN_DAYS))
+
+        first = self.snapshot()
+        Script.objects.all().delete()
+        BlogPost.objects.all().delete()
+        self.generate("--scripts", "5", "--reviews-per-script", "2", "--posts", "3", "--now", "2025-01-11T00:00:00Z")
+        shifted = [row[3] - timedelta(days=10) for row in self.snapshot()[0]]
+        self.assertEqual(shifted, [row[3] for row in first[0]])
+
+        with self.assertRaises(CommandError):
+            self.generate("--now", "yesterday")
+
+    def test_rejects_negative_sizes(self):
+        with self.assertRaises(CommandError):
+            self.generate("--scripts", "-1")
+
+class EndpointBudgetTest(TestCase):
+    def test_query_budgets(self):
+        from benchmarks import endpoints
+
+        results = endpoints.run_size("small", repeat=1)
+        self.assertEqual(set(results), set(endpoints.load_budgets()))
+        self.assertEqual(endpoints.check_budgets("small", results, endpoints.load_budgets(), latency=False), [])
+
+@override_settings(API_PERFORMANCE_FLUSH_INTERVAL=0)
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        # Drop requests of earlier tests still pending in memory.
+        performance.histograms.flush()
+        get_cache().clear()
+        Script.objects.bulk_create([Script(title=f"Script {i}", price=1) for i in range(3)])
+
+    @override_settings(API_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("all_scripts"))
+            count = len(queries.captured_queries)
+        timing = dict(entry.split(";", 1) for entry in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"total", "view", "db", "serialize"})
+        self.assertIn(f'desc="{count} queries"', timing["db"])
+        with override_settings(API_SERVER_TIMING=False):
+            self.assertNotIn("Server-Timing", self.client.get(reverse("all_scripts")))
+
+    def test_server_timing_is_sent_to_staff_only_by_default(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("all_scripts")))
+        user = get_user_model().objects.create_user(username="player", password="pw")
+        self.client.force_login(user)
+        self.assertNotIn("Server-Timing", self.client.get(reverse("all_scripts")))
+        user.is_staff = True
+        user.save()
+        self.assertIn("Server-Timing", self.client.get(reverse("performance_metrics")))
+        # A view that never loads the user gets no header rather than a session and a user query.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertNotIn("Server-Timing", self.client.get(reverse("all_scripts")))
+        self.assertFalse([q for q in queries.captured_queries if "django_session" in q["sql"] or "api_customuser" in q["sql"]])
+
+    def test_structured_log_line(self):
+        with self.assertLogs("api.performance", "INFO") as logs:
+            self.client.get(reverse("all_scripts"))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["route"], line["status"], line["method"]), ("all_scripts", 200, "GET"))
+        self.assertGreater(line["queries"], 0)
+        self.assertIn("serialize_ms", line)
+
+    def test_histograms_endpoint_and_command(self):
+        for _ in range(3):
+            self.client.get(reverse("all_scripts"))
+        self.client.get(reverse("faq_view"))
+        url = reverse("performance_metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        staff = get_user_model().objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        data = self.client.get(url).json()
+        self.assertEqual(data["all_scripts"]["requests"], 3)
+        self.assertEqual(data["all_scripts"]["total"]["count"], 3)
+        self.assertEqual(sum(data["all_scripts"]["total"]["buckets"].values()), 3)
+        self.assertEqual(data["faq_view"]["requests"], 1)
+        self.assertEqual(list(self.client.get(url, {"route": "faq_view"}).json()), ["faq_view"])
+
+        out = StringIO()
+        call_command("performance_metrics", stdout=out)
+        self.assertIn("all_scripts", out.getvalue())
+
+@override_settings(API_READ_REPLICAS=["replica"])
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        get_cache().clear()
+        self.script = Script.objects.create(title="Routed", price=1)
+
+    def get_queries(self, method, *args, **kwargs):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = getattr(self.client, method)(*args, **kwargs)
+            counts = len(primary.captured_queries), len(replica.captured_queries)
+        return response, counts
+
+    def test_reads_go_to_replica_until_a_write(self):
+        response, (primary, replica) = self.get_queries("get", reverse("all_scripts"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertNotIn(routing.STICKY_COOKIE, self.client.cookies)
+
+        # Undecorated views read from the primary.
+        _, (primary, replica) = self.get_queries("get", reverse("search"), {"q": "Routed"})
+        self.assertEqual(replica, 0)
+
+        payload = {"script_id": self.script.pk, "name": "A", "rating": 5, "description": "Nice"}
+        response, (primary, replica) = self.get_queries(
+            "post", reverse("write_review"), json.dumps(payload), content_type="application/json"
+        )
+        self.assertEqual((response.status_code, replica), (201, 0))
+        self.assertIn(routing.STICKY_COOKIE, response.cookies)
+
+        # Read-your-writes: the sticky client now reads from the primary.
+        response, (primary, replica) = self.get_queries("get", reverse("script_by_slug", args=[self.script.slug]))
+        self.assertEqual(response.json()["reviews_count"], 1)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_without_replicas_everything_uses_primary(self):
+        with override_settings(API_READ_REPLICAS=[]):
+            _, (primary, replica) = self.get_queries("get", reverse("all_scripts"))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_sync_replicas(self):
+        with self.assertRaisesMessage(CommandError, "primary database itself"):
+            call_command("sync_replicas", stdout=StringIO())
+
+        path = os.path.join(tempfile.mkdtemp(), "replica.sqlite3")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        replica = connections["replica"]
+        with mock.patch.object(replica, "settings_dict", {**replica.settings_dict, "NAME": path}):
+            call_command("sync_replicas", "replica", stdout=StringIO())
+            Script.objects.create(title="Later", price=1)
+            call_command("sync_replicas", "replica", stdout=StringIO())
+            self.assertEqual(Script.objects.using("replica").count(), 2)
+            replica.close()
+
+    def test_cache_is_filled_from_the_primary_when_the_replica_lags(self):
+        faq = FAQ.objects.create(question="Q", answer="Old")
+        path = os.path.join(tempfile.mkdtemp(), "replica.sqlite3")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        replica = connections["replica"]
+        self.addCleanup(replica.close)
+        with mock.patch.object(replica, "settings_dict", {**replica.settings_dict, "NAME": path}):
+            call_command("sync_replicas", "replica", stdout=StringIO())
+            # An admin edit invalidates the cache; the replica has not caught up.
+            faq.answer = "New"
+            faq.save()
+            self.assertEqual(FAQ.objects.using("replica").get().answer, "Old")
+
+            for _ in range(2):
+                response, (primary, replica_queries) = self.get_queries("get", reverse("faq_view"), {"limit": 10})
+                self.assertEqual(response.json()["results"][0]["answer"], "New")
+                self.assertEqual(replica_queries, 0)
+            self.assertEqual(get_metrics()["faq_view"], {"hits": 1, "misses": 1})
+
+async def whoami_view(request):
+    return JsonResponse({"staff": (await request.auser()).is_staff})
+
+class AsyncUrls:
+    urlpatterns = [
+        path("api/whoami/", whoami_view, name="whoami"),
+        path("api/scripts/<slug:slug>/", async_views.script_by_slug_view, name="script_by_slug"),
+        path("api/scripts/", async_views.all_scripts_view, name="all_scripts"),
+    ]
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        category = Category.objects.create(name="Jobs")
+        self.category_id = category.pk
+        for i in range(3):
+            script = Script.objects.create(title=f"Async Script {i}", price=5)
+            script.categories.add(category)
+            Image.objects.create(script=script, image=f"shot{i}.jpg")
+            for rating in (3, 5):
+                Review.objects.create(script=script, name="R", rating=rating, description="d")
+        self.script = Script.objects.first()
+        post = BlogPost.objects.create(
+            title="Async Post", content="c", author="A", category="News",
+            published_date=datetime(2025, 1, 1, tzinfo=timezone.utc), modified_date=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        )
+        self.post_slug = post.slug
+        Stats.objects.create(active_users=3, premium_scripts=4)
+        FAQ.objects.create(question="Q?", answer="A.")
+        TeamMember.objects.create(name="T", role="Dev", short_description="d")
+        Testimonial.objects.create(name="N", comment="c")
+        FeaturedServer.objects.create(name="S", url="https://example.com")
+
+    async def test_same_responses_as_sync_views(self):
+        cases = [
+            ("stats_view", "/api/stats/", {}, ()),
+            ("featured_servers_view", "/api/featured-servers/", {}, ()),
+            ("script_reviews_view", "/api/reviews/", {"limit": 1}, (self.script.slug,)),
+            ("script_reviews_view", "/api/reviews/", {"sort": "bogus"}, (self.script.slug,)),
+            ("script_by_slug_view", "/api/script/", {}, (self.script.slug,)),
+            ("script_by_slug_view", "/api/script/", {}, ("missing",)),
+            ("all_scripts_view", "/api/scripts/", {}, ()),
+            ("all_scripts_view", "/api/scripts/", {"limit": 2}, ()),
+            ("all_scripts_view", "/api/scripts/", {"categories": str(self.category_id), "sort": "price_low", "limit": 2}, ()),
+            ("all_scripts_view", "/api/scripts/", {"sort": "bogus"}, ()),
+            ("all_testimonials_view", "/api/testimonials/", {}, ()),
+            ("faq_view", "/api/faqs/", {}, ()),
+            ("blog_post_view", "/api/post/", {}, (self.post_slug,)),
+            ("blog_post_view", "/api/post/", {}, ("missing",)),
+            ("all_blog_posts_view", "/api/posts/", {"limit": 5}, ()),
+            ("team_members_view", "/api/team/", {}, ()),
+        ]
+        for name, url, params, args in cases:
+            with self.subTest(name, params=params, args=args):
+                sync_view = sync_to_async(getattr(views, name))
+                expected = await sync_view(RequestFactory().get(url, params), *args)
+                response = await getattr(async_views, name)(AsyncRequestFactory().get(url, params), *args)
+                self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    async def test_streaming_and_conditional_get(self):
+        request = AsyncRequestFactory().get("/api/scripts/", {"stream": "1"})
+        response = await async_views.all_scripts_view(request)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        expected = await sync_to_async(views.all_scripts_view)(RequestFactory().get("/api/scripts/"))
+        self.assertEqual(json.loads(content), json.loads(expected.content))
+
+        request = AsyncRequestFactory().get("/", headers={"if-none-match": '"nope"'})
+        etag = (await async_views.script_by_slug_view(request, self.script.slug))["ETag"]
+        request = AsyncRequestFactory().get("/", headers={"if-none-match": etag})
+        self.assertEqual((await async_views.script_by_slug_view(request, self.script.slug)).status_code, 304)
+
+    @override_settings(ROOT_URLCONF=AsyncUrls, API_SERVER_TIMING=True)
+    async def test_async_middleware_chain_measures_queries(self):
+        response = await self.async_client.get(reverse("all_scripts"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        timing = dict(entry.split(";", 1) for entry in response["Server-Timing"].split(", "))
+        self.assertIn('desc="4 queries"', timing["db"])
+
+    @override_settings(ROOT_URLCONF=AsyncUrls)
+    async def test_async_server_timing_is_sent_to_staff_only(self):
+        self.assertNotIn("Server-Timing", await self.async_client.get(reverse("all_scripts")))
+        user = await get_user_model().objects.acreate(username="staff", is_staff=True)
+        await self.async_client.aforce_login(user)
+        self.assertIn("Server-Timing", await self.async_client.get(reverse("whoami")))
+        self.assertNotIn("Server-Timing", await self.async_client.get(reverse("all_scripts")))
+
+class ReviewSpoolTest(TestCase):
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool)
+        override = override_settings(API_REVIEW_INGESTION="spool", API_REVIEW_SPOOL_DIR=self.spool)
+        override.enable()
+        self.addCleanup(override.disable)
+        ratelimit.get_backend().clear()
+        self.addCleanup(ratelimit.get_backend().clear)
+        self.script = Script.objects.create(title="Spooled Script", price=5)
+
+    def submit(self, **fields):
+        payload = {"script_id": self.script.pk, "name": "A", "rating": 4, "description": "good", **fields}
+        return self.client.post(reverse("write_review"), json.dumps(payload), content_type="application/json")
+
+    def test_submissions_are_accepted_then_published_in_one_batch(self):
+        responses = [self.submit(rating=rating) for rating in (5, 4, 3)]
+        self.assertEqual({response.status_code for response in responses}, {202})
+        self.assertFalse(Review.objects.exists())
+        status_url = responses[0]["Location"]
+        self.assertEqual(self.client.get(status_url).json()["status"], ingest.QUEUED)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("flush_review_spool", stdout=StringIO())
+        self.assertEqual(sum(q["sql"].startswith('INSERT INTO "api_review"') for q in queries), 1)
+        self.assertEqual(sum(q["sql"].startswith('UPDATE "api_script"') for q in queries), 1)
+
+        self.script.refresh_from_db()
+        self.assertEqual((self.script.get_reviews_count(), self.script.get_rating()), (3, 4.0))
+        data = self.client.get(status_url).json()
+        self.assertEqual(data["status"], ingest.PUBLISHED)
+        self.assertEqual(Review.objects.get(pk=data["review_id"]).rating, 5)
+        self.assertEqual(os.listdir(os.path.join(self.spool, ingest.INCOMING)), [])
+
+    def test_invalid_submissions_are_rejected_up_front(self):
+        self.assertEqual(self.submit(rating=9).status_code, 400)
+        self.assertEqual(self.submit(name="").status_code, 400)
+        for malformed in ({"rating": 4.9}, {"rating": True}, {"script_id": True}, {"script_id": float(self.script.pk)}):
+            with self.subTest(malformed=malformed):
+                self.assertEqual(self.submit(**malformed).status_code, 400)
+        self.assertEqual(self.submit(rating="4").status_code, 202)
+        self.assertEqual(self.submit(script_id=self.script.pk + 100).status_code, 404)
+        self.assertEqual(self.client.get(reverse("review_status", args=[uuid.uuid4()])).status_code, 404)
+
+    def test_submission_for_deleted_script_is_reported(self):
+        status_url = self.submit()["Location"]
+        self.script.delete()
+        call_command("flush_review_spool", stdout=StringIO())
+        self.assertEqual(self.client.get(status_url).json(), {
+            "token": status_url.rstrip("/").rsplit("/", 1)[1], "status": ingest.REJECTED, "error": "Script not found.",
+        })
+
+    def test_retried_batch_is_not_published_twice(self):
+        self.submit()
+        (path,) = ingest.claim(10)
+        shutil.copy(path, self.spool)
+        ingest.publish([path])
+        # A worker died before removing its claimed file.
+        os.replace(os.path.join(self.spool, path.name), path)
+        os.utime(path, (0, 0))
+        call_command("flush_review_spool", stdout=StringIO())
+        self.assertEqual(Review.objects.count(), 1)
+        self.script.refresh_from_db()
+        self.assertEqual(self.script.get_reviews_count(), 1)
+
+
+@override_settings(API_HTTP_RETRY_BACKOFF=0)
+class FiveMOAuthTest(TestCase):
+    def setUp(self):
+        outbound.close_session()
+        self.addCleanup(outbound.close_session)
+
+    def stub(self, **kwargs):
+        from benchmarks.oauth import StubOAuthServer
+
+        stub = StubOAuthServer(**kwargs).__enter__()
+        self.addCleanup(stub.__exit__, None, None, None)
+        override = override_settings(FIVEM_OAUTH_BASE_URL=stub.url)
+        override.enable()
+        self.addCleanup(override.disable)
+        return stub
+
+    def login(self):
+        return self.client.get(reverse("fivem_callback"), {"code": "abc"})
+
+    def test_logins_reuse_one_pooled_connection(self):
+        stub = self.stub()
+        for _ in range(2):
+            response = self.login()
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["fivem_id"], "stub-user")
+        self.assertEqual(get_user_model().objects.filter(fivem_id="stub-user").count(), 1)
+        self.assertEqual((stub.requests, stub.connections), (4, 1))
+
+    def test_only_idempotent_calls_are_retried(self):
+        stub = self.stub(failures={"/userinfo": 1})
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(stub.requests, 3)
+
+        stub.failures = {"/token": 1}
+        response = self.login()
+        self.assertEqual((response.status_code, response.json()["error"]), (400, "Token exchange failed"))
+        self.assertEqual(stub.requests, 4)
+
+    @override_settings(API_HTTP_READ_TIMEOUT=0.2)
+    def test_slow_provider_is_cut_off(self):
+        self.stub(delay=1)
+        response = self.login()
+        self.assertEqual(response.status_code, 502)
+        self.assertIn("ReadTimeout", response.json()["error"])
+
+    async def test_async_callback(self):
+        stub = await sync_to_async(self.stub)()
+        request = AsyncRequestFactory().get(reverse("fivem_callback"), {"code": "abc"})
+        response = await async_views.FiveMCallback.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["username"], "stub-user")
+        self.assertEqual(stub.connections, 1)
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        ratelimit.get_backend().clear()
+        get_cache().clear()
+        # Later tests post from the same address.
+        self.addCleanup(ratelimit.get_backend().clear)
+        self.script = Script.objects.create(title="Limited Script", price=5)
+
+    def post_review(self, **extra):
+        payload = {"script_id": self.script.pk, "name": "A", "rating": 4, "description": "good"}
+        return self.client.post(reverse("write_review"), json.dumps(payload), content_type="application/json", **extra)
+
+    @override_settings(API_RATE_LIMITS={"write_review_view": {"rate": "2/m"}})
+    def test_requests_over_the_burst_get_429_without_queries(self):
+        self.assertEqual([self.post_review().status_code for _ in range(2)], [201, 201])
+        with self.assertNumQueries(0):
+            response = self.post_review()
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "30"))
+        self.assertEqual(Review.objects.count(), 2)
+        # Other clients and other views have their own buckets.
+        self.assertEqual(self.post_review(REMOTE_ADDR="10.0.0.2").status_code, 201)
+        self.assertEqual(self.client.get(reverse("search"), {"q": "x"}).status_code, 200)
+
+    @override_settings(API_RATE_LIMIT_BACKEND="cache", API_RATE_LIMITS={"search_view": {"rate": "1/h", "key": "user"}})
+    def test_cache_backend_is_shared_and_keys_by_session(self):
+        search = reverse("search")
+        self.assertEqual(self.client.get(search).status_code, 200)
+        ratelimit.BACKENDS["memory"].clear()
+        self.assertEqual(self.client.get(search).status_code, 429)
+        self.client.cookies["sessionid"] = "one"
+        self.assertEqual(self.client.get(search).status_code, 200)
+        self.assertEqual(self.client.get(search).status_code, 429)
+
+    @override_settings(API_RATE_LIMITS={"write_review_view": None})
+    def test_limit_can_be_disabled_per_view(self):
+        self.assertEqual({self.post_review().status_code for _ in range(12)}, {201})
+
+    def test_bucket_refills_at_the_rate(self):
+        bucket, wait = ratelimit.take(None, 1, 60, 2, now=0)
+        bucket, wait = ratelimit.take(bucket, 1, 60, 2, now=0)
+        self.assertEqual((bucket, wait), ((0, 0), 0))
+        self.assertEqual(ratelimit.take(bucket, 1, 60, 2, now=15)[1], 45)
+        self.assertEqual(ratelimit.take(bucket, 1, 60, 2, now=60)[1], 0)
+        self.assertEqual(ratelimit.parse_rate("10/30s"), (10, 30))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate("10/week")
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(API_SNAPSHOT_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.faq = FAQ.objects.create(question="Refunds?", answer="Within 14 days.")
+        self.url = reverse("faq_view")
+
+    def build(self, *args):
+        call_command("build_snapshots", *args, stdout=StringIO())
+
+    def test_snapshot_is_served_from_disk_in_the_accepted_encoding(self):
+        live = self.client.get(self.url).content
+        self.build("faqs")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers={"accept-encoding": "gzip, deflate;q=0.5"})
+            content = b"".join(response.streaming_content)
+        self.assertEqual((response["Content-Encoding"], response["Vary"]), ("gzip", "Accept-Encoding"))
+        self.assertEqual(gzip.decompress(content), live)
+
+        identity = self.client.get(self.url, headers={"accept-encoding": "gzip;q=0"})
+        self.assertFalse(identity.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(identity.streaming_content), live)
+        self.assertEqual(self.client.get(self.url, headers={"if-none-match": identity["ETag"]}).status_code, 304)
+
+        response = async_to_sync(async_views.faq_view)(AsyncRequestFactory().get(self.url))
+        self.assertEqual((response.content, response["ETag"]), (live, identity["ETag"]))
+
+    def test_stale_snapshot_falls_back_to_live_queries_until_rebuilt(self):
+        self.build()
+        FAQ.objects.create(question="Support?", answer="On Discord.")
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(self.client.get(self.url, {"limit": 1}).json()["results"][0]["question"], "Refunds?")
+
+        self.build("--stale")
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 2)
+        # The previous version is kept for requests still reading it.
+        versions = [name for name in os.listdir(self.directory) if name.startswith("faqs-") and name.endswith(".json")]
+        self.assertEqual(len(versions), 2)
+
+    def test_staleness_does_not_depend_on_clocks(self):
+        def render_during_an_edit():
+            # The edit lands within the same clock tick as the build's start.
+            FAQ.objects.create(question="Support?", answer="On Discord.")
+            return all_faqs_data()
+
+        all_faqs_data = views.all_faqs_data
+        self.build("faqs")
+        with mock.patch.object(views, "all_faqs_data", render_during_an_edit):
+            self.build("faqs")
+        stale = os.path.join(self.directory, "faqs.stale")
+        os.utime(stale, (0, 0))
+        self.assertIsNone(snapshots.current("faqs"))
+        self.build("--stale")
+        self.assertIsNotNone(snapshots.current("faqs"))
+
+    def test_admin_edit_schedules_a_rebuild(self):
+        self.build("faqs")
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        change_url = reverse("admin:api_faq_change", args=[self.faq.pk])
+        with mock.patch.object(snapshots, "rebuild_in_background") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(change_url, {"question": "Refunds?", "answer": "Within 30 days."})
+        self.assertEqual(response.status_code, 302)
+        rebuild.assert_called_once_with()
+        self.assertIsNone(snapshots.current("faqs"))
+        self.assertEqual(snapshots.rebuild_stale(), ["faqs"])
+        self.assertIn(b"30 days", b"".join(self.client.get(self.url).streaming_content))
+
+
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root)
+        override = override_settings(STATIC_ROOT=cls.root)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        # Only the SPA assets of STATICFILES_DIRS; the admin and editor apps bring thousands of files.
+        call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin", "ckeditor"])
+
+    def test_collectstatic_writes_hashed_precompressed_assets(self):
+        with open(os.path.join(self.root, "staticfiles.json")) as f:
+            paths = json.load(f)["paths"]
+        hashed_js = paths["index.js"]
+        self.assertRegex(hashed_js, r"^index\.[0-9a-f]{12}\.js$")
+        with open(os.path.join(self.root, hashed_js), "rb") as f, gzip.open(os.path.join(self.root, hashed_js + ".gz")) as gz:
+            self.assertEqual(gz.read(), f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, paths["money.png"] + ".gz")))
+
+    def test_spa_shell_links_hashed_assets_served_immutable(self):
+        html = self.client.get("/scripts/some-script").content.decode()
+        (js_url,) = re.findall(r'src="(/static/index\.[0-9a-f]{12}\.js)"', html)
+        self.assertRegex(html, r'href="/static/index\.[0-9a-f]{12}\.css"')
+
+        response = self.client.get(js_url, headers={"accept-encoding": "gzip, br;q=0"})
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual((response["Content-Encoding"], response["Vary"]), ("gzip", "Accept-Encoding"))
+        self.assertEqual(response["Content-Type"], "text/javascript")
+        with open(os.path.join(settings.BASE_DIR, "static", "index.js"), "rb") as f:
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), f.read())
+
+        plain = self.client.get("/static/index.js")
+        self.assertEqual(plain["Cache-Control"], "no-cache")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        b"".join(plain.streaming_content)
+        revalidated = self.client.get("/static/index.js", headers={"if-modified-since": plain["Last-Modified"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_pages_render_before_collectstatic(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root):
+            response = self.client.get("/scripts/some-script")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('src="/static/index.js"', response.content.decode())
+            self.assertEqual([warning.id for warning in check_manifest(None)], ["api.W001"])
+        self.assertEqual(check_manifest(None), [])
+        self.assertEqual(self.client.get("/static/../zrg/settings.py").status_code, 400)
+
+
+class MediaServingTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        override = override_settings(MEDIA_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.content = bytes(range(256)) * 400
+        os.makedirs(os.path.join(self.root, "scripts"))
+        with open(os.path.join(self.root, "scripts", "banner.png"), "wb") as f:
+            f.write(self.content)
+        self.url = "/media/scripts/banner.png"
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_file_and_conditional_get(self):
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, self.content))
+        self.assertEqual((response["Content-Type"], response["Accept-Ranges"]), ("image/png", "bytes"))
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        revalidated, body = self.get(if_none_match=response["ETag"])
+        self.assertEqual((revalidated.status_code, body), (304, b""))
+        self.assertEqual(self.get(if_modified_since=response["Last-Modified"])[0].status_code, 304)
+        self.assertEqual(self.get(if_none_match='"other"')[0].status_code, 200)
+
+    def test_byte_ranges(self):
+        response, body = self.get(range="bytes=100-1099")
+        self.assertEqual((response.status_code, body), (206, self.content[100:1100]))
+        self.assertEqual(response["Content-Range"], f"bytes 100-1099/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "1000")
+        response, body = self.get(range="bytes=100000-")
+        self.assertEqual((response.status_code, body), (206, self.content[100000:]))
+        self.assertEqual(response["Content-Length"], str(len(self.content) - 100000))
+        response, body = self.get(range="bytes=-10")
+        self.assertEqual((response.status_code, body), (206, self.content[-10:]))
+
+        response, _ = self.get(range=f"bytes={len(self.content)}-")
+        self.assertEqual((response.status_code, response["Content-Range"]), (416, f"bytes */{len(self.content)}"))
+        # Multiple ranges and outdated If-Range validators get the whole file.
+        self.assertEqual(self.get(range="bytes=0-1,5-6")[1], self.content)
+        self.assertEqual(self.get(range="bytes=0-1", if_range='"outdated"')[0].status_code, 200)
+        etag = self.get()[0]["ETag"]
+        self.assertEqual(self.get(range="bytes=0-1", if_range=etag)[1], self.content[:2])
+
+    def test_proxy_offload(self):
+        with override_settings(API_MEDIA_ACCEL="x-accel-redirect", API_MEDIA_ACCEL_PREFIX="/protected-media/"):
+            response, body = self.get()
+        self.assertEqual((response["X-Accel-Redirect"], body), ("/protected-media/scripts/banner.png", b""))
+        self.assertEqual(response["Content-Type"], "image/png")
+        with override_settings(API_MEDIA_ACCEL="x-sendfile"):
+            response, body = self.get()
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.root, "scripts", "banner.png"))
+        with override_settings(API_MEDIA_ACCEL="x-sendfile"):
+            self.assertEqual(self.get(if_none_match=response["ETag"])[0].status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get("/media/scripts/missing.png").status_code, 404)
+        self.assertEqual(self.client.get("/media/scripts").status_code, 404)
+        self.assertEqual(self.client.get("/media/../zrg/settings.py").status_code, 400)
+
+
+class FacetedScriptsTest(TestCase):
+    def setUp(self):
+        self.jobs, self.economy, self.police = (Category.objects.create(name=name) for name in ("Jobs", "Economy", "Police"))
+        self.esx, self.qb = (Framework.objects.create(name=name) for name in ("ESX", "QBCore"))
+        self.s1 = Script.objects.create(title="Trucking", price=10, is_featured=True)
+        self.s1.categories.add(self.jobs, self.economy)
+        self.s1.frameworks.add(self.esx)
+        self.s2 = Script.objects.create(title="Mechanic", price=25, is_bestseller=True)
+        self.s2.categories.add(self.jobs)
+        self.s2.frameworks.add(self.qb)
+        self.s3 = Script.objects.create(title="Dispatch", price=5, is_featured=None)
+        self.s3.categories.add(self.police)
+        self.s3.frameworks.add(self.esx, self.qb)
+        self.s4 = Script.objects.create(title="Banking", price=None, is_featured=True)
+        self.s4.categories.add(self.economy)
+
+    def get(self, **params):
+        return self.client.get(reverse("all_scripts"), params)
+
+    def titles(self, response):
+        return [script["title"] for script in response.json()["results"]]
+
+    def test_filters_and_disjunctive_facet_counts(self):
+        data = self.get(categories=f"{self.jobs.pk},{self.economy.pk}", sort="title").json()
+        self.assertEqual([script["title"] for script in data["results"]], ["Banking", "Mechanic", "Trucking"])
+        self.assertEqual(data["count"], 3)
+        # Category counts ignore the category selection; the other facets apply it.
+        self.assertEqual(data["facets"]["categories"], [
+            {"id": self.economy.pk, "name": "Economy", "count": 2},
+            {"id": self.jobs.pk, "name": "Jobs", "count": 2},
+            {"id": self.police.pk, "name": "Police", "count": 1},
+        ])
+        self.assertEqual(data["facets"]["frameworks"], [
+            {"id": self.esx.pk, "name": "ESX", "count": 1},
+            {"id": self.qb.pk, "name": "QBCore", "count": 1},
+        ])
+
+        self.assertEqual(self.titles(self.get(is_featured="true", sort="price_low")), ["Trucking", "Banking"])
+        self.assertEqual(self.titles(self.get(is_featured="false")), ["Dispatch", "Mechanic"])
+        self.assertEqual(self.titles(self.get(max_price="10", sort="price_high")), ["Trucking", "Dispatch"])
+        self.assertEqual(self.titles(self.get(min_price="6", frameworks=str(self.qb.pk))), ["Mechanic"])
+        self.assertEqual(self.titles(self.get(is_bestseller="1", frameworks=str(self.esx.pk))), [])
+
+    def test_pages_and_bounded_queries(self):
+        first = self.get(sort="price_low", limit=2).json()
+        self.assertEqual([script["title"] for script in first["results"]], ["Dispatch", "Trucking"])
+        self.assertEqual(first["count"], 4)
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([script["title"] for script in second["results"]], ["Mechanic", "Banking"])
+        self.assertIsNone(second["next"])
+
+        params = {"categories": str(self.jobs.pk), "sort": "popular"}
+        with CaptureQueriesContext(connection) as before:
+            self.get(**params)
+        for i in range(20):
+            script = Script.objects.create(title=f"Extra {i}", price=i)
+            script.categories.add(self.jobs, Category.objects.create(name=f"Category {i}"))
+            script.frameworks.add(Framework.objects.create(name=f"Framework {i}"))
+        with CaptureQueriesContext(connection) as after:
+            data = self.get(**params).json()
+        self.assertEqual(len(data["facets"]["categories"]), 23)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+
+    def test_invalid_parameters_and_snapshot_bypass(self):
+        for params in ({"sort": "cheapest"}, {"categories": "jobs"}, {"min_price": "cheap"}, {"max_price": "NaN"}, {"is_featured": "maybe"},
+                       {"categories": "99999999999999999999999"}, {"frameworks": "1,-2"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+        self.assertEqual(self.get(categories=str(2 ** 63 - 1)).json()["count"], 0)
+        self.assertIsInstance(self.get().json(), list)
+        self.assertFalse(snapshots.wants_snapshot(RequestFactory().get("/api/scripts/", {"sort": "newest"})))
+
+
+class QueryPlanAuditTest(TestCase):
+    def inspect(self, queryset):
+        with queryplans.capture_statements() as statements:
+            list(queryset)
+        (alias, sql, params), = statements
+        return queryplans.inspect(alias, sql, params)[1]
+
+    def test_flags_scans_and_sorts_with_proposed_indexes(self):
+        findings = self.inspect(TeamMember.objects.filter(role="Developer").order_by("name")[:5])
+        self.assertEqual(
+            [(finding["kind"], finding["table"], finding["index"]) for finding in findings],
+            [("full_scan", "api_teammember", ["role", "name"]), ("temp_btree", "api_teammember", ["role", "name"])],
+        )
+        self.assertEqual(
+            queryplans.index_ddl("api_teammember", ["role", "name"]),
+            'CREATE INDEX "api_teammember_role_name" ON "api_teammember" ("role", "name")',
+        )
+
+    def test_indexed_and_unindexable_queries(self):
+        self.assertEqual(self.inspect(Review.objects.filter(script_id=1).order_by("-created_at", "-pk")[:5]), [])
+        self.assertEqual(self.inspect(Script.objects.filter(is_featured=True).order_by("-created_at", "-pk")[:5]), [])
+        # Grouped by select position; the planner drives from the selected ids instead of the index.
+        (finding,) = self.inspect(
+            Script.frameworks.through.objects.filter(script_id__in=[1, 2]).values_list("framework_id").annotate(n=Count("pk")).order_by()
+        )
+        self.assertEqual((finding["kind"], finding["index"]), ("temp_btree", None))
+        self.assertIn("script_id_framework_id", finding["existing_index"])
+
+    def test_api_endpoints_have_the_indexes_they_need(self):
+        from .management.commands.audit_query_plans import Command
+
+        report = Command().audit("small", None)
+        self.assertIn("fivem_callback?code=audit-code", {name for statement in report for name in statement["requests"]})
+        self.assertEqual([(s["requests"], f) for s in report for f in s["findings"] if f["index"]], [])
+
+
 # Create your tests here.
@@ -1,16 +1,23 @@
-from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from .models import Stats, FeaturedServer, Script, Review, Testimonial, FAQ, BlogPost, TeamMember
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
+from django.views.decorators.http import condition
 import json
-import requests
 from django.conf import settings
 from django.contrib.auth import login, get_user_model
 from django.urls import reverse
 from django.views import View
 from django.contrib.auth.forms import UserCreationForm
-
+from .pagination import DEFAULT_PAGE_SIZE, InvalidCursor, fetch_page, next_page_url, paginate, paginated_response, wants_pagination
+from .cache import cached_response, get_metrics
+from .auth import can_view_metrics
+from . import facets, fivem, images, ingest, performance, search
+from .responses import ApiJsonResponse, StreamingJsonResponse, wants_streaming
+from .ratelimit import ratelimit
+from .routing import read_from_replica
+from .snapshots import serve_snapshot
+
+@cached_response(Stats)
 def stats_view(request):
     """Returns the stats data as a JSON response."""
     try:
@@ -28,99 +35,215 @@ def stats_view(request):
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data)
+    return ApiJsonResponse(data)
+
+def featured_server_data(server):
+    """Returns the JSON representation of a featured server."""
+    return {
+        "name": server.name,
+        "image": server.image.url if server.image else None,
+        "image_srcset": images.get_srcset(server.image),
+        "url": server.url,
+    }
+
+def all_featured_servers_data():
+    """Returns the payload of featured_servers_view, also written to its snapshot."""
+    return [featured_server_data(server) for server in FeaturedServer.objects.all()]
 
+@serve_snapshot('featured_servers')
+@cached_response(FeaturedServer)
 def featured_servers_view(request):
     """Returns the featured servers data as a JSON response."""
     try:
-        servers = FeaturedServer.objects.all()  # Get all FeaturedServer objects
-        data = [
-            {
-                "name": server.name,
-                "image": server.image.url if server.image else None,
-                "url": server.url,
-            }
-            for server in servers
-        ]
+        data = all_featured_servers_data()
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
+
+REVIEW_SORTS = {
+    'newest': '-created_at',
+    'highest': '-rating',
+    'lowest': 'rating',
+}
+
+def review_data(review):
+    """Returns the JSON representation of a review."""
+    return {
+        "name": review.name,
+        "pfp": review.pfp.url if review.pfp else None,
+        "pfp_srcset": images.get_srcset(review.pfp),
+        "rating": review.rating,
+        "description": review.description,
+        "created_at": review.created_at,
+    }
+
+def reviews_summary(script):
+    """Returns the review count, average rating and per-star histogram of a script."""
+    return {
+        "count": script.get_reviews_count(),
+        "rating": script.get_rating(),
+        "histogram": script.get_rating_histogram(),
+    }
 
+@read_from_replica
+def script_reviews_view(request, slug):
+    """Returns a cursor-paginated page of a script's reviews with a rating summary."""
+    sort = request.GET.get('sort', 'newest')
+    if sort not in REVIEW_SORTS:
+        return ApiJsonResponse({"error": f"Invalid sort. Use one of: {', '.join(REVIEW_SORTS)}."}, status=400)
+    script = Script.objects.filter(slug=slug).only('pk', *Script.REVIEW_AGGREGATE_FIELDS).first()
+    if not script:
+        return ApiJsonResponse({"error": "Script not found."}, status=404)
+    try:
+        reviews, next_cursor = paginate(request, script.get_reviews(), REVIEW_SORTS[sort])
+    except InvalidCursor as e:
+        return ApiJsonResponse({"error": str(e)}, status=400)
+    return ApiJsonResponse({
+        "summary": reviews_summary(script),
+        "results": [review_data(review) for review in reviews],
+        "next": next_page_url(request, next_cursor),
+    })
+
+def version_stamp(request, model, slug):
+    """Returns ``(pk, version, last_modified)`` for the object with ``slug``, or None.
+
+    Runs a single narrow query per request and memoizes it, so the ETag and
+    Last-Modified callbacks of @condition share it.
+    """
+    stamps = request.__dict__.setdefault('_version_stamps', {})
+    key = (model, slug)
+    if key not in stamps:
+        stamps[key] = model.objects.filter(slug=slug).values_list('pk', 'version', 'updated_at').first()
+    return stamps[key]
+
+def script_etag(request, slug):
+    stamp = version_stamp(request, Script, slug)
+    return f'"script-{stamp[0]}-{stamp[1]}"' if stamp else None
+
+def script_last_modified(request, slug):
+    stamp = version_stamp(request, Script, slug)
+    return stamp[2] if stamp else None
+
+def script_detail(request, script, gallery, reviews, next_cursor):
+    """Returns the detail representation of a script with its gallery and first page of reviews."""
+    reviews_next = None
+    if next_cursor:
+        reviews_next = request.build_absolute_uri(
+            f"{reverse('script_reviews', args=[script.slug])}?cursor={next_cursor}"
+        )
+    return {
+        "id": script.pk,  # Added id field using the primary key
+        "title": script.title,
+        "slug": script.slug,
+        "description": script.description,
+        "price": str(script.price),
+        "image": script.image.url if script.image else None,
+        "image_srcset": images.get_srcset(script.image),
+        "video": script.video,
+        "demoVideo": script.video,
+        "categories": [category.name for category in script.categories.all()],
+        "frameworks": [framework.name for framework in script.frameworks.all()],
+        "is_featured": script.is_featured,
+        "is_bestseller": script.is_bestseller,
+        "created_at": script.created_at,
+        "tebex_id": script.tebex_id,
+        "showcase_servers": [server.name for server in script.showcase_servers.all()],
+        "images": [image.image.url if image.image else None for image in gallery],
+        "images_srcset": [images.get_srcset(image.image) for image in gallery],
+        "key_benefits": script.key_benefits,
+        "reviews_count": script.get_reviews_count(),
+        "rating": script.get_rating(),
+        # Only the first page of reviews is embedded; the rest is served by script_reviews_view.
+        "reviews": [review_data(review) for review in reviews],
+        "reviews_summary": reviews_summary(script),
+        "reviews_next": reviews_next,
+        "core_features": script.core_features,  # Added key_featured field
+        "system_requirements": script.system_requirements,  # Added system_requirements field
+    }
+
+@read_from_replica
+@condition(etag_func=script_etag, last_modified_func=script_last_modified)
 def script_by_slug_view(request, slug):
     """Returns a script by its slug as a JSON response."""
     try:
         script = get_object_or_404(Script, slug=slug)
-        data = {
-            "id": script.pk,  # Added id field using the primary key
-            "title": script.title,
-            "slug": script.slug,
-            "description": script.description,
-            "price": str(script.price),
-            "image": script.image.url if script.image else None,
-            "video": script.video,
-            "demoVideo": script.video,
-            "categories": [category.name for category in script.categories.all()],
-            "frameworks": [framework.name for framework in script.frameworks.all()],
-            "is_featured": script.is_featured,
-            "is_bestseller": script.is_bestseller,
-            "created_at": script.created_at,
-            "tebex_id": script.tebex_id,
-            "showcase_servers": [server.name for server in script.showcase_servers.all()],
-            "images": [image.image.url if image.image else None for image in script.images.all()],
-            "key_benefits": script.key_benefits,
-            "reviews_count": script.get_reviews_count(),
-            "rating": script.get_rating(),
-            "reviews": [
-                {
-                    "name": review.name,
-                    "rating": review.rating,
-                    "description": review.description,
-                    "created_at": review.created_at,
-                }
-                for review in script.get_reviews()
-            ],
-            "core_features": script.core_features,  # Added key_featured field
-            "system_requirements": script.system_requirements,  # Added system_requirements field
-        }
+        gallery = list(script.images.all())
+        reviews, next_cursor = fetch_page(script.get_reviews(), REVIEW_SORTS['newest'], DEFAULT_PAGE_SIZE)
+        data = script_detail(request, script, gallery, reviews, next_cursor)
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data)
+    return ApiJsonResponse(data)
+
+def script_summary(script):
+    """Returns the listing representation of a script."""
+    return {
+        "id": script.pk,
+        "title": script.title,
+        "slug": script.slug,
+        "description": script.description,
+        "price": str(script.price),
+        "image": script.image.url if script.image else None,
+        "image_srcset": images.get_srcset(script.image),
+        "video": script.video,
+        "demoVideo": script.video,
+        "categories": [category.name for category in script.categories.all()],
+        "frameworks": [framework.name for framework in script.frameworks.all()],
+        "is_featured": script.is_featured,
+        "is_bestseller": script.is_bestseller,
+        "created_at": script.created_at,
+        "tebex_id": script.tebex_id,
+        "showcase_servers": [server.name for server in script.showcase_servers.all()],
+        "rating": script.get_rating(),
+        "reviews_count": script.get_reviews_count(),
+        "system_requirements": script.system_requirements,
+    }
+
+def listed_scripts():
+    # Ratings come from the denormalized aggregate columns and M2M names
+    # from prefetches so the listing runs in a fixed number of queries.
+    return Script.objects.prefetch_related('categories', 'frameworks', 'showcase_servers')
 
+def all_scripts_data():
+    """Returns the payload of all_scripts_view, also written to its snapshot."""
+    return [script_summary(script) for script in listed_scripts()]
+
+def filtered_scripts_response(request):
+    """Returns a cursor-paginated page of the scripts matching the request's filters, with their count and facet counts."""
+    try:
+        filters = facets.parse_filters(request.GET)
+        scripts = facets.filter_scripts(listed_scripts(), filters)
+        scripts, next_cursor = paginate(request, scripts, facets.SCRIPT_SORTS[filters['sort']])
+    except (facets.InvalidFilter, InvalidCursor) as e:
+        return ApiJsonResponse({"error": str(e)}, status=400)
+    return ApiJsonResponse({
+        "results": [script_summary(script) for script in scripts],
+        "count": facets.filter_scripts(Script.objects.all(), filters).count(),
+        "facets": facets.facet_counts(filters),
+        "next": next_page_url(request, next_cursor),
+    })
+
+@serve_snapshot('scripts')
+@read_from_replica
 def all_scripts_view(request):
-    """Returns all scripts as a JSON response."""
+    """Returns all scripts as a JSON response, a cursor-paginated page or a streamed array, or a filtered page."""
     try:
-        scripts = Script.objects.all()
-        data = [
-            {
-                "id": script.pk,
-                "title": script.title,
-                "slug": script.slug,
-                "description": script.description,
-                "price": str(script.price),
-                "image": script.image.url if script.image else None,
-                "video": script.video,
-                "demoVideo": script.video,
-                "categories": [category.name for category in script.categories.all()],
-                "frameworks": [framework.name for framework in script.frameworks.all()],
-                "is_featured": script.is_featured,
-                "is_bestseller": script.is_bestseller,
-                "created_at": script.created_at,
-                "tebex_id": script.tebex_id,
-                "showcase_servers": [server.name for server in script.showcase_servers.all()],
-                "rating": script.get_rating(),
-                "reviews_count": script.get_reviews_count(),
-                "system_requirements": script.system_requirements,
-            }
-            for script in scripts
-        ]
+        if facets.wants_filtering(request):
+            return filtered_scripts_response(request)
+        scripts = listed_scripts()
+        if wants_pagination(request):
+            return paginated_response(request, scripts, script_summary, ordering='-created_at')
+        if wants_streaming(request):
+            return StreamingJsonResponse(scripts, script_summary)
+        data = all_scripts_data()
     except Exception as e:
         data = {"error": f"Failed to fetch scripts: {str(e)}"}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
 
 @csrf_exempt
+@ratelimit('10/m')
 def write_review_view(request):
     """Handles review submissions for a script."""
     if request.method == 'POST':
@@ -131,12 +254,15 @@ def write_review_view(request):
             rating = data.get('rating')
             description = data.get('description')
 
+            if ingest.is_spooled():
+                return spool_review(request, data)
+
             if not all([script_id, name, rating, description]):
-                return JsonResponse({'error': 'All fields are required.'}, status=400)
+                return ApiJsonResponse({'error': 'All fields are required.'}, status=400)
 
             script = Script.objects.filter(pk=script_id).first()
             if not script:
-                return JsonResponse({'error': 'Script not found.'}, status=404)
+                return ApiJsonResponse({'error': 'Script not found.'}, status=404)
 
             Review.objects.create(
                 script=script,
@@ -145,191 +271,240 @@ def write_review_view(request):
                 description=description
             )
 
-            return JsonResponse({'message': 'Review submitted successfully.'}, status=201)
+            return ApiJsonResponse({'message': 'Review submitted successfully.'}, status=201)
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+            return ApiJsonResponse({'error': 'Invalid JSON data.'}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return ApiJsonResponse({'error': str(e)}, status=500)
 
-    return JsonResponse({'error': 'Invalid request method.'}, status=405)
+    return ApiJsonResponse({'error': 'Invalid request method.'}, status=405)
+
+def spool_review(request, data):
+    """Validates a review submission and queues it for the next batch; answers 202 with a status URL."""
+    try:
+        review = ingest.validate(data)
+    except ingest.InvalidReview as e:
+        return ApiJsonResponse({'error': str(e)}, status=400)
+    if not Script.objects.filter(pk=review['script_id']).exists():
+        return ApiJsonResponse({'error': 'Script not found.'}, status=404)
+
+    token = ingest.enqueue(review)
+    status_url = request.build_absolute_uri(reverse('review_status', args=[token]))
+    response = ApiJsonResponse({
+        'message': 'Review accepted for publishing.',
+        'token': str(token),
+        'status': ingest.QUEUED,
+        'status_url': status_url,
+    }, status=202)
+    response['Location'] = status_url
+    return response
+
+def review_status_view(request, token):
+    """Returns whether a spooled review submission is queued, published or rejected."""
+    status = ingest.get_status(token)
+    if status is None:
+        return ApiJsonResponse({'error': 'Unknown review submission.'}, status=404)
+    return ApiJsonResponse({'token': str(token), **status})
+
+def testimonial_data(testimonial):
+    """Returns the JSON representation of a testimonial."""
+    return {
+        "pfp": testimonial.pfp.url if testimonial.pfp else None,
+        "name": testimonial.name,
+        "comment": testimonial.comment,
+        "date": testimonial.date,
+    }
 
+@cached_response(Testimonial)
 def all_testimonials_view(request):
-    """Returns all testimonials as a JSON response."""
+    """Returns all testimonials as a JSON response, a cursor-paginated page or a streamed array."""
     try:
         testimonials = Testimonial.objects.all()
-        data = [
-            {
-                "pfp": testimonial.pfp.url if testimonial.pfp else None,
-                "name": testimonial.name,
-                "comment": testimonial.comment,
-                "date": testimonial.date,
-            }
-            for testimonial in testimonials
-        ]
+        if wants_pagination(request):
+            return paginated_response(request, testimonials, testimonial_data, ordering='-date')
+        if wants_streaming(request):
+            return StreamingJsonResponse(testimonials, testimonial_data)
+        data = [testimonial_data(testimonial) for testimonial in testimonials]
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
+
+def faq_data(faq):
+    """Returns the JSON representation of a FAQ."""
+    return {'question': faq.question, 'answer': faq.answer}
 
+def all_faqs_data():
+    """Returns the payload of faq_view, also written to its snapshot."""
+    return [faq_data(faq) for faq in FAQ.objects.all()]
+
+@serve_snapshot('faqs')
+@read_from_replica
+@cached_response(FAQ)
 def faq_view(request):
-    """Returns all FAQs as a JSON response."""
+    """Returns all FAQs as a JSON response, or a cursor-paginated page when `limit`/`cursor` is given."""
     try:
-        faqs = FAQ.objects.all()
-        data = [{'question': faq.question, 'answer': faq.answer} for faq in faqs]
+        if wants_pagination(request):
+            return paginated_response(request, FAQ.objects.all(), faq_data)
+        data = all_faqs_data()
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
+
+def blog_post_etag(request, slug):
+    stamp = version_stamp(request, BlogPost, slug)
+    return f'"post-{stamp[0]}-{stamp[1]}"' if stamp else None
+
+def blog_post_last_modified(request, slug):
+    stamp = version_stamp(request, BlogPost, slug)
+    return stamp[2] if stamp else None
+
+def blog_post_data(post):
+    """Returns the JSON representation of a blog post."""
+    return {
+        "title": post.title,
+        "description": post.description,
+        "content": post.content,
+        "author": post.author,
+        "published_date": post.published_date,
+        "modified_date": post.modified_date,
+        "category": post.category,
+        "slug": post.slug,
+    }
 
+@read_from_replica
+@condition(etag_func=blog_post_etag, last_modified_func=blog_post_last_modified)
 def blog_post_view(request, slug):
     """Returns a blog post by its slug as a JSON response."""
     try:
         post = BlogPost.objects.filter(slug=slug).first()
         if not post:
-            return JsonResponse({"error": "Blog post not found."}, status=404)
-
-        data = {
-            "title": post.title,
-            "description": post.description,
-            "content": post.content,
-            "author": post.author,
-            "published_date": post.published_date,
-            "modified_date": post.modified_date,
-            "category": post.category,
-            "slug": post.slug,
-        }
-        return JsonResponse(data)
+            return ApiJsonResponse({"error": "Blog post not found."}, status=404)
+
+        return ApiJsonResponse(blog_post_data(post))
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return ApiJsonResponse({"error": str(e)}, status=500)
+
+def blog_post_summary(post):
+    """Returns the listing representation of a blog post."""
+    return {
+        "title": post.title,
+        "description": post.description,
+        "author": post.author,
+        "published_date": post.published_date,
+        "category": post.category,
+        "slug": post.slug,
+    }
+
+def all_blog_posts_data():
+    """Returns the payload of all_blog_posts_view, also written to its snapshot."""
+    return [blog_post_summary(post) for post in BlogPost.objects.all()]
 
+@serve_snapshot('blog_posts')
+@read_from_replica
+@cached_response(BlogPost)
 def all_blog_posts_view(request):
-    """Returns all blog posts as a JSON response."""
+    """Returns all blog posts as a JSON response, a cursor-paginated page or a streamed array."""
     try:
         posts = BlogPost.objects.all()
-        data = [
-            {
-                "title": post.title,
-                "description": post.description,
-                "author": post.author,
-                "published_date": post.published_date,
-                "category": post.category,
-                "slug": post.slug,
-            }
-            for post in posts
-        ]
+        if wants_pagination(request):
+            return paginated_response(request, posts, blog_post_summary, ordering='-published_date')
+        if wants_streaming(request):
+            return StreamingJsonResponse(posts, blog_post_summary)
+        data = all_blog_posts_data()
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
+
+def team_member_data(member):
+    """Returns the JSON representation of a team member."""
+    return {
+        "name": member.name,
+        "role": member.role,
+        "short_description": member.short_description,
+    }
 
+@cached_response(TeamMember)
 def team_members_view(request):
-    """Returns all team members as a JSON response."""
+    """Returns all team members as a JSON response, or a cursor-paginated page when `limit`/`cursor` is given."""
     try:
         team_members = TeamMember.objects.all()
-        data = [
-            {
-                "name": member.name,
-                "role": member.role,
-                "short_description": member.short_description,
-            }
-            for member in team_members
-        ]
+        if wants_pagination(request):
+            return paginated_response(request, team_members, team_member_data)
+        data = [team_member_data(member) for member in team_members]
     except Exception as e:
         data = {"error": str(e)}
 
-    return JsonResponse(data, safe=False)
+    return ApiJsonResponse(data, safe=False)
 
-def search_view(request):
-    """Handles search queries for blog posts, scripts, and team members."""
-    query = request.GET.get('q', '')
-    results = {
-        "blog_posts": [],
-        "scripts": [],
-        "team_members": []
+def script_search_result(script):
+    """Returns the search result representation of a script."""
+    return {
+        "title": script.title,
+        "description": script.description,
+        "price": str(script.price),
+        "slug": script.slug,
+        "images": [image.image.url if image.image else None for image in script.images.all()],
     }
 
-    if query:
-        # Search BlogPosts
-        blog_posts = BlogPost.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query) | Q(content__icontains=query)
-        )
-        results["blog_posts"] = [
-            {
-                "title": post.title,
-                "description": post.description,
-                "author": post.author,
-                "published_date": post.published_date,
-                "category": post.category,
-                "slug": post.slug,
-            }
-            for post in blog_posts
-        ]
-
-        # Search Scripts
-        scripts = Script.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query) | Q(key_benefits__icontains=query)
-        )
-        results["scripts"] = [
-            {
-                "title": script.title,
-                "description": script.description,
-                "price": str(script.price),
-                "slug": script.slug,
-                "images": [image.image.url if image.image else None for image in script.images.all()],
-            }
-            for script in scripts
-        ]
+SEARCH_SERIALIZERS = {
+    "blog_posts": (lambda queryset: queryset, blog_post_summary),
+    "scripts": (lambda queryset: queryset.prefetch_related('images'), script_search_result),
+    "team_members": (lambda queryset: queryset, team_member_data),
+}
 
-        # Search TeamMembers
-        team_members = TeamMember.objects.filter(
-            Q(name__icontains=query) | Q(role__icontains=query) | Q(short_description__icontains=query)
-        )
-        results["team_members"] = [
-            {
-                "name": member.name,
-                "role": member.role,
-                "short_description": member.short_description,
-            }
-            for member in team_members
-        ]
-
-    return JsonResponse(results, safe=False)
+@ratelimit('60/m')
+def search_view(request):
+    """Handles BM25-ranked full-text search over blog posts, scripts, and team members."""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', search.DEFAULT_LIMIT)), search.MAX_LIMIT))
+    except ValueError:
+        return ApiJsonResponse({'error': 'Invalid limit.'}, status=400)
+    types = [name for name in request.GET.get('types', '').split(',') if name] or list(search.INDEXES)
+    unknown = set(types) - set(search.INDEXES)
+    if unknown:
+        return ApiJsonResponse({'error': f"Unknown search types: {', '.join(sorted(unknown))}."}, status=400)
+
+    results = {name: [] for name in types}
+    if query:
+        for name in types:
+            index = search.INDEXES[name]
+            hits = search.search(index, query, limit)
+            prepare, serialize = SEARCH_SERIALIZERS[name]
+            objects = prepare(index.model.objects.filter(pk__in=[pk for pk, _ in hits])).in_bulk()
+            results[name] = [
+                {**serialize(objects[pk]), "snippet": snippet}
+                for pk, snippet in hits if pk in objects
+            ]
+
+    return ApiJsonResponse(results, safe=False)
+
+def cache_metrics_view(request):
+    """Returns the response cache hit/miss counters per endpoint."""
+    if not can_view_metrics(request):
+        return ApiJsonResponse({'error': 'Forbidden.'}, status=403)
+    return ApiJsonResponse(get_metrics())
+
+def performance_metrics_view(request):
+    """Returns the rolling per-route latency histograms (optionally only ?route=<url name>)."""
+    if not can_view_metrics(request):
+        return ApiJsonResponse({'error': 'Forbidden.'}, status=403)
+    return ApiJsonResponse(performance.get_histograms(request.GET.get('route') or None))
 
 class FiveMCallback(View):
     def get(self, request, *args, **kwargs):
         code = request.GET.get('code')
         if not code:
-            return JsonResponse({'error': 'Code is missing'}, status=400)
-
-        # Exchange code for access token
-        token_response = requests.post(
-            'https://idms.fivem.net/oauth2/token',
-            data={
-                'grant_type': 'authorization_code',
-                'code': code,
-                'redirect_uri': request.build_absolute_uri(reverse('fivem_callback')),
-                'client_id': settings.FIVEM_CLIENT_ID,
-                'client_secret': settings.FIVEM_CLIENT_SECRET,
-            }
-        )
+            return ApiJsonResponse({'error': 'Code is missing'}, status=400)
 
-        if token_response.status_code != 200:
-            return JsonResponse({'error': 'Token exchange failed'}, status=400)
-
-        access_token = token_response.json().get('access_token')
-
-        # Fetch user info
-        userinfo_response = requests.get(
-            'https://idms.fivem.net/oauth2/userinfo',
-            headers={
-                'Authorization': f'Bearer {access_token}'
-            }
-        )
-
-        if userinfo_response.status_code != 200:
-            return JsonResponse({'error': 'Failed to fetch user info'}, status=400)
+        try:
+            userinfo = fivem.fetch_user(code, request.build_absolute_uri(reverse('fivem_callback')))
+        except fivem.FiveMError as e:
+            return ApiJsonResponse({'error': str(e)}, status=e.status)
 
-        userinfo = userinfo_response.json()
         sub = userinfo.get('sub')
         email = userinfo.get('email')
         preferred_username = userinfo.get('preferred_username')
@@ -346,7 +521,7 @@ class FiveMCallback(View):
             )
 
         # Return user data as JSON
-        return JsonResponse({
+        return ApiJsonResponse({
             'username': user.username,
             'email': user.email,
             'fivem_id': user.fivem_id
@@ -355,7 +530,7 @@ class FiveMCallback(View):
 def fivem_login_view(request):
     """Returns the FiveM OAuth login URL."""
     fivem_auth_url = (
-        f"https://idms.fivem.net/oauth2/authorize?"
+        f"{fivem.oauth_url('authorize')}?"
         f"response_type=code&client_id={settings.FIVEM_CLIENT_ID}&redirect_uri={request.build_absolute_uri(reverse('fivem_callback'))}"
     )
-    return JsonResponse({'url': fivem_auth_url}, status=200)
\ No newline at end of file
+    return ApiJsonResponse({'url': fivem_auth_url}, status=200)
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Throughput and tail latency of the read endpoints: async views under ASGI versus sync views under WSGI.
+
+    python -m benchmarks.asgi --size medium --concurrency 1 16 64 --db-latency-ms 2 --client-delay-ms 20
+
+Both stacks are driven in this process against the same seeded database,
+through Django's real handlers: WSGIHandler on a pool of --threads worker
+threads (like a threaded WSGI server), and ASGIHandler with the async views
+of api.async_views on one event loop. --concurrency clients each send
+--requests / concurrency requests back to back, cycling through the read
+endpoints; latencies include the time a request waits for a free worker.
+
+SQLite in memory answers in microseconds, so --db-latency-ms adds a delay
+to every query to stand in for a networked database, and --client-delay-ms
+makes every response take that long to send, like a client on a slow link.
+Both hold a WSGI worker thread, while under ASGI only the request's own
+ORM thread (a database wait) or nothing at all (a slow client) is blocked.
+
+Expect ASGI to lose on per-request overhead: Django's own middleware
+(sessions, CSRF, auth, messages, ...) is sync-only, so every hook of it
+hops to a thread and back, and each ORM call does the same. It only pays
+off once requests spend most of their time waiting.
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import harness
+
+READ_ENDPOINTS = (
+    'stats', 'featured_servers', 'script_reviews', 'script_by_slug', 'all_scripts_page', 'all_testimonials',
+    'faq_view', 'blog_post_view', 'all_blog_posts_view_page', 'team_members_view',
+)
+
+
+def async_urlconf():
+    """Returns a URLconf serving api.urls with the async views, as under zrg.settings_asgi."""
+    from django.urls import URLPattern, include, path
+    from api import async_views, urls
+
+    patterns = [
+        URLPattern(pattern.pattern, getattr(async_views, pattern.callback.__name__, pattern.callback),
+                   pattern.default_args, pattern.name)
+        for pattern in urls.urlpatterns
+    ]
+
+    class AsyncUrls:
+        urlpatterns = [path('api/', include(patterns))]
+
+    return AsyncUrls
+
+
+def add_db_latency(seconds):
+    """Delays every query on every connection by ``seconds``."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if slow_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, slow_query)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all(initialized_only=True):
+        install(None, connection)
+
+
+def wsgi_environ(path, query):
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+
+
+def wsgi_request(app, path, query, client_delay):
+    """Runs one request through the WSGI app on the calling worker thread; returns the status code."""
+    status = []
+    result = app(wsgi_environ(path, query), lambda line, headers, exc_info=None: status.append(int(line[:3])))
+    try:
+        for _ in result:
+            # Writing to a slow client blocks the worker thread.
+            time.sleep(client_delay)
+    finally:
+        result.close()
+    return status[0]
+
+
+async def asgi_request(app, path, query, client_delay):
+    """Runs one request through the ASGI app; returns the status code."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')], 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    messages = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+    disconnected = asyncio.Event()
+    status = []
+
+    async def receive():
+        message = next(messages, None)
+        if message is None:
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+        return message
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body':
+            await asyncio.sleep(client_delay)
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return status[0]
+
+
+async def run_load(issue, targets, concurrency, total):
+    """Runs ``total`` requests from ``concurrency`` clients; returns latencies, errors and wall time."""
+    latencies = []
+    errors = 0
+
+    async def client(offset):
+        nonlocal errors
+        for i in range(offset, total, concurrency):
+            path, query = targets[i % len(targets)]
+            start = time.perf_counter()
+            status = await issue(path, query)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=['small', 'medium', 'large'], default='small')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--requests', type=int, default=640, help='Requests per run')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0)
+    parser.add_argument('--client-delay-ms', type=float, default=0.0)
+    parser.add_argument('--output', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    harness.setup()
+    import logging
+    from urllib.parse import urlencode
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test.utils import override_settings
+    from benchmarks import endpoints
+
+    logging.getLogger('api.performance').setLevel(logging.ERROR)
+    fixtures = endpoints.seed(args.size)
+    requests = endpoints.endpoint_requests(fixtures)
+    targets = [(requests[name][1], urlencode(requests[name][2])) for name in READ_ENDPOINTS]
+    if args.db_latency_ms:
+        add_db_latency(args.db_latency_ms / 1000)
+    client_delay = args.client_delay_ms / 1000
+
+    wsgi_app = WSGIHandler()
+    pool = ThreadPoolExecutor(max_workers=args.threads)
+    loop = asyncio.new_event_loop()
+
+    async def wsgi_issue(path, query):
+        return await loop.run_in_executor(pool, wsgi_request, wsgi_app, path, query, client_delay)
+
+    rows = []
+    for mode in ('wsgi', 'asgi'):
+        if mode == 'asgi':
+            urlconf = override_settings(ROOT_URLCONF=async_urlconf())
+            urlconf.enable()
+            asgi_app = ASGIHandler()
+
+            async def issue(path, query):
+                return await asgi_request(asgi_app, path, query, client_delay)
+        else:
+            issue = wsgi_issue
+        # Warm up caches and connections.
+        loop.run_until_complete(run_load(issue, targets, 1, len(targets)))
+        for concurrency in args.concurrency:
+            latencies, errors, wall = loop.run_until_complete(run_load(issue, targets, concurrency, args.requests))
+            rows.append({
+                'mode': mode,
+                'concurrency': concurrency,
+                'req_per_s': round(len(latencies) / wall, 1),
+                **harness.summarize(latencies),
+                'p99_ms': round(harness.percentile(latencies, 0.99) * 1000, 3),
+                'max_ms': round(max(latencies) * 1000, 3),
+                'errors': errors,
+            })
+        if mode == 'asgi':
+            urlconf.disable()
+    pool.shutdown()
+    loop.close()
+
+    print(f"\n{args.size} dataset, {args.requests} requests per run, {args.threads} WSGI threads, "
+          f"db latency {args.db_latency_ms}ms, client delay {args.client_delay_ms}ms")
+    harness.print_table(
+        rows, ['mode', 'concurrency', 'req_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'mean_ms', 'errors'],
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""Latency, SQL query count and payload size of every API route, checked against budgets.
+
+    python -m benchmarks.endpoints --sizes small medium large --output endpoints.json
+
+Each size is seeded with generate_load_dataset's generator. Every route in
+api/urls.py is requested through the test client with the response cache
+cleared ("cold", what the view itself costs) and once more warm. Query
+counts must not exceed benchmarks/budgets.json at any size, so an N+1
+regression shows up as soon as the dataset grows; p95 latencies are
+budgeted per size. The exit status is 1 when a budget is exceeded.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from benchmarks import harness
+
+SIZES = {
+    'small': {'scripts': 50, 'reviews_per_script': 5, 'posts': 50},
+    'medium': {'scripts': 1000, 'reviews_per_script': 20, 'posts': 2000},
+    'large': {'scripts': 10000, 'reviews_per_script': 50, 'posts': 20000},
+}
+STAFF_ENDPOINTS = ('cache_metrics', 'performance_metrics')
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+
+def seed(size):
+    """Replaces the database contents with the ``size`` dataset and returns the slugs the requests use."""
+    from django.contrib.auth import get_user_model
+    from api import dataset, search
+    from api.models import (
+        FAQ, BlogPost, Category, FeaturedServer, Framework, Script, ShowcaseServer, Stats, TeamMember, Testimonial,
+    )
+
+    # Ordinary deletes rather than flush, which would reset the whole database and can't run inside a test case.
+    for model in (
+        Script, BlogPost, Category, Framework, ShowcaseServer, Stats, FeaturedServer, Testimonial, FAQ, TeamMember,
+    ):
+        model.objects.all().delete()
+    get_user_model().objects.filter(username='bench-staff').delete()
+    for model in search.INDEXES_BY_MODEL:
+        search.rebuild(model)
+    spec = SIZES[size]
+    dataset.DatasetGenerator(seed=1).generate(**spec)
+    Stats.objects.create(active_users=1200, premium_scripts=spec['scripts'])
+    FeaturedServer.objects.bulk_create(
+        [FeaturedServer(name=f'Server {i}', image=f'featured_servers/{i}.png', url='https://example.com') for i in range(12)]
+    )
+    Testimonial.objects.bulk_create(
+        [Testimonial(name=f'Player {i}', comment='Great scripts.') for i in range(max(10, spec['scripts'] // 10))]
+    )
+    FAQ.objects.bulk_create([FAQ(question=f'Question {i}?', answer='Answer.') for i in range(20)])
+    TeamMember.objects.bulk_create(
+        [TeamMember(name=f'Member {i}', role='Developer', short_description='Writes scripts.') for i in range(10)]
+    )
+    script = Script.objects.order_by('-reviews_count', 'pk').first()
+    get_user_model().objects.create_user(username='bench-staff', password='bench', is_staff=True)
+    return {
+        'script_id': script.pk,
+        'script_slug': script.slug,
+        'post_slug': BlogPost.objects.order_by('pk').values_list('slug', flat=True).first(),
+        'search_term': script.title.split()[0],
+        'category_ids': ','.join(str(pk) for pk in Category.objects.order_by('pk').values_list('pk', flat=True)[:2]),
+    }
+
+
+def endpoint_requests(fixtures):
+    """Returns ``{url name: (method, path, params)}`` for every route in api/urls.py."""
+    from django.urls import reverse
+
+    requests = {
+        'stats': ('get', reverse('stats'), {}),
+        'featured_servers': ('get', reverse('featured_servers'), {}),
+        'script_reviews': ('get', reverse('script_reviews', args=[fixtures['script_slug']]), {}),
+        'script_by_slug': ('get', reverse('script_by_slug', args=[fixtures['script_slug']]), {}),
+        'all_scripts': ('get', reverse('all_scripts'), {}),
+        'all_scripts_page': ('get', reverse('all_scripts'), {'limit': 20}),
+        'all_scripts_filtered': ('get', reverse('all_scripts'), {
+            'categories': fixtures['category_ids'], 'min_price': 5, 'sort': 'price_low', 'limit': 20,
+        }),
+        'write_review': ('post', reverse('write_review'), {
+            'script_id': fixtures['script_id'], 'name': 'Bench', 'rating': 5, 'description': 'Fast.',
+        }),
+        # An unknown token: the database and every spool directory are searched.
+        'review_status': ('get', reverse('review_status', args=['00000000-0000-4000-8000-000000000000']), {}),
+        'all_testimonials': ('get', reverse('all_testimonials'), {}),
+        'faq_view': ('get', reverse('faq_view'), {}),
+        'blog_post_view': ('get', reverse('blog_post_view', args=[fixtures['post_slug']]), {}),
+        'all_blog_posts_view': ('get', reverse('all_blog_posts_view'), {}),
+        'all_blog_posts_view_page': ('get', reverse('all_blog_posts_view'), {'limit': 20}),
+        'team_members_view': ('get', reverse('team_members_view'), {}),
+        'search': ('get', reverse('search'), {'q': fixtures['search_term']}),
+        'fivem_login': ('get', reverse('fivem_login'), {}),
+        # Without a code the callback answers before contacting FiveM.
+        'fivem_callback': ('get', reverse('fivem_callback'), {}),
+        'cache_metrics': ('get', reverse('cache_metrics'), {}),
+        'performance_metrics': ('get', reverse('performance_metrics'), {}),
+    }
+    from api.urls import urlpatterns
+    missing = {pattern.name for pattern in urlpatterns} - set(requests)
+    if missing:
+        raise RuntimeError(f"No benchmark request defined for: {', '.join(sorted(missing))}")
+    return requests
+
+
+def make_clients():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    staff = Client()
+    staff.force_login(get_user_model().objects.get(username='bench-staff'))
+    return Client(), staff
+
+
+def request(client, method, path, params):
+    if method == 'post':
+        return client.post(path, json.dumps(params), content_type='application/json')
+    response = client.get(path, params)
+    if response.streaming:
+        response.content = b''.join(response.streaming_content)
+    return response
+
+
+def measure_endpoint(name, method, path, params, clients, repeat):
+    """Returns status, SQL queries and bytes of a cold request, and cold/warm latency percentiles."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from api.cache import get_cache
+
+    client = clients[1] if name in STAFF_ENDPOINTS else clients[0]
+    cache = get_cache()
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as captured:
+        response = request(client, method, path, params)
+    # Read now: the next request's request_started signal resets the query log this slices.
+    queries = len(captured.captured_queries)
+    cold = []
+    for _ in range(repeat):
+        cache.clear()
+        start = time.perf_counter()
+        request(client, method, path, params)
+        cold.append(time.perf_counter() - start)
+    warm = harness.measure(lambda: request(client, method, path, params), repeat)
+    stats = harness.summarize(cold)
+    return {
+        'status': response.status_code,
+        'queries': queries,
+        'bytes': len(response.content),
+        'p50_ms': stats['p50_ms'],
+        'p95_ms': stats['p95_ms'],
+        'warm_p50_ms': harness.summarize(warm)['p50_ms'],
+    }
+
+
+def run_size(size, repeat, only=None):
+    """Seeds ``size`` and measures every (or every ``only``) endpoint; returns ``{name: measurements}``."""
+    from django.test.utils import override_settings
+
+    fixtures = seed(size)
+    clients = make_clients()
+    results = {}
+    # Repeated requests would otherwise measure the 429 of the rate-limited endpoints.
+    with override_settings(API_RATE_LIMIT_ENABLED=False):
+        for name, (method, path, params) in endpoint_requests(fixtures).items():
+            if only and name not in only:
+                continue
+            results[name] = measure_endpoint(name, method, path, params, clients, repeat)
+    return results
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_budgets(size, results, budgets, latency=True):
+    """Returns a message for every measurement of ``size`` that exceeds its budget."""
+    violations = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            violations.append(f'{size}/{name}: no budget defined')
+            continue
+        if result['status'] >= 500:
+            violations.append(f"{size}/{name}: status {result['status']}")
+        if result['queries'] > budget['queries']:
+            violations.append(f"{size}/{name}: {result['queries']} queries > budget {budget['queries']}")
+        max_p95 = budget.get('p95_ms', {}).get(size)
+        if latency and max_p95 is not None and result['p95_ms'] > max_p95:
+            violations.append(f"{size}/{name}: p95 {result['p95_ms']}ms > budget {max_p95}ms")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--endpoints', nargs='*', help='Only measure these url names')
+    parser.add_argument('--budgets', default=BUDGETS_PATH)
+    parser.add_argument('--output', default='endpoint-benchmarks.json', help='Where to write the JSON results')
+    parser.add_argument('--no-latency-budgets', action='store_true', help='Only enforce query-count budgets')
+    args = parser.parse_args()
+
+    harness.setup()
+    # 4xx answers (e.g. fivem_callback without a code) would be logged on every request.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    budgets = load_budgets(args.budgets)
+    report = {'repeat': args.repeat, 'sizes': {}, 'violations': []}
+    for size in args.sizes:
+        start = time.perf_counter()
+        results = run_size(size, args.repeat, args.endpoints)
+        report['sizes'][size] = {'dataset': SIZES[size], 'endpoints': results}
+        report['violations'] += check_budgets(size, results, budgets, latency=not args.no_latency_budgets)
+        print(f'\n{size} ({time.perf_counter() - start:.0f}s)')
+        harness.print_table(
+            [{'endpoint': name, **result} for name, result in results.items()],
+            ['endpoint', 'status', 'queries', 'bytes', 'p50_ms', 'p95_ms', 'warm_p50_ms'],
+        )
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults written to {args.output}')
+    if report['violations']:
+        print('Budget violations:')
+        for violation in report['violations']:
+            print(f'  {violation}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
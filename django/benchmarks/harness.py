@@ -0,0 +1,52 @@
+"""Helpers shared by the benchmark scripts.
+
+Run benchmarks from the ``django/`` directory, e.g. ``python -m benchmarks.search``.
+Each run migrates a throwaway test database, so db.sqlite3 is never touched.
+"""
+import os
+import statistics
+import time
+
+
+def setup():
+    """Configures Django and creates an empty, migrated test database."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zrg.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def measure(func, repeat):
+    """Calls ``func`` ``repeat`` times and returns the wall-clock durations in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    """Returns p50/p95/mean of ``samples`` in milliseconds."""
+    return {
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def print_table(rows, columns):
+    """Prints ``rows`` (a list of dicts) as an aligned text table."""
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in columns))
@@ -0,0 +1,62 @@
+"""Serialization cost of the scripts listing: stdlib json + DjangoJSONEncoder versus orjson.
+
+    python -m benchmarks.json_encoders --scripts 5000
+"""
+import argparse
+import random
+from decimal import Decimal
+
+from benchmarks import harness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scripts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    harness.setup()
+    from api.models import Category, Script
+    from api.responses import OrjsonEncoder, StdlibJsonEncoder, orjson
+    from api.views import script_summary
+
+    rng = random.Random(args.seed)
+    categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(8)])
+    scripts = Script.objects.bulk_create([
+        Script(
+            title=f'Script {i}', slug=f'script-{i}', description='A script. ' * rng.randrange(5, 40),
+            price=Decimal(rng.randrange(500, 9999)) / 100, tebex_id=str(i),
+            reviews_count=rng.randrange(200), rating_sum=rng.randrange(1000), rating_count=rng.randrange(1, 200),
+        )
+        for i in range(args.scripts)
+    ])
+    Script.categories.through.objects.bulk_create([
+        Script.categories.through(script=script, category=category)
+        for script in scripts for category in rng.sample(categories, 2)
+    ])
+    data = [
+        script_summary(script)
+        for script in Script.objects.prefetch_related('categories', 'frameworks', 'showcase_servers')
+    ]
+
+    encoders = [StdlibJsonEncoder()]
+    if orjson is not None:
+        encoders.append(OrjsonEncoder())
+    else:
+        print('orjson is not installed; only the stdlib encoder is measured.')
+
+    rows = []
+    for encoder in encoders:
+        size = len(encoder.dumps(data))
+        stats = harness.summarize(harness.measure(lambda: encoder.dumps(data), args.repeat))
+        rows.append({'encoder': encoder.name, 'bytes': size, **stats})
+    baseline = rows[0]['p50_ms']
+    for row in rows:
+        row['speedup'] = f"{baseline / row['p50_ms']:.1f}x"
+    print(f'{args.scripts} scripts')
+    harness.print_table(rows, ['encoder', 'bytes', 'p50_ms', 'p95_ms', 'mean_ms', 'speedup'])
+
+
+if __name__ == '__main__':
+    main()
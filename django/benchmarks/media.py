@@ -0,0 +1,170 @@
+"""Serving multi-MB media: django.views.static.serve versus api.media.serve_media.
+
+    python -m benchmarks.media --sizes-mb 2 8 32 --repeat 20
+
+Requests go through the WSGI handler (all middleware included) and the
+bodies are written to a socket drained by a thread. With ``sendfile`` the
+environ offers ``wsgi.file_wrapper`` and bodies whose file has a fileno()
+are sent with os.sendfile() as gunicorn does; without it the response is
+iterated as runserver/wsgiref does. Scenarios:
+
+- ``full``: GET of the whole file;
+- ``tail``: ``Range: bytes=-1048576``, e.g. a player seeking to the end
+  (static.serve ignores Range and sends the whole file);
+- ``revalidate``: ``If-None-Match`` with the ETag of a previous response
+  (static.serve only knows If-Modified-Since).
+"""
+import argparse
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from wsgiref.util import setup_testing_defaults
+
+from django.urls import re_path
+
+from benchmarks import harness
+
+
+def _static_serve(request, path):
+    from django.conf import settings
+    from django.views.static import serve
+
+    return serve(request, path, document_root=settings.MEDIA_ROOT)
+
+
+def _serve_media(request, path):
+    from api.media import serve_media
+
+    return serve_media(request, path)
+
+
+# Used as ROOT_URLCONF: the previous DEBUG-only view next to the new one.
+urlpatterns = [
+    re_path(r'^static-serve/(?P<path>.*)$', _static_serve),
+    re_path(r'^serve-media/(?P<path>.*)$', _serve_media),
+]
+
+
+class FileWrapper:
+    """``wsgi.file_wrapper``: marks bodies the server may send with sendfile()."""
+
+    def __init__(self, filelike, block_size=8192):
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def __iter__(self):
+        return iter(lambda: self.filelike.read(self.block_size), b'')
+
+    def close(self):
+        self.filelike.close()
+
+
+class Sink:
+    """A connected socket whose peer discards everything sent to it."""
+
+    def __init__(self):
+        self.socket, peer = socket.socketpair()
+        self._thread = threading.Thread(target=self._drain, args=(peer,), daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _drain(peer):
+        buffer = bytearray(1 << 20)
+        with peer:
+            while peer.recv_into(buffer):
+                pass
+
+    def close(self):
+        self.socket.close()
+        self._thread.join()
+
+
+def fetch(app, sink, path, headers, sendfile):
+    """Runs one GET through ``app`` and writes its body to ``sink``; returns the status, headers and body size."""
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': 'testserver', 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    environ.update({'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()})
+    if sendfile:
+        environ['wsgi.file_wrapper'] = FileWrapper
+    started = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        started['status'] = int(status.split()[0])
+        started['headers'] = dict(response_headers)
+
+    result = app(environ, start_response)
+    sent = 0
+    try:
+        if isinstance(result, FileWrapper) and hasattr(result.filelike, 'fileno'):
+            fd = result.filelike.fileno()
+            offset = os.lseek(fd, 0, os.SEEK_CUR)
+            remaining = int(started['headers']['Content-Length'])
+            while remaining:
+                count = os.sendfile(sink.socket.fileno(), fd, offset, remaining)
+                offset += count
+                remaining -= count
+                sent += count
+        else:
+            for chunk in result:
+                sink.socket.sendall(chunk)
+                sent += len(chunk)
+    finally:
+        result.close()
+    return started['status'], started['headers'], sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[2, 8, 32])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    harness.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+
+    root = tempfile.mkdtemp()
+    sink = Sink()
+    rows = []
+    try:
+        for size in args.sizes_mb:
+            with open(os.path.join(root, f'image-{size}mb.png'), 'wb') as f:
+                f.write(os.urandom(size << 20))
+        with override_settings(MEDIA_ROOT=root, ROOT_URLCONF='benchmarks.media', API_MEDIA_ACCEL=None):
+            app = get_wsgi_application()
+            for size in args.sizes_mb:
+                for view in ('static-serve', 'serve-media'):
+                    path = f'/{view}/image-{size}mb.png'
+                    etag = fetch(app, sink, path, {}, sendfile=True)[1].get('ETag', '"none"')
+                    scenarios = (
+                        ('full', {}, False),
+                        ('full', {}, True),
+                        ('tail', {'Range': 'bytes=-1048576'}, True),
+                        ('revalidate', {'If-None-Match': etag}, True),
+                    )
+                    for scenario, headers, sendfile in scenarios:
+                        outcomes = []
+                        latencies = harness.measure(lambda: outcomes.append(fetch(app, sink, path, headers, sendfile)), args.repeat)
+                        status, _, sent = outcomes[-1]
+                        rows.append({
+                            'size_mb': size,
+                            'view': view,
+                            'scenario': scenario,
+                            'sendfile': 'yes' if sendfile else 'no',
+                            **harness.summarize(latencies),
+                            'status': status,
+                            'body_mb': round(sent / (1 << 20), 2),
+                            'mb_per_s': round(sent / (1 << 20) / (sum(latencies) / len(latencies)), 1),
+                        })
+    finally:
+        sink.close()
+        shutil.rmtree(root)
+
+    harness.print_table(rows, ['size_mb', 'view', 'scenario', 'sendfile', 'p50_ms', 'p95_ms', 'mean_ms', 'status', 'body_mb', 'mb_per_s'])
+
+
+if __name__ == '__main__':
+    main()
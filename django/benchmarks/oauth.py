@@ -0,0 +1,190 @@
+"""Latency of FiveM logins against a local stub OAuth server.
+
+    python -m benchmarks.oauth --logins 200 --idp-latency-ms 5
+
+Each login goes through the real callback view (code exchange, user info,
+user lookup), with FIVEM_OAUTH_BASE_URL pointed at StubOAuthServer. Runs:
+
+- ``cold``: the connection pool is dropped before every login, so each call
+  opens a new connection, as the bare requests.post()/get() calls did;
+- ``pooled``: the process-wide keep-alive session of api.outbound;
+- ``slow_idp``: the stub answers after the read timeout, showing the worker
+  is released after --slow-timeout-s instead of waiting on the IdP.
+
+The stub speaks plain HTTP on the loopback interface, so the pooled gain
+here is the TCP handshake only; against the real IdP every reused
+connection also skips a TLS handshake and a network round trip or two.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from benchmarks import harness
+
+USERINFO = {'sub': 'stub-user', 'email': 'stub@example.com', 'preferred_username': 'stub-user'}
+ACCESS_TOKEN = 'stub-access-token'
+
+
+class StubOAuthServer:
+    """Minimal OAuth provider on 127.0.0.1 serving /token and /userinfo with keep-alive.
+
+    ``delay`` (seconds) is waited before every answer; ``failures`` maps a
+    path to how many of its next requests get a 503. ``connections`` and
+    ``requests`` count what the server accepted.
+    """
+
+    def __init__(self, delay=0.0, failures=None):
+        self.delay = delay
+        self.failures = dict(failures or {})
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without TCP_NODELAY every
+            # answer on a kept-alive connection waits for a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting (slow_idp).
+                    pass
+
+            def answer(self, handle):
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.failures.get(self.path, 0)
+                    if failing:
+                        stub.failures[self.path] = failing - 1
+                time.sleep(stub.delay)
+                if failing:
+                    self.reply(503, {'error': 'unavailable'})
+                else:
+                    self.reply(*handle())
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+
+                def handle():
+                    if self.path != '/token':
+                        return 404, {'error': 'not_found'}
+                    if form.get('grant_type') != ['authorization_code'] or not form.get('code'):
+                        return 400, {'error': 'invalid_grant'}
+                    return 200, {'access_token': ACCESS_TOKEN, 'token_type': 'Bearer'}
+
+                self.answer(handle)
+
+            def do_GET(self):
+                def handle():
+                    if self.path != '/userinfo':
+                        return 404, {'error': 'not_found'}
+                    if self.headers.get('Authorization') != f'Bearer {ACCESS_TOKEN}':
+                        return 401, {'error': 'invalid_token'}
+                    return 200, USERINFO
+
+                self.answer(handle)
+
+        return Handler
+
+
+def run_logins(client, logins, cold=False):
+    """Logs in ``logins`` times; returns the latencies and the response statuses."""
+    from django.urls import reverse
+    from api import outbound
+
+    url = reverse('fivem_callback')
+    latencies, statuses = [], []
+    for _ in range(logins):
+        if cold:
+            outbound.close_session()
+        start = time.perf_counter()
+        statuses.append(client.get(url, {'code': 'stub-code'}).status_code)
+        latencies.append(time.perf_counter() - start)
+    return latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--idp-latency-ms', type=float, default=0.0, help='Delay of every stub answer')
+    parser.add_argument('--slow-logins', type=int, default=5)
+    parser.add_argument('--slow-timeout-s', type=float, default=0.5, help='Read timeout of the slow_idp run')
+    parser.add_argument('--output', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    harness.setup()
+    from django.test import Client
+    from django.test.utils import override_settings
+    from api import outbound
+
+    client = Client()
+    rows = []
+    runs = (
+        ('cold', args.logins, args.idp_latency_ms / 1000, {}),
+        ('pooled', args.logins, args.idp_latency_ms / 1000, {}),
+        ('slow_idp', args.slow_logins, args.slow_timeout_s + 1, {'API_HTTP_READ_TIMEOUT': args.slow_timeout_s}),
+    )
+    for mode, logins, delay, overrides in runs:
+        with StubOAuthServer(delay) as stub, override_settings(FIVEM_OAUTH_BASE_URL=stub.url, **overrides):
+            outbound.close_session()
+            # Warm up, and create the user so every measured login is a lookup.
+            run_logins(client, 1)
+            stub.connections = stub.requests = 0
+            latencies, statuses = run_logins(client, logins, cold=(mode == 'cold'))
+            rows.append({
+                'mode': mode,
+                'logins': logins,
+                **harness.summarize(latencies),
+                'max_ms': round(max(latencies) * 1000, 3),
+                'connections_per_login': round(stub.connections / logins, 2),
+                'statuses': ','.join(sorted({str(status) for status in statuses})),
+            })
+        outbound.close_session()
+
+    print(f'\nidp latency {args.idp_latency_ms}ms, slow_idp read timeout {args.slow_timeout_s}s')
+    harness.print_table(rows, ['mode', 'logins', 'p50_ms', 'p95_ms', 'mean_ms', 'max_ms', 'connections_per_login', 'statuses'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Search latency: FTS5/BM25 index versus the previous LIKE '%q%' scans.
+
+    python -m benchmarks.search --posts 100000
+"""
+import argparse
+import random
+
+from benchmarks import harness
+
+WORDS = (
+    'garage vehicle economy bank police job inventory phone housing drug gang race tuning '
+    'mechanic hospital ambulance fuel weapon clothing shop casino taxi bus trucker fishing '
+    'mining farming hunting prison court lawyer dispatch radio map hud menu admin anticheat'
+).split()
+
+
+def make_text(rng, words):
+    return ' '.join(rng.choice(WORDS) if rng.random() < 0.05 else f'lorem{rng.randrange(5000)}' for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    harness.setup()
+    from django.db.models import Q
+    from django.test import Client
+    from django.utils import timezone
+    from api import search
+    from api.models import BlogPost
+
+    rng = random.Random(args.seed)
+    now = timezone.now()
+    for start in range(0, args.posts, 5000):
+        BlogPost.objects.bulk_create([
+            BlogPost(
+                title=make_text(rng, 6), description=make_text(rng, 20), content=f'<p>{make_text(rng, 120)}</p>',
+                author='bench', category='bench', published_date=now, modified_date=now, slug=f'post-{i}',
+            )
+            for i in range(start, min(start + 5000, args.posts))
+        ])
+    indexed = search.rebuild(BlogPost)
+    print(f'{indexed} blog posts indexed')
+
+    client = Client()
+    rows = []
+    for term in ('garage', 'police job', 'casino'):
+        def legacy():
+            list(BlogPost.objects.filter(
+                Q(title__icontains=term) | Q(description__icontains=term) | Q(content__icontains=term)
+            ).values_list('pk', flat=True))
+
+        def fts():
+            search.search(search.INDEXES['blog_posts'], term, search.DEFAULT_LIMIT)
+
+        def endpoint():
+            client.get('/api/search/', {'q': term, 'types': 'blog_posts'})
+
+        for name, func in (('legacy icontains', legacy), ('fts5 bm25 top-10', fts), ('GET /api/search/', endpoint)):
+            rows.append({'query': term, 'method': name, **harness.summarize(harness.measure(func, args.repeat))})
+    harness.print_table(rows, ['query', 'method', 'p50_ms', 'p95_ms', 'mean_ms'])
+
+
+if __name__ == '__main__':
+    main()
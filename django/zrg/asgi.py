@@ -2,6 +2,9 @@
 ASGI config for zrg project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It uses zrg.settings like zrg.wsgi; run it with
+DJANGO_SETTINGS_MODULE=zrg.settings_asgi to serve the read endpoints with
+async views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -24,8 +24,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.routing.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -57,8 +59,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read replica, refreshed from the primary with `manage.py sync_replicas [--interval N]`.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['api.routing.PrimaryReplicaRouter']
+
+# Aliases the read-only endpoints read from (see api.routing), e.g. ['replica'];
+# empty sends every query to the primary. After a write, the client reads from the
+# primary for API_REPLICA_STICKY_SECONDS, which should exceed the replication lag.
+API_READ_REPLICAS = []
+API_REPLICA_STICKY_SECONDS = 30
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -80,12 +95,97 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Local default; point this at Redis/Memcached in production so cached API
+# responses and their invalidation are shared across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'zrg',
+    }
+}
+
+API_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# 'auto' serializes API responses with orjson when installed, else the stdlib encoder.
+API_JSON_ENCODER = 'auto'
+
+# Stream unpaginated list responses element by element instead of only on ?stream=1.
+API_STREAM_LIST_RESPONSES = False
+
+# Serve the catalog read endpoints with the async views of api.async_views. Off by
+# default, also under zrg.asgi; only worth it under ASGI (opt in with
+# DJANGO_SETTINGS_MODULE=zrg.settings_asgi), since under WSGI every async view pays
+# for an event loop.
+API_ASYNC_VIEWS = False
+
+# Per-request timings (api.middleware.PerformanceMiddleware): send them in a Server-Timing
+# header ('staff': to staff users only, True: to every client, False: never), and keep per-route
+# histograms over API_PERFORMANCE_WINDOWS windows of API_PERFORMANCE_WINDOW_SECONDS, added to the
+# cache every API_PERFORMANCE_FLUSH_INTERVAL seconds.
+API_SERVER_TIMING = 'staff'
+API_PERFORMANCE_WINDOW_SECONDS = 60
+API_PERFORMANCE_WINDOWS = 10
+API_PERFORMANCE_FLUSH_INTERVAL = 5
+API_PERFORMANCE_SLOW_MS = 500
+
+# 'spool' makes write-review answer 202 and queue submissions as files in API_REVIEW_SPOOL_DIR,
+# published in batches of API_REVIEW_SPOOL_BATCH_SIZE by `manage.py flush_review_spool --interval N`
+# (see api.ingest). 'sync' writes each review in the request.
+API_REVIEW_INGESTION = 'sync'
+API_REVIEW_SPOOL_DIR = BASE_DIR / 'spool' / 'reviews'
+API_REVIEW_SPOOL_BATCH_SIZE = 500
+# Claimed submissions older than this (a worker died mid-batch) are queued again.
+API_REVIEW_SPOOL_CLAIM_TIMEOUT = 300
+# Rejected submissions stay visible to the status endpoint this long.
+API_REVIEW_SPOOL_RETENTION = 60 * 60 * 24
+
+# Token-bucket rate limits of @ratelimit views (api.ratelimit), kept per process ('memory')
+# or in the API_RATE_LIMIT_CACHE_ALIAS cache ('cache', shared when the cache is). Set
+# API_RATE_LIMIT_IP_HEADER (e.g. 'HTTP_X_FORWARDED_FOR') behind a reverse proxy.
+# API_RATE_LIMITS overrides views by name, e.g. {'search_view': {'rate': '120/m', 'burst': 30}}.
+API_RATE_LIMIT_ENABLED = True
+API_RATE_LIMIT_BACKEND = 'memory'
+API_RATE_LIMIT_CACHE_ALIAS = 'default'
+API_RATE_LIMIT_IP_HEADER = None
+API_RATE_LIMITS = {}
+
+# Prebuilt gzip/brotli snapshots of the full script, blog post, FAQ and featured server
+# lists (api.snapshots), written by `manage.py build_snapshots` and rebuilt after admin edits.
+API_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+API_SNAPSHOT_REBUILD_ON_ADMIN = True
+
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies of the assets with .gz/.br siblings and the
+# staticfiles.json manifest that {% static %} resolves through (see api.staticfiles).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'api.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Serve STATIC_ROOT through api.staticfiles.serve_static when DEBUG is off; disable when
+# the web server serves it (with the same Cache-Control for hashed names).
+API_SERVE_STATIC = True
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Serve MEDIA_ROOT through api.media.serve_media (byte ranges, ETags, sendfile); disable when
+# the web server serves it directly.
+API_SERVE_MEDIA = True
+# None sends the files from Django; 'x-accel-redirect' (nginx, with API_MEDIA_ACCEL_PREFIX an
+# internal location aliasing MEDIA_ROOT) or 'x-sendfile' (Apache, lighttpd) hands the body to
+# the fronting proxy once Django has resolved the path and checked the conditional headers.
+API_MEDIA_ACCEL = None
+API_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Responsive image variants written under MEDIA_ROOT/derivatives/ (see api.images).
+# API_IMAGE_VARIANTS_ON_SAVE: 'background' encodes an uploaded image on a worker thread
+# once the save commits, 'sync' in the saving request, False leaves it to
+# `manage.py generate_image_variants`.
+API_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+API_IMAGE_VARIANT_FORMATS = ('avif', 'webp')
+API_IMAGE_VARIANTS_ON_SAVE = 'background'
 
 SITE_ID = 1
 
@@ -124,6 +224,10 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        # Its own handler, so the request lines can be silenced (as the tests do) or sent elsewhere.
+        'performance': {
+            'class': 'logging.StreamHandler',
+        },
     },
     'loggers': {
         'django.security.csrf': {
@@ -131,6 +235,13 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        # One JSON line with the timings and query count of requests slower than
+        # API_PERFORMANCE_SLOW_MS; set the level to INFO to log every request.
+        'api.performance': {
+            'handlers': ['performance'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -138,3 +249,14 @@ CSRF_TRUSTED_ORIGINS = []
 
 FIVEM_CLIENT_ID = 'your_fivem_client_id'
 FIVEM_CLIENT_SECRET = 'your_fivem_client_secret'
+FIVEM_OAUTH_BASE_URL = 'https://idms.fivem.net/oauth2'
+
+# Outbound HTTP (api.outbound): pooled keep-alive connections per host, (connect, read)
+# timeouts in seconds, and retries with exponential backoff for failed connections and
+# idempotent requests answered with 502/503/504. A call waits at most about
+# (API_HTTP_RETRIES + 1) * (API_HTTP_CONNECT_TIMEOUT + API_HTTP_READ_TIMEOUT).
+API_HTTP_POOL_SIZE = 10
+API_HTTP_CONNECT_TIMEOUT = 3.05
+API_HTTP_READ_TIMEOUT = 5
+API_HTTP_RETRIES = 2
+API_HTTP_RETRY_BACKOFF = 0.1
@@ -0,0 +1,7 @@
+"""Opt-in settings for ASGI deployments: the base settings with the async read endpoints enabled.
+
+Select them with DJANGO_SETTINGS_MODULE=zrg.settings_asgi; zrg.asgi defaults to zrg.settings.
+"""
+from .settings import *  # noqa: F401,F403
+
+API_ASYNC_VIEWS = True
@@ -3,6 +3,8 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
+from api.media import serve_media
+from api.staticfiles import serve_static
 from api.views import FiveMCallback
 
 urlpatterns = [
@@ -13,7 +15,13 @@ urlpatterns = [
     re_path(r"^(?!admin|media/|static/|api/).*", TemplateView.as_view(template_name="index.html")),
 ]
 
-# Serve static and media files during development
+# Serve static files during development
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+elif getattr(settings, 'API_SERVE_STATIC', False):
+    # Collected, hashed and precompressed assets; see api.staticfiles.
+    urlpatterns += [re_path(rf"^{settings.STATIC_URL.lstrip('/')}(?P<path>.*)$", serve_static)]
+
+if getattr(settings, 'API_SERVE_MEDIA', False):
+    # Uploads and image variants, with byte ranges and conditional GETs; see api.media.
+    urlpatterns += [re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.*)$", serve_media)]